@@ -1,12 +1,16 @@
 import os
-import re
 from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
 
 from dpytools.http.upload.upload_service_client import UploadServiceClient
 from dpytools.logging.logger import DpLogger
 from dpytools.stores.directory.local import LocalDirectoryStore
 from dpytools.utilities.utilities import str_to_bool
 
+from dpypelines.pipeline.shared.email_dispatch import (
+    SubmissionEmail,
+    get_email_dispatcher,
+)
 from dpypelines.pipeline.shared.email_template_message import (
     file_not_found_email,
     supplementary_distribution_not_found_email,
@@ -15,28 +19,43 @@ from dpypelines.pipeline.shared.notification import (
     BasePipelineNotifier,
     notifier_from_env_var_webhook,
 )
-from dpypelines.pipeline.shared.pipelineconfig.matching import get_matching_pattern
+from dpypelines.pipeline.shared.pipelineconfig.matching import (
+    FilePatternMatcher,
+    get_matching_pattern,
+)
 from dpypelines.pipeline.shared.pipelineconfig.transform import get_transform_details
-from dpypelines.pipeline.shared.utils import get_email_client, get_submitter_email
+from dpypelines.pipeline.shared.utils import get_submitter_email
 
 logger = DpLogger("data-ingress-pipelines")
 
 
-def dataset_ingress_v1(files_dir: str, pipeline_config: dict):
+def dataset_ingress_v1(
+    files_dir: str,
+    pipeline_config: dict,
+    transform_outputs: Optional[Union[Tuple[Path, Path], Exception]] = None,
+    piped_files: Sequence[str] = (),
+):
     """
     Version 1 of the dataset ingress pipeline.
 
     Args:
         files_dir (str): Path to the directory where the input files for this pipeline are located.
         pipeline_config (dict): Dictionary of configuration details required to run the pipeline (determined by dataset id)
+        transform_outputs (tuple): The (csv_path, metadata_path) of a transform that has already been run on input files
+            piped to it from the tar by s3_tar_received, in which case the sanity checks and transform are not run again.
+            If the sanity check or transform failed this is the error it raised, which is raised once the required
+            files have been checked.
+        piped_files (list): Names of the files piped to the transform that were not written to files_dir, which count
+            towards the required files.
 
     Raises:
         Exception: If any unexpected error occurs.
     """
-    # Create notifier from webhook env var
+    # Create notifier from webhook env var. The outcome of the run is recorded in
+    # the notification digest by s3_tar_received.start, along with its source_id
     try:
         de_notifier: BasePipelineNotifier = notifier_from_env_var_webhook(
-            "DE_SLACK_WEBHOOK"
+            "DE_SLACK_WEBHOOK", record_in_digest=False
         )
         logger.info("Notifier created", data={"notifier": de_notifier})
     except Exception as err:
@@ -89,12 +108,14 @@ def dataset_ingress_v1(files_dir: str, pipeline_config: dict):
         de_notifier.failure()
         raise err
 
-    # Create email client from env var
+    # Get the email client shared by every run in this process, and collect the
+    # problems with this submission to send to the submitter in one email
     try:
-        email_client = get_email_client()
-        logger.info("Created email client", data={"email_client": email_client})
+        email_client = get_email_dispatcher()
+        submission_email = SubmissionEmail(email_client, submitter_email)
+        logger.info("Got email client", data={"email_client": email_client})
     except Exception as err:
-        logger.error("Error occurred when creating email client", err)
+        logger.error("Error occurred when getting email client", err)
         de_notifier.failure()
         raise err
 
@@ -127,6 +148,11 @@ def dataset_ingress_v1(files_dir: str, pipeline_config: dict):
     # Extract the patterns for required files from the pipeline configuration
     try:
         required_file_patterns = get_matching_pattern(pipeline_config, "required_files")
+        # Match every pattern against the files listed above, rather than listing
+        # the directory again for each check
+        file_matcher = FilePatternMatcher(
+            files_dir, [*files_in_directory, *piped_files], required_file_patterns
+        )
         logger.info(
             "Required file patterns retrieved from pipeline config",
             data={
@@ -145,53 +171,17 @@ def dataset_ingress_v1(files_dir: str, pipeline_config: dict):
         de_notifier.failure()
         raise err
 
-    # Check for the existence of each required file
-    for required_file in required_file_patterns:
-        try:
-            if not local_store.has_lone_file_matching(required_file):
-                try:
-                    raise FileNotFoundError(
-                        f"Could not find file found matching pattern {required_file}"
-                    )
-                except FileNotFoundError as err:
-                    email_content = file_not_found_email(required_file)
-                    email_client.send(
-                        submitter_email, email_content.subject, email_content.message
-                    )
-                    # TODO add logging.error
-                    logger.error(
-                        "Error occurred when looking for required file",
-                        err,
-                        data={"required_file": required_file},
-                    )
-                    de_notifier.failure()
-                    raise err
-        except Exception as err:
-            # files_in_directory = local_store.get_file_names()
-            logger.error(
-                "Error occurred when looking for required file",
-                err,
-                data={
-                    "required_file": required_file,
-                    "required_file_patterns": required_file_patterns,
-                    "files_in_directory": files_in_directory,
-                    "pipeline_config": pipeline_config,
-                },
-            )
-            de_notifier.failure()
-            raise err
-
     # Extract the patterns for supplementary distributions from the pipeline configuration
     try:
         supp_dist_patterns = get_matching_pattern(
             pipeline_config, "supplementary_distributions"
         )
+        file_matcher.add_patterns(supp_dist_patterns)
         logger.info(
             "Supplementary distribution patterns retrieved from pipeline config",
             data={"supplementary_distribution_patterns": supp_dist_patterns},
         )
     except Exception as err:
-        files_in_directory = local_store.get_file_names()
         logger.error(
             "Error occurred when getting supplementary distribution patterns",
             err,
@@ -200,40 +190,56 @@ def dataset_ingress_v1(files_dir: str, pipeline_config: dict):
         de_notifier.failure()
         raise err
 
-    # Check for the existence of each supplementary distribution
-    for supp_dist_pattern in supp_dist_patterns:
+    # Check for the existence of every required file and supplementary distribution
+    # in one pass, so all the problems with a submission are reported together
+    try:
+        missing_required_files = file_matcher.patterns_without_lone_file(
+            required_file_patterns
+        )
+        missing_supp_dists = file_matcher.patterns_without_lone_file(supp_dist_patterns)
+        logger.info(
+            "Checked for required files and supplementary distributions",
+            data={
+                "missing_required_files": missing_required_files,
+                "missing_supplementary_distributions": missing_supp_dists,
+            },
+        )
+    except Exception as err:
+        logger.error(
+            "Error occurred when looking for required files and supplementary distributions",
+            err,
+            data={
+                "required_file_patterns": required_file_patterns,
+                "supplementary_distribution_patterns": supp_dist_patterns,
+                "files_in_directory": files_in_directory,
+                "pipeline_config": pipeline_config,
+            },
+        )
+        de_notifier.failure()
+        raise err
+
+    if missing_required_files or missing_supp_dists:
+        # Catch a trivial raise as we need the stack trace of the
+        # error for the logger, so it needs to be a raised error.
         try:
-            if not local_store.has_lone_file_matching(supp_dist_pattern):
-                # Catch a trivial raise as we need the stack trace of the
-                # error for the logger, so it needs to be a raised error.
-                try:
-                    raise FileNotFoundError(
-                        f"No file found matching pattern {supp_dist_pattern}"
-                    )
-                except FileNotFoundError as err:
-                    email_content = supplementary_distribution_not_found_email(
-                        supp_dist_pattern
-                    )
-                    email_client.send(
-                        submitter_email, email_content.subject, email_content.message
-                    )
-                    # TODO add logging.error
-                    logger.error(
-                        "Error occurred when looking for supplementary distribution",
-                        err,
-                        data={
-                            "supplementary_distribution": supp_dist_pattern,
-                        },
-                    )
-                    de_notifier.failure()
-                    raise err
-        except Exception as err:
+            raise FileNotFoundError(
+                f"No file found matching required file patterns {missing_required_files} "
+                f"or supplementary distribution patterns {missing_supp_dists}"
+            )
+        except FileNotFoundError as err:
+            if missing_required_files:
+                submission_email.add(file_not_found_email(missing_required_files))
+            if missing_supp_dists:
+                submission_email.add(
+                    supplementary_distribution_not_found_email(missing_supp_dists)
+                )
+            submission_email.send()
             logger.error(
-                "Error occurred when looking for supplementary distribution",
+                "Error occurred when looking for required files and supplementary distributions",
                 err,
                 data={
-                    "supplementary_distribution": supp_dist_pattern,
-                    "supplementary_distribution_patterns": supp_dist_patterns,
+                    "missing_required_files": missing_required_files,
+                    "missing_supplementary_distributions": missing_supp_dists,
                     "files_in_directory": files_in_directory,
                     "pipeline_config": pipeline_config,
                 },
@@ -241,127 +247,161 @@ def dataset_ingress_v1(files_dir: str, pipeline_config: dict):
             de_notifier.failure()
             raise err
 
-    # Get the transform inputs from the pipeline_config and run the specified sanity checker for it
-    input_file_paths = []
-    try:
-        transform_inputs = get_transform_details(pipeline_config, "transform_inputs")
-        logger.info("Got transform inputs", data={"transform_inputs": transform_inputs})
-    except Exception as err:
-        logger.error(
-            "Error when getting transform inputs from pipeline config",
-            err,
-            data={"pipeline_config": pipeline_config},
-        )
+    if transform_outputs is None:
+        # Get the transform inputs from the pipeline_config and run the specified sanity checker for it
+        input_file_paths = []
+        try:
+            transform_inputs = get_transform_details(
+                pipeline_config, "transform_inputs"
+            )
+            logger.info(
+                "Got transform inputs", data={"transform_inputs": transform_inputs}
+            )
+        except Exception as err:
+            logger.error(
+                "Error when getting transform inputs from pipeline config",
+                err,
+                data={"pipeline_config": pipeline_config},
+            )
 
-    for pattern, sanity_checker in transform_inputs.items():
+        for pattern, sanity_checker in transform_inputs.items():
+            try:
+                input_file_path: Path = file_matcher.get_pathlike_of_file_matching(
+                    pattern
+                )
+                logger.info(
+                    "Got input file that matches pattern.",
+                    data={
+                        "input_file_path": input_file_path,
+                        "pattern": pattern,
+                        "files_in_directory": files_in_directory,
+                    },
+                )
+            except Exception as err:
+                logger.error(
+                    "Error occurred when looking for file matching pattern",
+                    err,
+                    data={
+                        "pattern": pattern,
+                        "files_in_directory": files_in_directory,
+                        "pipeline_config": pipeline_config,
+                    },
+                )
+
+                de_notifier.failure()
+                raise err
+
+            try:
+                sanity_checker(input_file_path)
+                logger.info(
+                    "Sanity check run on input file path.",
+                    data={
+                        "sanity_checker": sanity_checker,
+                        "input_file_path": input_file_path,
+                    },
+                )
+            except Exception as err:
+                logger.error(
+                    "Error occurred when running sanity checker on input file path.",
+                    err,
+                    data={
+                        "input_file_path": input_file_path,
+                        "files_in_directory": files_in_directory,
+                        "pipeline_config": pipeline_config,
+                    },
+                )
+
+                de_notifier.failure()
+                raise err
+
+            input_file_paths.append(input_file_path)
+
+        # Get the transform function from pipeline config
         try:
-            input_file_path: Path = local_store.get_pathlike_of_file_matching(pattern)
+            transform_function = get_transform_details(pipeline_config, "transform")
             logger.info(
-                "Got input file that matches pattern.",
+                "Got transform function from pipeline config",
                 data={
-                    "input_file_path": input_file_path,
-                    "pattern": pattern,
-                    "files_in_directory": files_in_directory,
+                    "transform_function": transform_function,
+                    "input_file_paths": input_file_paths,
                 },
             )
         except Exception as err:
             logger.error(
-                "Error occurred when looking for file matching pattern",
+                "Error occurred when getting transform function from pipeline config",
                 err,
-                data={
-                    "pattern": pattern,
-                    "files_in_directory": files_in_directory,
-                    "pipeline_config": pipeline_config,
-                },
+                data={"pipeline_config": pipeline_config},
+            )
+        # Get transform keyword arguments (kwargs) from pipeline config
+        try:
+            transform_kwargs = get_transform_details(
+                pipeline_config, "transform_kwargs"
+            )
+            logger.info(
+                "Got transform kwargs from pipeline config",
+                data={"transform_kwargs": transform_kwargs},
+            )
+        except Exception as err:
+            logger.error(
+                "Error occurred when getting transform kwargs from pipeline config",
+                err,
+                data={"pipeline_config": pipeline_config},
             )
-
-            de_notifier.failure()
-            raise err
 
         try:
-            sanity_checker(input_file_path)
+            csv_path, metadata_path = transform_function(
+                *input_file_paths, **transform_kwargs
+            )
             logger.info(
-                "Sanity check run on input file path.",
+                "Successfully ran transform function",
                 data={
-                    "sanity_checker": sanity_checker,
-                    "input_file_path": input_file_path,
+                    "transform_function": transform_function,
+                    "input_file_paths": input_file_paths,
+                    "transform_kwargs": transform_kwargs,
+                    "csv_path": csv_path,
+                    "metadata_path": metadata_path,
                 },
             )
+
         except Exception as err:
             logger.error(
-                "Error occurred when running sanity checker on input file path.",
+                "Error occurred when running transform function",
                 err,
                 data={
-                    "input_file_path": input_file_path,
+                    "transform_function": transform_function,
+                    "input_file_paths": input_file_paths,
+                    "transform_kwargs": transform_kwargs,
+                    "pipeline_config": pipeline_config,
+                },
+            )
+            de_notifier.failure()
+            raise err
+    else:
+        # The transform was already run by s3_tar_received on the input piped from the tar
+        if isinstance(transform_outputs, Exception):
+            err = transform_outputs
+            logger.error(
+                "Error occurred when running sanity checker and transform on piped input file",
+                err,
+                data={
+                    "piped_files": piped_files,
                     "files_in_directory": files_in_directory,
                     "pipeline_config": pipeline_config,
                 },
             )
-
             de_notifier.failure()
             raise err
 
-        input_file_paths.append(input_file_path)
-
-    # Get the transform function from pipeline config
-    try:
-        transform_function = get_transform_details(pipeline_config, "transform")
+        csv_path, metadata_path = transform_outputs
         logger.info(
-            "Got transform function from pipeline config",
+            "Using outputs of transform run on piped input files",
             data={
-                "transform_function": transform_function,
-                "input_file_paths": input_file_paths,
-            },
-        )
-    except Exception as err:
-        logger.error(
-            "Error occurred when getting transform function from pipeline config",
-            err,
-            data={"pipeline_config": pipeline_config},
-        )
-    # Get transform keyword arguments (kwargs) from pipeline config
-    try:
-        transform_kwargs = get_transform_details(pipeline_config, "transform_kwargs")
-        logger.info(
-            "Got transform kwargs from pipeline config",
-            data={"transform_kwargs": transform_kwargs},
-        )
-    except Exception as err:
-        logger.error(
-            "Error occurred when getting transform kwargs from pipeline config",
-            err,
-            data={"pipeline_config": pipeline_config},
-        )
-
-    try:
-        csv_path, metadata_path = transform_function(
-            *input_file_paths, **transform_kwargs
-        )
-        logger.info(
-            "Successfully ran transform function",
-            data={
-                "transform_function": transform_function,
-                "input_file_paths": input_file_paths,
-                "transform_kwargs": transform_kwargs,
                 "csv_path": csv_path,
                 "metadata_path": metadata_path,
+                "piped_files": piped_files,
             },
         )
 
-    except Exception as err:
-        logger.error(
-            "Error occurred when running transform function",
-            err,
-            data={
-                "transform_function": transform_function,
-                "input_file_paths": input_file_paths,
-                "transform_kwargs": transform_kwargs,
-                "pipeline_config": pipeline_config,
-            },
-        )
-        de_notifier.failure()
-        raise err
-
     # TODO - validate the metadata once we have a schema for it.
 
     # TODO - validate the csv once we know what we're validating
@@ -414,20 +454,15 @@ def dataset_ingress_v1(files_dir: str, pipeline_config: dict):
 
         # Check for supplementary distributions to upload
         if supp_dist_patterns:
-            # Get list of all files in local store
-            all_files = local_store.get_file_names()
-            logger.info("Got all files in local store", data={"files": all_files})
+            logger.info(
+                "Got files matching supplementary distribution patterns",
+                data={"files": file_matcher.matching_files},
+            )
             for supp_dist_pattern in supp_dist_patterns:
-                # Get supplementary distribution filename matching pattern from local store
-                supp_dist_matching_files = [
-                    f for f in all_files if re.search(supp_dist_pattern, f)
-                ]
-                assert (
-                    len(supp_dist_matching_files) == 1
-                ), f"Error finding file matching pattern {supp_dist_pattern}: matching files are {supp_dist_matching_files}"
-
-                # Create a directory to save supplementary distribution
-                supp_dist_path = local_store.get_pathlike_of_file_matching(supp_dist_pattern)
+                # Get supplementary distribution matching pattern from the files matched above
+                supp_dist_path = file_matcher.get_pathlike_of_file_matching(
+                    supp_dist_pattern
+                )
                 logger.info(
                     "Got supplementary distribution",
                     data={
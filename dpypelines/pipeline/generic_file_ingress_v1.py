@@ -4,9 +4,16 @@ from dpytools.logging.logger import DpLogger
 from dpytools.stores.directory.local import LocalDirectoryStore
 from dpytools.utilities.utilities import str_to_bool
 
+from dpypelines.pipeline.shared.email_dispatch import (
+    SubmissionEmail,
+    get_email_dispatcher,
+)
 from dpypelines.pipeline.shared.email_template_message import file_not_found_email
-from dpypelines.pipeline.shared.pipelineconfig.matching import get_matching_pattern
-from dpypelines.pipeline.shared.utils import get_email_client, get_submitter_email
+from dpypelines.pipeline.shared.pipelineconfig.matching import (
+    FilePatternMatcher,
+    get_matching_pattern,
+)
+from dpypelines.pipeline.shared.utils import get_submitter_email
 from dpypelines.pipeline.utils import get_notifier, upload_file
 
 logger = DpLogger("data-ingress-pipelines")
@@ -23,7 +30,9 @@ def generic_file_ingress_v1(files_dir: str, pipeline_config: dict):
     Raises:
         Exception: If any unexpected error occurs.
     """
-    notifier = get_notifier()
+    # The outcome of the run is recorded in the notification digest by
+    # s3_tar_received.start, along with its source_id
+    notifier = get_notifier(record_in_digest=False)
     try:
         local_store = LocalDirectoryStore(files_dir)
         files_in_directory = local_store.get_file_names()
@@ -70,12 +79,14 @@ def generic_file_ingress_v1(files_dir: str, pipeline_config: dict):
         notifier.failure()
         raise err
 
-    # Create email client from env var
+    # Get the email client shared by every run in this process, and collect the
+    # problems with this submission to send to the submitter in one email
     try:
-        email_client = get_email_client()
-        logger.info("Created email client", data={"email_client": email_client})
+        email_client = get_email_dispatcher()
+        submission_email = SubmissionEmail(email_client, submitter_email)
+        logger.info("Got email client", data={"email_client": email_client})
     except Exception as err:
-        logger.error("Error occurred when creating email client", err)
+        logger.error("Error occurred when getting email client", err)
         notifier.failure()
         raise err
 
@@ -107,6 +118,11 @@ def generic_file_ingress_v1(files_dir: str, pipeline_config: dict):
     # Extract the patterns for required files from the pipeline configuration
     try:
         required_file_patterns = get_matching_pattern(pipeline_config, "required_files")
+        # Match every pattern against the files listed above, rather than listing
+        # the directory again for each check
+        file_matcher = FilePatternMatcher(
+            files_dir, files_in_directory, required_file_patterns
+        )
         logger.info(
             "Required file patterns retrieved from pipeline config",
             data={
@@ -125,33 +141,42 @@ def generic_file_ingress_v1(files_dir: str, pipeline_config: dict):
         notifier.failure()
         raise err
 
-    # Check for the existence of each required file
-    for required_file in required_file_patterns:
+    # Check for the existence of every required file in one pass, so all the
+    # missing files are reported together
+    try:
+        missing_required_files = file_matcher.patterns_without_lone_file(
+            required_file_patterns
+        )
+        logger.info(
+            "Checked for required files",
+            data={"missing_required_files": missing_required_files},
+        )
+    except Exception as err:
+        logger.error(
+            "Error occurred when looking for required files",
+            err,
+            data={
+                "required_file_patterns": required_file_patterns,
+                "files_in_directory": files_in_directory,
+                "pipeline_config": pipeline_config,
+            },
+        )
+        notifier.failure()
+        raise err
+
+    if missing_required_files:
         try:
-            if not local_store.has_lone_file_matching(required_file):
-                try:
-                    raise FileNotFoundError(
-                        f"No file found matching pattern {required_file}"
-                    )
-                except FileNotFoundError as err:
-                    email_content = file_not_found_email(required_file)
-                    email_client.send(
-                        submitter_email, email_content.subject, email_content.message
-                    )
-                    logger.error(
-                        "Error occurred when looking for required file",
-                        err,
-                        data={"required_file": required_file},
-                    )
-                    notifier.failure()
-                    raise err
-        except Exception as err:
+            raise FileNotFoundError(
+                f"No file found matching patterns {missing_required_files}"
+            )
+        except FileNotFoundError as err:
+            submission_email.add(file_not_found_email(missing_required_files))
+            submission_email.send()
             logger.error(
-                "Error occurred when looking for required file",
+                "Error occurred when looking for required files",
                 err,
                 data={
-                    "required_file": required_file,
-                    "required_file_patterns": required_file_patterns,
+                    "missing_required_files": missing_required_files,
                     "files_in_directory": files_in_directory,
                     "pipeline_config": pipeline_config,
                 },
@@ -172,7 +197,9 @@ def generic_file_ingress_v1(files_dir: str, pipeline_config: dict):
 
         for required_file in required_file_patterns:
             try:
-                required_file_path = local_store.get_pathlike_of_file_matching(required_file)
+                required_file_path = file_matcher.get_pathlike_of_file_matching(
+                    required_file
+                )
                 logger.info(
                     "Got file to be uploaded.", data={"file_path": required_file_path}
                 )
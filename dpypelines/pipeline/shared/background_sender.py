@@ -0,0 +1,84 @@
+import atexit
+import queue
+import threading
+import time
+from typing import Optional, Tuple
+
+
+class BackgroundSender:
+    """
+    Base class for clients that send on background worker threads, so whoever
+    sends never waits on the service being sent to. Subclasses queue the arguments
+    of each send with _put() and implement _deliver() to send them.
+
+    Sends wait in a queue of at most max_queue_size, and are dropped (and counted in
+    dropped) if it is full. A send that fails is retried up to max_retries times,
+    waiting retry_delay seconds before the first retry and twice as long before each
+    one after, and is counted in failed if it never succeeds. Waiting sends are
+    flushed on exit for up to flush_timeout seconds.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        max_queue_size: int = 100,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        flush_timeout: float = 10.0,
+    ):
+        assert workers > 0, "workers must be greater than 0"
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.dropped = 0
+        self.failed = 0
+        self._counts_lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple]" = queue.Queue(maxsize=max_queue_size)
+        self._threads = [
+            threading.Thread(target=self._run, daemon=True) for _ in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        atexit.register(self.flush, flush_timeout)
+
+    def _deliver(self, *args):
+        """
+        Send once with the arguments given to _put(), raising if it fails.
+        """
+        raise NotImplementedError
+
+    def _put(self, *args):
+        try:
+            self._queue.put_nowait(args)
+        except queue.Full:
+            with self._counts_lock:
+                self.dropped += 1
+
+    def _run(self):
+        while True:
+            args = self._queue.get()
+            try:
+                self._send(*args)
+            finally:
+                self._queue.task_done()
+
+    def _send(self, *args):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._deliver(*args)
+                return
+            except Exception:
+                if attempt == self.max_retries:
+                    with self._counts_lock:
+                        self.failed += 1
+                    return
+                time.sleep(self.retry_delay * 2**attempt)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued send has succeeded or been given up on, for at most
+        timeout seconds. Returns whether the queue was emptied.
+        """
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(
+                lambda: self._queue.unfinished_tasks == 0, timeout
+            )
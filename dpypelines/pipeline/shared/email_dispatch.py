@@ -0,0 +1,93 @@
+import threading
+from typing import List, Optional
+
+from dpypelines.pipeline.shared.background_sender import BackgroundSender
+from dpypelines.pipeline.shared.email_template_message import (
+    EmailContent,
+    combined_email,
+)
+from dpypelines.pipeline.shared.utils import get_email_client
+
+
+class EmailDispatcher(BackgroundSender):
+    """
+    Sends emails through client.send() from a pool of worker threads, so a pipeline
+    never waits on the email service. One client is shared by every worker.
+    Queueing, retries and flushing are as described for BackgroundSender.
+    """
+
+    def __init__(
+        self,
+        client,
+        workers: int = 1,
+        max_queue_size: int = 100,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        flush_timeout: float = 30.0,
+    ):
+        self.client = client
+        super().__init__(
+            workers=workers,
+            max_queue_size=max_queue_size,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            flush_timeout=flush_timeout,
+        )
+
+    def send(self, recipient: str, subject: str, message: str):
+        """
+        Queue an email to be sent, returning straight away.
+        """
+        self._put(recipient, subject, message)
+
+    def _deliver(self, recipient: str, subject: str, message: str):
+        self.client.send(recipient, subject, message)
+
+
+class SubmissionEmail:
+    """
+    Collects the problems found with one submission, so the submitter gets a single
+    email listing all of them rather than one email per problem.
+
+    Usage:
+        submission_email = SubmissionEmail(get_email_dispatcher(), submitter_email)
+        submission_email.add(file_not_found_email(pattern))
+        submission_email.send()
+    """
+
+    def __init__(self, email_client, recipient: str):
+        self.email_client = email_client
+        self.recipient = recipient
+        self.email_contents: List[EmailContent] = []
+
+    def add(self, email_content: EmailContent):
+        self.email_contents.append(email_content)
+
+    def send(self):
+        """
+        Send one email covering every problem added since the last send, if there
+        are any.
+        """
+        if not self.email_contents:
+            return
+        email_content = combined_email(self.email_contents)
+        self.email_contents = []
+        self.email_client.send(
+            self.recipient, email_content.subject, email_content.message
+        )
+
+
+_email_dispatcher: Optional[EmailDispatcher] = None
+_email_dispatcher_lock = threading.Lock()
+
+
+def get_email_dispatcher() -> EmailDispatcher:
+    """
+    The EmailDispatcher for this process, sending through the client from
+    get_email_client(), which is created the first time it is needed.
+    """
+    global _email_dispatcher
+    with _email_dispatcher_lock:
+        if _email_dispatcher is None:
+            _email_dispatcher = EmailDispatcher(get_email_client())
+        return _email_dispatcher
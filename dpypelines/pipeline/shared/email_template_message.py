@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import List, Sequence, Union
 
 
 @dataclass
@@ -7,21 +8,39 @@ class EmailContent:
     message: str
 
 
-def file_not_found_email(file_name: str) -> EmailContent:
+def file_not_found_email(file_name: Union[str, Sequence[str]]) -> EmailContent:
     """
-    Create a subject and message for when a file is not found.
+    Create a subject and message for when a file, or each of several files, is not
+    found.
     """
-    subject = "Data Submission Error: Missing Required File"
-    message = f"The file {file_name} that you submitted could not be found. Please check the file and try again."
+    file_names = [file_name] if isinstance(file_name, str) else list(file_name)
+    if len(file_names) == 1:
+        subject = "Data Submission Error: Missing Required File"
+        message = f"The file {file_names[0]} that you submitted could not be found. Please check the file and try again."
+    else:
+        subject = "Data Submission Error: Missing Required Files"
+        message = f"The files {', '.join(file_names)} that you submitted could not be found. Please check the files and try again."
     return EmailContent(subject, message)
 
 
-def supplementary_distribution_not_found_email(distribution_name: str) -> EmailContent:
+def supplementary_distribution_not_found_email(
+    distribution_name: Union[str, Sequence[str]]
+) -> EmailContent:
     """
-    Create a subject and message for when a supplementary distribution is not found.
+    Create a subject and message for when a supplementary distribution, or each of
+    several, is not found.
     """
-    subject = "Data Submission Error: Missing Supplementary Distribution"
-    message = f"The supplementary distribution {distribution_name} that you submitted could not be found. Please check your submission and try again."
+    distribution_names = (
+        [distribution_name]
+        if isinstance(distribution_name, str)
+        else list(distribution_name)
+    )
+    if len(distribution_names) == 1:
+        subject = "Data Submission Error: Missing Supplementary Distribution"
+        message = f"The supplementary distribution {distribution_names[0]} that you submitted could not be found. Please check your submission and try again."
+    else:
+        subject = "Data Submission Error: Missing Supplementary Distributions"
+        message = f"The supplementary distributions {', '.join(distribution_names)} that you submitted could not be found. Please check your submission and try again."
     return EmailContent(subject, message)
 
 
@@ -32,3 +51,25 @@ def submission_processed_email() -> EmailContent:
     subject = "Data Submission: Processed Successfully"
     message = "Your data submission has been processed. If there were any issues, you will receive a separate email with the details."
     return EmailContent(subject, message)
+
+
+def combined_email(email_contents: List[EmailContent]) -> EmailContent:
+    """
+    Combine the subjects and messages of several emails into one email.
+    """
+    assert email_contents, "No emails to combine"
+    if len(email_contents) == 1:
+        return email_contents[0]
+
+    subjects = {email_content.subject for email_content in email_contents}
+    if len(subjects) == 1:
+        subject = email_contents[0].subject
+    else:
+        subject = "Data Submission Error: Multiple Problems"
+    problems = "\n".join(
+        f"- {email_content.message}" for email_content in email_contents
+    )
+    message = (
+        f"There were {len(email_contents)} problems with your submission:\n\n{problems}"
+    )
+    return EmailContent(subject, message)
@@ -1,12 +1,18 @@
+import atexit
 import os
+import threading
 from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
 
 from dpytools.slack.slack import SlackMessenger
 
+from dpypelines.pipeline.shared.background_sender import BackgroundSender
 from dpypelines.pipeline.shared.utils import (
     get_commit_id,
     get_environment,
     get_local_time,
+    seconds_since_local_time,
     str_to_bool,
 )
 
@@ -18,14 +24,14 @@ class BasePipelineNotifier(ABC):
     """
 
     @abstractmethod
-    def failure(self):
+    def failure(self, source_id=None):
         """
         Notify that the pipeline has encountered an issue and failed.
         """
         ...
 
     @abstractmethod
-    def success(self):
+    def success(self, source_id=None):
         """
         Notify that the pipeline has succeeded
         """
@@ -43,9 +49,9 @@ class NopNotifier(BasePipelineNotifier):
     i.e methods exist but do nothing when called.
     """
 
-    def failure(self): ...
+    def failure(self, source_id=None): ...
 
-    def success(self): ...
+    def success(self, source_id=None): ...
 
 
 class PipelineNotifier(BasePipelineNotifier):
@@ -56,16 +62,18 @@ class PipelineNotifier(BasePipelineNotifier):
         self.client = SlackMessenger(webhook_url)
         self.notification_postfix = os.environ.get("NOTIFICATION_POSTFIX", "")
         self.process_start_time = process_start_time
+        # resolved once here, so sending a notification never has to look them up
+        self.commit_id = get_commit_id()
         self.environment = get_environment()
 
     def failure(self, source_id=None):
         process_end_time = get_local_time()
-        msg = f":x: {self.notification_postfix}, commit ID: {get_commit_id()}, source ID: {source_id}, processing start time: {self.process_start_time}, processing end time: {process_end_time}, environment: {self.environment}".strip()
+        msg = f":x: {self.notification_postfix}, commit ID: {self.commit_id}, source ID: {source_id}, processing start time: {self.process_start_time}, processing end time: {process_end_time}, environment: {self.environment}".strip()
         self.client.msg_str(msg)
 
     def success(self, source_id=None):
         process_end_time = get_local_time()
-        msg = f":white_check_mark: {self.notification_postfix}, commit ID: {get_commit_id()}, source ID: {source_id}, processing start time: {self.process_start_time}, processing end time: {process_end_time}, environment: {self.environment}".strip()
+        msg = f":white_check_mark: {self.notification_postfix}, commit ID: {self.commit_id}, source ID: {source_id}, processing start time: {self.process_start_time}, processing end time: {process_end_time}, environment: {self.environment}".strip()
         self.client.msg_str(msg)
 
     # TODO - remove me later
@@ -74,12 +82,226 @@ class PipelineNotifier(BasePipelineNotifier):
         self.client.msg_str(msg)
 
 
+class BackgroundMessenger(BackgroundSender):
+    """
+    Sends messages through client.msg_str() on a background thread, so whoever sends
+    them never waits on the webhook. Queueing, retries and flushing are as described
+    for BackgroundSender.
+    """
+
+    def __init__(
+        self,
+        client,
+        max_queue_size: int = 100,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        flush_timeout: float = 10.0,
+    ):
+        self.client = client
+        super().__init__(
+            max_queue_size=max_queue_size,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            flush_timeout=flush_timeout,
+        )
+
+    def msg_str(self, msg: str):
+        """
+        Queue msg to be sent, returning straight away.
+        """
+        self._put(msg)
+
+    def _deliver(self, msg: str):
+        self.client.msg_str(msg)
+
+
+_background_messengers: Dict[str, BackgroundMessenger] = {}
+_background_messengers_lock = threading.Lock()
+
+
+def get_background_messenger(webhook_url: str) -> BackgroundMessenger:
+    """
+    The BackgroundMessenger sending to webhook_url, created on first use, so the
+    notifiers for a webhook share one thread rather than starting one each.
+    """
+    with _background_messengers_lock:
+        if webhook_url not in _background_messengers:
+            _background_messengers[webhook_url] = BackgroundMessenger(
+                SlackMessenger(webhook_url)
+            )
+        return _background_messengers[webhook_url]
+
+
+class AsyncPipelineNotifier(PipelineNotifier):
+    """
+    A PipelineNotifier whose messages are sent by the BackgroundMessenger for its
+    webhook from get_background_messenger(), so pipeline latency does not depend on
+    how long Slack takes to respond.
+    """
+
+    def __init__(self, webhook_url, process_start_time=None):
+        super().__init__(webhook_url, process_start_time)
+        self.client = get_background_messenger(webhook_url)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the messages sent so far have been delivered, see
+        BackgroundMessenger.flush.
+        """
+        return self.client.flush(timeout)
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    # nearest rank percentile of values that are already sorted
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class NotificationDigest:
+    """
+    Collects the outcomes of pipeline runs and sends them through client.msg_str()
+    as one summary message per window, rather than one message per run: the number
+    of runs that succeeded and failed, the source IDs that failed and the p50 and
+    p95 run durations.
+
+    A window is sent once max_runs outcomes have been recorded, or window_seconds
+    after its first outcome was recorded, whichever comes first, and any outcomes
+    still waiting are sent on exit.
+    """
+
+    def __init__(self, client, window_seconds: float = 300, max_runs: int = 100):
+        assert max_runs > 0, "max_runs must be greater than 0"
+        self.client = client
+        self.window_seconds = window_seconds
+        self.max_runs = max_runs
+        self.notification_postfix = os.environ.get("NOTIFICATION_POSTFIX", "")
+        self.commit_id = get_commit_id()
+        self.environment = get_environment()
+        self._outcomes: List[Tuple[bool, Optional[str], float]] = []
+        self._window_start: Optional[str] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def record(self, succeeded: bool, source_id: Optional[str], duration: float):
+        """
+        Add the outcome of one run, sending the window if it is now full.
+        """
+        with self._lock:
+            if not self._outcomes:
+                self._window_start = get_local_time()
+                self._timer = threading.Timer(self.window_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            self._outcomes.append((succeeded, source_id, duration))
+            full = len(self._outcomes) >= self.max_runs
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Send the outcomes recorded in the current window, if there are any.
+        """
+        with self._lock:
+            outcomes, self._outcomes = self._outcomes, []
+            window_start = self._window_start
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if outcomes:
+            self.client.msg_str(self.summary(outcomes, window_start))
+
+    def summary(
+        self,
+        outcomes: List[Tuple[bool, Optional[str], float]],
+        window_start: Optional[str] = None,
+    ) -> str:
+        """
+        The digest message for the given (succeeded, source_id, duration) outcomes.
+        """
+        succeeded = sum(1 for outcome in outcomes if outcome[0])
+        failed_source_ids = Counter(
+            str(source_id) for ok, source_id, _ in outcomes if not ok
+        )
+        failed = ", ".join(
+            source_id if count == 1 else f"{source_id} (x{count})"
+            for source_id, count in failed_source_ids.items()
+        )
+        durations = sorted(duration for _, _, duration in outcomes)
+        return f":bar_chart: {self.notification_postfix}, {len(outcomes)} runs, succeeded: {succeeded}, failed: {len(outcomes) - succeeded}, failed source IDs: [{failed}], duration p50: {_percentile(durations, 50):.1f}s, duration p95: {_percentile(durations, 95):.1f}s, commit ID: {self.commit_id}, window start time: {window_start}, window end time: {get_local_time()}, environment: {self.environment}".strip()
+
+
+class DigestPipelineNotifier(BasePipelineNotifier):
+    """
+    A notifier that records the outcome of its run in a NotificationDigest, shared
+    by every run in the process, instead of sending a message for each run. Only
+    the first outcome it is given is recorded, so each run is counted once, and the
+    duration of the run is measured from its process_start_time.
+    """
+
+    def __init__(self, digest: NotificationDigest, process_start_time=None):
+        self.digest = digest
+        self.process_start_time = (
+            process_start_time if process_start_time is not None else get_local_time()
+        )
+        self._recorded = False
+
+    def _record(self, succeeded: bool, source_id: Optional[str]):
+        if self._recorded:
+            return
+        self._recorded = True
+        self.digest.record(
+            succeeded, source_id, seconds_since_local_time(self.process_start_time)
+        )
+
+    def failure(self, source_id=None):
+        self._record(False, source_id)
+
+    def success(self, source_id=None):
+        self._record(True, source_id)
+
+
+_digests: Dict[str, NotificationDigest] = {}
+_digests_lock = threading.Lock()
+
+
+def get_notification_digest(webhook_url: str) -> NotificationDigest:
+    """
+    The NotificationDigest for webhook_url, created on first use with the window
+    given by the NOTIFICATION_DIGEST_WINDOW (seconds, default 300) and
+    NOTIFICATION_DIGEST_MAX_RUNS (default 100) env vars. Its messages are sent in
+    the background if ASYNC_NOTIFICATIONS is true.
+    """
+    with _digests_lock:
+        if webhook_url not in _digests:
+            if str_to_bool(os.environ.get("ASYNC_NOTIFICATIONS", "False")):
+                client = get_background_messenger(webhook_url)
+            else:
+                client = SlackMessenger(webhook_url)
+            _digests[webhook_url] = NotificationDigest(
+                client,
+                window_seconds=float(
+                    os.environ.get("NOTIFICATION_DIGEST_WINDOW", "300")
+                ),
+                max_runs=int(os.environ.get("NOTIFICATION_DIGEST_MAX_RUNS", "100")),
+            )
+        return _digests[webhook_url]
+
+
 def notifier_from_env_var_webhook(
-    env_var: str, process_start_time=None
+    env_var: str, process_start_time=None, record_in_digest: bool = True
 ) -> BasePipelineNotifier:
     """
     Create a variant of BasePipelineMessenger by passing in the name
     of an envionrment variable that will hold the required webhook.
+
+    Notifications are sent in the background by an AsyncPipelineNotifier
+    if the ASYNC_NOTIFICATIONS env var is true, and are collected into one
+    digest message per window by a DigestPipelineNotifier if the
+    NOTIFICATION_DIGEST env var is true. A notifier created with
+    record_in_digest=False does nothing in that case, so that pipelines run by
+    s3_tar_received.start, which records the outcome of the run itself, are not
+    counted twice.
     """
 
     notifications_disabled = os.environ.get("DISABLE_NOTIFICATIONS", None)
@@ -95,4 +317,16 @@ def notifier_from_env_var_webhook(
         web_hook is not None
     ), f"The specified env var {env_var} is not present on this system."
 
+    notification_digest = str_to_bool(os.environ.get("NOTIFICATION_DIGEST", "False"))
+    if notification_digest is True:
+        if record_in_digest is False:
+            return NopNotifier()
+        return DigestPipelineNotifier(
+            get_notification_digest(web_hook), process_start_time
+        )
+
+    async_notifications = str_to_bool(os.environ.get("ASYNC_NOTIFICATIONS", "False"))
+    if async_notifications is True:
+        return AsyncPipelineNotifier(web_hook, process_start_time)
+
     return PipelineNotifier(web_hook, process_start_time)
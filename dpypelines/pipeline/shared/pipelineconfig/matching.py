@@ -1,5 +1,7 @@
 import json
-from typing import List
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
 
 
 def get_matching_pattern(config: dict, pattern: str) -> List[str]:
@@ -15,3 +17,89 @@ def get_matching_pattern(config: dict, pattern: str) -> List[str]:
         raise NotImplementedError(
             f"Config version {config['config_version']} not recognised"
         )
+
+
+class FilePatternMatcher:
+    """
+    Matches the files of a directory against the file patterns in a pipeline
+    config (such as "required_files", "supplementary_distributions" and the keys of
+    "transform_inputs"), using re.search on the file names.
+
+    The directory is listed once, when the matcher is created, and each pattern is
+    compiled once. The files matching every pattern added are found in a single
+    pass over the listing, and the resulting {pattern: [file names]} map is shared
+    by all the later stages of a pipeline rather than each re-listing the directory.
+
+    Usage:
+        file_matcher = FilePatternMatcher(files_dir, patterns=required_file_patterns)
+        file_matcher.has_lone_file_matching("^data.xml$")
+    """
+
+    def __init__(
+        self,
+        files_dir: Union[str, Path],
+        file_names: Optional[List[str]] = None,
+        patterns: Iterable[str] = (),
+    ):
+        self.files_dir = Path(files_dir)
+        if file_names is None:
+            file_names = sorted(
+                path.name for path in self.files_dir.iterdir() if path.is_file()
+            )
+        self.file_names = list(file_names)
+        self.matching_files: Dict[str, List[str]] = {}
+        self.add_patterns(patterns)
+
+    def add_patterns(self, patterns: Iterable[str]):
+        """
+        Finds the files matching each of patterns not already added, in one pass
+        over the file names.
+        """
+        compiled = {
+            pattern: re.compile(pattern)
+            for pattern in patterns
+            if pattern not in self.matching_files
+        }
+        matching_files = {pattern: [] for pattern in compiled}
+        for file_name in self.file_names:
+            for pattern, regex in compiled.items():
+                if regex.search(file_name):
+                    matching_files[pattern].append(file_name)
+        self.matching_files.update(matching_files)
+
+    def files_matching(self, pattern: str) -> List[str]:
+        """
+        The names of the files matching pattern, which is added if it has not been.
+        """
+        if pattern not in self.matching_files:
+            self.add_patterns([pattern])
+        return self.matching_files[pattern]
+
+    def has_lone_file_matching(self, pattern: str) -> bool:
+        """
+        Whether exactly one file matches pattern.
+        """
+        return len(self.files_matching(pattern)) == 1
+
+    def patterns_without_lone_file(self, patterns: Iterable[str]) -> List[str]:
+        """
+        The patterns, in order, that are not matched by exactly one file, so every
+        missing (or ambiguous) file can be reported at once rather than stopping at
+        the first.
+        """
+        patterns = list(patterns)
+        self.add_patterns(patterns)
+        return [
+            pattern for pattern in patterns if not self.has_lone_file_matching(pattern)
+        ]
+
+    def get_pathlike_of_file_matching(self, pattern: str) -> Path:
+        """
+        The path of the one file matching pattern. Raises an AssertionError if there
+        is not exactly one.
+        """
+        matching_files = self.files_matching(pattern)
+        assert (
+            len(matching_files) == 1
+        ), f"Error finding file matching pattern {pattern}: matching files are {matching_files}"
+        return self.files_dir / matching_files[0]
@@ -0,0 +1,200 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # python < 3.11
+    import sre_parse
+
+# Number of source_ids whose matching pattern is remembered by a resolver
+DEFAULT_CACHE_SIZE = 1024
+
+# A pattern that re.match()es any source_id ending in a literal string, such as
+# "^.*_move$" or ".*_move$"
+_SUFFIX_PATTERN = re.compile(r"^\^?\.\*((?:[^\\.^$*+?{}\[\]|()]|\\[^A-Za-z0-9])+)\$$")
+
+
+def _literal_suffix(pattern: str) -> Optional[str]:
+    # The literal suffix a suffix-anchored pattern matches on, or None if pattern
+    # is not one
+    match = _SUFFIX_PATTERN.match(pattern)
+    if match is None:
+        return None
+    return re.sub(r"\\(.)", r"\1", match.group(1))
+
+
+def _subpatterns(value) -> Iterator["sre_parse.SubPattern"]:
+    # The SubPatterns nested in the arguments of a parsed regex opcode
+    if isinstance(value, sre_parse.SubPattern):
+        yield value
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            yield from _subpatterns(item)
+
+
+def _combinable(pattern: str) -> bool:
+    # Whether pattern matches the same strings as an alternative of a combined
+    # regex. Backreferences to groups would refer to groups of the combined regex,
+    # global inline flags such as "(?i)" would apply to every alternative, and named
+    # groups could clash with those of other patterns.
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return False
+    if parsed.state.flags & ~re.UNICODE or parsed.state.groupdict:
+        return False
+    stack = [parsed]
+    while stack:
+        for op, av in stack.pop():
+            if op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS):
+                return False
+            stack.extend(_subpatterns(av))
+    return True
+
+
+class _SuffixTrie:
+    """
+    Literal suffixes stored by their characters in reverse, so all the suffixes a
+    string ends in are found in one walk back from its end.
+    """
+
+    def __init__(self):
+        self._root: dict = {}
+
+    def add(self, suffix: str, value: int):
+        node = self._root
+        for char in reversed(suffix):
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append(value)
+
+    def matches(self, string: str) -> List[int]:
+        found = []
+        node = self._root
+        for char in reversed(string):
+            node = node.get(char)
+            if node is None:
+                break
+            found.extend(node.get(None, ()))
+        return found
+
+
+class PipelineConfigResolver:
+    """
+    Finds the pipeline config for a source_id from a dictionary of {regex pattern:
+    config}, as the first pattern in order that re.match()es the source_id.
+
+    All patterns are compiled once up front. Patterns that only match a literal
+    suffix, such as "^.*_move$", are looked up in a suffix trie and the rest are
+    combined into one alternation regex, so a lookup does not try every pattern in
+    turn. Patterns that cannot be combined, because they use backreferences, named
+    groups or global inline flags, are tried one by one. The pattern found for each
+    source_id is memoised.
+
+    Two suffix patterns where one suffix ends in the other (such as "^.*_sdmx$"
+    and "^.*_compact_sdmx$") match the same source_ids. These are reported by
+    raising a ValueError when the resolver is created, unless allow_ambiguous is
+    True, in which case the first in order wins as usual.
+
+    Usage:
+        resolver = PipelineConfigResolver(CONFIGURATION)
+        pipeline_config = resolver.get_config("some-id_move")
+    """
+
+    def __init__(
+        self,
+        configuration: Dict[str, dict],
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        allow_ambiguous: bool = False,
+    ):
+        self.configuration = configuration
+        self.patterns = list(configuration.keys())
+        self._compiled = [re.compile(pattern) for pattern in self.patterns]
+
+        self._suffixes = _SuffixTrie()
+        suffix_patterns: List[Tuple[str, int]] = []
+        alternatives = []
+        self._group_indexes: Dict[str, int] = {}
+        self._separate: List[int] = []
+        for index, pattern in enumerate(self.patterns):
+            suffix = _literal_suffix(pattern)
+            if suffix is not None:
+                self._suffixes.add(suffix, index)
+                suffix_patterns.append((suffix, index))
+            elif _combinable(pattern):
+                group = f"_pattern{index}"
+                self._group_indexes[group] = index
+                alternatives.append(f"(?P<{group}>{pattern})")
+            else:
+                self._separate.append(index)
+
+        self._combined = None
+        if alternatives:
+            self._combined = re.compile("|".join(alternatives))
+
+        self.ambiguous = self._find_ambiguous(suffix_patterns)
+        if self.ambiguous and not allow_ambiguous:
+            overlaps = ", ".join(f"'{a}' and '{b}'" for a, b in self.ambiguous)
+            raise ValueError(
+                f"Ambiguous patterns in pipeline configuration, both of {overlaps} "
+                "match the same source_ids"
+            )
+
+        self._resolve_cached = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _find_ambiguous(
+        self, suffix_patterns: List[Tuple[str, int]]
+    ) -> List[Tuple[str, str]]:
+        # a pattern whose suffix ends in the suffix of another matches a subset of
+        # the same source_ids
+        ambiguous = []
+        for suffix, index in suffix_patterns:
+            for other_suffix, other_index in suffix_patterns:
+                if other_index > index and (
+                    suffix.endswith(other_suffix) or other_suffix.endswith(suffix)
+                ):
+                    ambiguous.append((self.patterns[index], self.patterns[other_index]))
+        return ambiguous
+
+    def _first_match(self, source_id: str) -> Optional[int]:
+        # Slow path, trying every pattern in order
+        for index, compiled in enumerate(self._compiled):
+            if compiled.match(source_id):
+                return index
+        return None
+
+    def _resolve(self, source_id: str) -> Optional[str]:
+        # "." and "$" treat newlines specially, so those source_ids take the slow path
+        if "\n" in source_id:
+            index = self._first_match(source_id)
+            return None if index is None else self.patterns[index]
+
+        candidates = self._suffixes.matches(source_id)
+        if self._combined is not None:
+            match = self._combined.match(source_id)
+            if match is not None:
+                # the outer group of the alternative that matched closes last
+                candidates.append(self._group_indexes[match.lastgroup])
+        candidates.extend(
+            index for index in self._separate if self._compiled[index].match(source_id)
+        )
+
+        if not candidates:
+            return None
+        return self.patterns[min(candidates)]
+
+    def resolve(self, source_id: str) -> Optional[str]:
+        """
+        The first pattern that matches source_id, or None if none do.
+        """
+        return self._resolve_cached(source_id)
+
+    def get_config(self, source_id: str) -> dict:
+        """
+        The config of the first pattern that matches source_id. Raises a KeyError if
+        none do.
+        """
+        pattern = self.resolve(source_id)
+        if pattern is None:
+            raise KeyError(f"{source_id} not matched in CONFIGURATION")
+        return self.configuration[pattern]
@@ -0,0 +1,280 @@
+import re
+import tarfile
+import threading
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Union
+
+# Number of bytes copied at a time from a tar member to its file
+DEFAULT_COPY_SIZE = 1024 * 1024
+
+
+class ExtractionCancelled(Exception):
+    pass
+
+
+class _TeeReader:
+    # Reads from source, writing everything read to target as it goes
+    def __init__(self, source: BinaryIO, target: BinaryIO, name: str):
+        self.source = source
+        self.target = target
+        self.name = name
+
+    def read(self, size: int = -1) -> bytes:
+        block = self.source.read(size)
+        self.target.write(block)
+        return block
+
+
+def member_name(name: str) -> str:
+    """
+    The name of a tar member relative to the directory it is extracted to, such
+    as "manifest.json" for "./manifest.json". Raises a ValueError for names that
+    would be extracted outside of it.
+    """
+    path = PurePosixPath(name)
+    parts = [part for part in path.parts if part not in ("", ".")]
+    if path.is_absolute() or ".." in parts or not parts:
+        raise ValueError(f"Refusing to extract tar member {name}")
+    return "/".join(parts)
+
+
+def parse_s3_object_name(s3_object_name: str):
+    """
+    Splits an s3 object name such as "my-bucket/my-data.tar" into its bucket and
+    key.
+    """
+    bucket, _, key = s3_object_name.partition("/")
+    assert bucket and key, f"Invalid s3 object name {s3_object_name}"
+    return bucket, key
+
+
+def open_s3_object(s3_object_name: str, s3_client=None) -> BinaryIO:
+    """
+    Opens the body of an s3 object as a stream, which is read as it is downloaded.
+    """
+    if s3_client is None:
+        import boto3
+
+        s3_client = boto3.client("s3")
+    bucket, key = parse_s3_object_name(s3_object_name)
+    return s3_client.get_object(Bucket=bucket, Key=key)["Body"]
+
+
+class StreamingTarExtractor:
+    """
+    Extracts a tar read from a stream, such as the body of an s3 object, writing
+    each member to output_dir as it arrives. Nothing is downloaded ahead of the
+    extraction, so the tar is never held on disk alongside its members.
+
+    Extraction runs on a background thread once started. wait_for_member() returns
+    as soon as one member has been written, so small members at the start of the
+    tar (such as manifest.json) can be used while larger ones are still arriving,
+    and wait() returns once the whole tar has been extracted. Errors raised while
+    extracting are raised again from both.
+
+    Extraction pauses after each member named in hold_after until release() is
+    called, which can give pipes of {regex pattern: consumer} for the members
+    still to come. A member whose name matches a pattern is passed to its consumer
+    as a file object, as consumer(fileobj, name), rather than being written to
+    disk, and what the consumer returns is kept in piped. Members that also match
+    a pattern in keep are written to disk as the consumer reads them.
+
+    Usage:
+        extractor = StreamingTarExtractor(open_s3_object(s3_object_name), "input")
+        extractor.start()
+        manifest_path = extractor.wait_for_member("manifest.json")
+        extractor.wait()
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        output_dir: Union[str, Path],
+        copy_size: int = DEFAULT_COPY_SIZE,
+        hold_after: Iterable[str] = (),
+    ):
+        self.fileobj = fileobj
+        self.output_dir = Path(output_dir)
+        self.copy_size = copy_size
+        self.extracted: Dict[str, Path] = {}
+        self.piped: Dict[str, Any] = {}
+        self._hold_after = {member_name(name) for name in hold_after}
+        self._released = not self._hold_after
+        self._pipes: Dict[re.Pattern, Callable[[BinaryIO, str], Any]] = {}
+        self._keep: List[re.Pattern] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._done = False
+        self._cancelled = False
+        self._error: Optional[BaseException] = None
+
+    def start(self) -> "StreamingTarExtractor":
+        """
+        Start extracting on a background thread.
+        """
+        assert self._thread is None, "Extraction has already been started"
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def release(
+        self,
+        pipes: Optional[Dict[str, Callable[[BinaryIO, str], Any]]] = None,
+        keep: Iterable[str] = (),
+    ):
+        """
+        Continue extracting after a member in hold_after, passing the members whose
+        names match a pattern in pipes to its consumer. Piped members are only
+        written to disk if they also match a pattern in keep.
+        """
+        with self._condition:
+            self._pipes = {
+                re.compile(pattern): consumer
+                for pattern, consumer in (pipes or {}).items()
+            }
+            self._keep = [re.compile(pattern) for pattern in keep]
+            self._released = True
+            self._condition.notify_all()
+
+    def cancel(self):
+        """
+        Stop extracting, leaving whatever has already been written in output_dir.
+        """
+        with self._condition:
+            self._cancelled = True
+            self._condition.notify_all()
+
+    def _run(self):
+        try:
+            self.extract()
+        except BaseException as err:
+            with self._condition:
+                self._error = err
+        finally:
+            with self._condition:
+                self._done = True
+                self._condition.notify_all()
+
+    def extract(self):
+        """
+        Extract the tar on the current thread, returning once it has been read to
+        the end.
+        """
+        # "r|*" reads the tar as a stream, so fileobj never needs to seek
+        with tarfile.open(fileobj=self.fileobj, mode="r|*") as tar:
+            for member in tar:
+                if self._cancelled:
+                    raise ExtractionCancelled("Tar extraction was cancelled")
+                name = member_name(member.name)
+                path = self.output_dir / name
+                if member.isdir():
+                    path.mkdir(parents=True, exist_ok=True)
+                    continue
+                if not member.isfile():
+                    # links and devices are not expected in a submission
+                    continue
+                path.parent.mkdir(parents=True, exist_ok=True)
+                consumer = self._pipe_for(name)
+                if consumer is not None:
+                    self._pipe(tar, member, name, path, consumer)
+                else:
+                    with tar.extractfile(member) as source, open(path, "wb") as target:
+                        self._copy(source, target)
+                    with self._condition:
+                        self.extracted[name] = path
+                        self._condition.notify_all()
+                if name in self._hold_after:
+                    self._hold()
+
+    def _hold(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._released or self._cancelled)
+            if self._cancelled:
+                raise ExtractionCancelled("Tar extraction was cancelled")
+
+    def _pipe_for(self, name: str) -> Optional[Callable[[BinaryIO, str], Any]]:
+        for pattern, consumer in self._pipes.items():
+            if pattern.search(name):
+                return consumer
+        return None
+
+    def _pipe(self, tar: tarfile.TarFile, member, name: str, path: Path, consumer):
+        keep = any(pattern.search(name) for pattern in self._keep)
+        with tar.extractfile(member) as source:
+            if not keep:
+                result = consumer(source, name)
+            else:
+                with open(path, "wb") as target:
+                    result = consumer(_TeeReader(source, target, name), name)
+                    # write out whatever the consumer did not read
+                    self._copy(source, target)
+        with self._condition:
+            self.piped[name] = result
+            if keep:
+                self.extracted[name] = path
+            self._condition.notify_all()
+
+    def _copy(self, source: BinaryIO, target: BinaryIO):
+        while True:
+            if self._cancelled:
+                raise ExtractionCancelled("Tar extraction was cancelled")
+            block = source.read(self.copy_size)
+            if not block:
+                return
+            target.write(block)
+
+    def wait_for_member(self, name: str, timeout: Optional[float] = None) -> Path:
+        """
+        Wait until the member called name has been written, and return its path.
+        Raises a FileNotFoundError if the tar ends without it, and a TimeoutError if
+        it has not been written within timeout seconds.
+        """
+        name = member_name(name)
+        with self._condition:
+            found = self._condition.wait_for(
+                lambda: name in self.extracted or self._done or self._cancelled,
+                timeout=timeout,
+            )
+            if name in self.extracted:
+                return self.extracted[name]
+            if not found:
+                raise TimeoutError(f"Timed out waiting for tar member {name}")
+            self._raise_error()
+            raise FileNotFoundError(f"No member {name} found in tar")
+
+    def wait(self, timeout: Optional[float] = None) -> List[Path]:
+        """
+        Wait until the whole tar has been extracted, and return the paths of the
+        files written.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                raise TimeoutError("Timed out waiting for tar extraction")
+        with self._condition:
+            self._raise_error()
+            return list(self.extracted.values())
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+        if self._cancelled:
+            raise ExtractionCancelled("Tar extraction was cancelled")
+
+
+def stream_s3_tar(
+    s3_object_name: str,
+    output_dir: Union[str, Path],
+    s3_client=None,
+    hold_after: Iterable[str] = (),
+) -> StreamingTarExtractor:
+    """
+    Start extracting the tar at s3_object_name to output_dir as it is downloaded,
+    in place of downloading it then decompressing it.
+    """
+    return StreamingTarExtractor(
+        open_s3_object(s3_object_name, s3_client=s3_client),
+        output_dir,
+        hold_after=hold_after,
+    ).start()
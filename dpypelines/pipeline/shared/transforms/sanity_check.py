@@ -1,15 +1,62 @@
 from pathlib import Path
 
+from dpypelines.pipeline.shared.transforms.sdmx.flavour import (
+    COMPACT_SDMX_V2_0,
+    GENERIC_SDMX_V2_1,
+    sdmx_flavour,
+)
+from dpypelines.pipeline.shared.transforms.sniff import XmlSniff, sniff_xml
 
-def sdmx_sanity_check_v1(sdmx_file: Path):
+
+def sdmx_sanity_check_v1(sdmx_file: Path) -> XmlSniff:
     """
     Sanity check that the recieved sdmx file is actually an sdmx file.
+
+    Only the start of the file is read, as far as its root element. The result is
+    returned, and cached for the transform's own checks.
     """
     # TODO use sdmx_path.suffix == ".xml" here
     assert sdmx_file.name.endswith(".xml"), "Invalid sdmx_file"
 
     try:
-        with open(sdmx_file, "r") as f:
-            f.read()
+        return sniff_xml(sdmx_file)
     except Exception as err:
         raise Exception(f"Failed to read in xml - {sdmx_file}") from err
+
+
+def sdmx_supported_sanity_check_v1(sdmx_file: Path) -> XmlSniff:
+    """
+    Sanity check that the recieved sdmx file is a flavour of sdmx there is a
+    transform for, judged from its root element.
+    """
+    sniff = sdmx_sanity_check_v1(sdmx_file)
+    assert (
+        sdmx_flavour(sniff) is not None
+    ), f"Unsupported sdmx_file, root element is {sniff.root_tag} - {sdmx_file}"
+    return sniff
+
+
+def _sdmx_flavour_sanity_check(sdmx_file: Path, expected_flavour: str) -> XmlSniff:
+    # Fails before the transform is started if the contents of the file do not
+    # match the flavour its source_id says it is
+    sniff = sdmx_sanity_check_v1(sdmx_file)
+    flavour = sdmx_flavour(sniff)
+    assert flavour == expected_flavour, (
+        f"Expected {expected_flavour} sdmx_file, root element {sniff.root_tag} "
+        f"is {flavour or 'not a supported flavour'} - {sdmx_file}"
+    )
+    return sniff
+
+
+def sdmx_compact_2_0_sanity_check_v1(sdmx_file: Path) -> XmlSniff:
+    """
+    Sanity check that the recieved sdmx file is a compact sdmx 2.0 message.
+    """
+    return _sdmx_flavour_sanity_check(sdmx_file, COMPACT_SDMX_V2_0)
+
+
+def sdmx_generic_2_1_sanity_check_v1(sdmx_file: Path) -> XmlSniff:
+    """
+    Sanity check that the recieved sdmx file is a generic sdmx 2.1 message.
+    """
+    return _sdmx_flavour_sanity_check(sdmx_file, GENERIC_SDMX_V2_1)
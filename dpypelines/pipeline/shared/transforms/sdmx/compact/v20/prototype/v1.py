@@ -1,86 +1,71 @@
-import xml.etree.ElementTree as ET
+from itertools import chain
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
 
 import pandas as pd
-import xmltodict
 
-from dpypelines.pipeline.shared.transforms.utils import convert, flatten_dict
+from dpypelines.pipeline.shared.transforms.sniff import sniffable
+from dpypelines.pipeline.shared.transforms.statistics import TransformStatistics
+from dpypelines.pipeline.shared.transforms.utils import (
+    ColumnBuffer,
+    StartTagCounter,
+    element_to_dict,
+    flatten_dict,
+    iterparse_elements,
+    local_name,
+    open_binary,
+)
 from dpypelines.pipeline.shared.transforms.validate_transform_v20 import (
+    check_attributes_are_expected,
     check_columns_of_dataframes_are_unique,
     check_header_info,
     check_header_unpacked,
     check_length_of_dataframe_is_expected_length,
-    check_length_of_dict_is_expected_length,
+    check_number_of_obs_is_expected,
+    check_number_of_obs_is_not_zero,
     check_read_in_sdmx,
     check_tidy_data_columns,
     check_xml_type,
     get_number_of_obs_from_xml_file,
 )
+from dpypelines.pipeline.shared.transforms.writers import (
+    DEFAULT_BATCH_SIZE,
+    open_transform_writer,
+)
 
 
 def xmlToCsvSDMX2_0(input_path, output_path):
-    check_read_in_sdmx(input_path)  # transform validation
-
-    # Converting the XML file into a giant dictionary from which we can extract the nested header dictionary
-    with open(input_path, "r") as file:
-        xml_content = file.read()
-        data = xmltodict.parse(xml_content)
-        check_xml_type(data)  # transform validation
+    sniff = check_read_in_sdmx(input_path)  # transform validation
+    # the root element is known from the sniff so the wrong type of xml fails before any parsing
+    check_xml_type({sniff.root_tag: None})  # transform validation
 
-    header = data["CompactData"]["Header"]
+    # Reading the XML file incrementally, the header is returned as a nested dictionary and each "Obs" is
+    # returned along with the attributes of the "Series" block it is contained within
+    header, observations = iterparse_sdmx_2_0(input_path)
     check_header_info(header)  # transform validation
     expected_number_of_obs = get_number_of_obs_from_xml_file(
         input_path
     )  # transform validation
 
-    # The largest, top-level element (or section) in an XML document is called the root, which contains all other elements - child elements, subelements and so on.
-    # Every part of the XML document tree (root included) has a tag that describes the element.
-
-    # Attributes are name–value pair that exist within a start-tag or empty-element tag. An XML attribute can only have a single value and each attribute can appear at most once on each element.
-
-    # The element tag is retrieved as .tab on Python ElementTree package.
-    # The name-value pair attributes are retrieved as .attrib on Python ElementTree package.
-
-    # Each block of observations tagged "Obs" within the same column headers is contained within a parent block tagged "Series". The respective tuples of dictionary are converted into 'flat' dictionaries and dropped into the series_dict and obs_dict.
-
-    tree = ET.parse(input_path)
-    root = tree.getroot()
-
-    series_dict = {}
-    obs_dict = {}
-    for series in root.iter():
-        if "Series" in series.tag:
-            for obs in series.iter():
-                if "Obs" in obs.tag:
-                    convert(series.attrib, series_dict)
-                    convert(obs.attrib, obs_dict)
-
-    check_length_of_dict_is_expected_length(
-        series_dict, expected_number_of_obs
-    )  # transform validation
-    check_length_of_dict_is_expected_length(
-        obs_dict, expected_number_of_obs
-    )  # transform validation
-
-    series_frame = pd.DataFrame(series_dict)
-    obs_frame = pd.DataFrame(obs_dict)
-
     header_dict = flatten_dict(header)
     check_header_unpacked(header_dict)  # transform validation
-    header_df = pd.DataFrame([header_dict])
-
-    # Here the records on the header dataframe are replicated to match the length of the series and observation dataframes.
-    repl_rows = header_df.loc[0].copy()
-    header_frame = pd.concat(
-        [header_df, pd.DataFrame([repl_rows] * (len(obs_frame) - 1))], ignore_index=True
-    )
-    check_length_of_dataframe_is_expected_length(
-        header_frame, expected_number_of_obs
-    )  # transform validation
 
+    # The observations are accumulated column by column. The series attributes are the same for every "Obs" in a
+    # "Series" so they are stored once per series rather than once per observation, and the header fields are the
+    # same for every observation so they are stored once and only broadcast to the length of the table at the end.
+    series_columns, obs_columns, observations = _peek_columns(observations)
     check_columns_of_dataframes_are_unique(
-        series_frame.columns, obs_frame.columns, header_frame.columns
+        pd.Index(series_columns), pd.Index(obs_columns), pd.Index(header_dict)
     )  # transform validation
-    full_table = pd.concat([header_frame, series_frame, obs_frame], axis=1)
+    buffer = ColumnBuffer(
+        series_columns,
+        obs_columns,
+        constants=header_dict,
+        capacity=expected_number_of_obs,
+    )
+    _append_observations(buffer, observations, series_columns, obs_columns)
+
+    full_table = buffer.to_dataframe()
     check_length_of_dataframe_is_expected_length(
         full_table, expected_number_of_obs
     )  # transform validation
@@ -92,3 +77,164 @@ def xmlToCsvSDMX2_0(input_path, output_path):
 
     full_table.to_csv(output_path, encoding="utf-8", index=False)
     return full_table
+
+
+def iterparse_sdmx_2_0(input_path: Path) -> Tuple[dict, Iterator[Tuple[dict, dict]]]:
+    """
+    Reads compact sdmx v2.0 in a single incremental pass.
+
+    The file is parsed as far as the end of the Header, which is returned as the
+    same nested dictionary xmltodict would produce, along with an iterator that
+    continues the parse and yields a (series attributes, obs attributes) pair for
+    each Obs. The series attributes dict is shared by every Obs in a Series.
+
+    Elements are discarded as soon as they have been read so memory use does not
+    grow with the size of the file.
+    The root element is not checked here, callers check it with check_xml_type
+    using the result of check_read_in_sdmx before parsing starts.
+    """
+    namespaces = {}
+    events = iterparse_elements(input_path, namespaces)
+
+    _, root = next(events)
+
+    for event, element in events:
+        if event == "start" and local_name(element.tag) == "DataSet":
+            raise AssertionError("could not find Header before DataSet in xml data")
+        if event == "end" and local_name(element.tag) == "Header":
+            header = element_to_dict(element, namespaces)
+            root.remove(element)
+            break
+    else:
+        raise AssertionError("could not find Header in xml data")
+
+    return header, _iter_observations(events)
+
+
+def _iter_observations(events: Iterator) -> Iterator[Tuple[dict, dict]]:
+    # Each Series and Obs is removed from its parent once read, so the parent only
+    # ever has one child and the removal is constant time.
+    dataset = series = None
+    for event, element in events:
+        name = local_name(element.tag)
+        if event == "start":
+            if name == "Series":
+                assert (
+                    dataset is not None
+                ), "Series found outside of a DataSet in xml data"
+                series = element
+            elif name == "DataSet":
+                dataset = element
+            elif name == "Obs":
+                assert series is not None, "Obs found outside of a Series in xml data"
+        elif name == "Obs":
+            yield series.attrib, element.attrib
+            series.remove(element)
+        elif name == "Series":
+            dataset.remove(element)
+            series = None
+        elif name == "DataSet":
+            dataset = None
+
+
+def _peek_columns(
+    observations: Iterator[Tuple[dict, dict]]
+) -> Tuple[list, list, Iterator[Tuple[dict, dict]]]:
+    # Returns the series and obs columns from the attributes of the first Obs, along
+    # with an iterator of observations that still includes the first one
+    first = next(observations, None)
+    check_number_of_obs_is_not_zero(0 if first is None else 1)  # transform validation
+    series_attrib, obs_attrib = first
+    return list(series_attrib), list(obs_attrib), chain([first], observations)
+
+
+def _append_observations(
+    table,
+    observations: Iterator[Tuple[dict, dict]],
+    series_columns: list,
+    obs_columns: list,
+):
+    # Adds each observation to table (a ColumnBuffer or a writer from
+    # open_transform_writer), starting a new run whenever the Series changes
+    current_series = None
+    for series_attrib, obs_attrib in observations:
+        if series_attrib is not current_series:
+            check_attributes_are_expected(
+                series_attrib, series_columns, "Series"
+            )  # transform validation
+            table.start_run([series_attrib[key] for key in series_columns])
+            current_series = series_attrib
+        check_attributes_are_expected(
+            obs_attrib, obs_columns, "Obs"
+        )  # transform validation
+        table.append([obs_attrib[key] for key in obs_columns])
+
+
+def xmlToCsvSDMX2_0_streaming(
+    input_path: Union[Path, BinaryIO],
+    output_path: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    parquet_path: Optional[Path] = None,
+    statistics: Optional[TransformStatistics] = None,
+) -> int:
+    """
+    Streaming equivalent of xmlToCsvSDMX2_0 for large files.
+
+    The header, series attributes and Obs rows are read in one pass and rows are
+    appended to output_path in batches of batch_size as they are read, so peak
+    memory stays constant whatever the size of input_path. The csv has the same
+    columns as produced by xmlToCsvSDMX2_0. Returns the number of observations
+    written.
+
+    If parquet_path is given the same rows are also written to it as parquet, with
+    the header and series columns dictionary encoded. If statistics is given the
+    aggregates needed for the version metadata are collected in it as rows are
+    written.
+
+    input_path can also be a binary file object, such as a member of a tar that
+    is being streamed, which is only read through once. The Obs tags in it are
+    counted as it is read, and the number of rows written is checked against the
+    count at the end, as xmlToCsvSDMX2_0 checks against
+    get_number_of_obs_from_xml_file.
+    """
+    input_path = sniffable(input_path)
+    sniff = check_read_in_sdmx(input_path)  # transform validation
+    # the root element is known from the sniff so the wrong type of xml fails before any parsing
+    check_xml_type({sniff.root_tag: None})  # transform validation
+
+    with open_binary(input_path) as xml_file:
+        # the Obs tags are counted in the bytes as they are parsed, to check every
+        # one has been written once the whole file has been read
+        obs_counter = StartTagCounter(xml_file, "na_:Obs")
+        header, observations = iterparse_sdmx_2_0(obs_counter)
+        check_header_info(header)  # transform validation
+        header_dict = flatten_dict(header)
+        check_header_unpacked(header_dict)  # transform validation
+
+        series_columns, obs_columns, observations = _peek_columns(observations)
+        check_columns_of_dataframes_are_unique(
+            series_columns, obs_columns, list(header_dict)
+        )  # transform validation
+
+        # tidying up the column headers so they are not filled with @ and such
+        columns = [
+            str(x).replace("@", "")
+            for x in [*header_dict, *series_columns, *obs_columns]
+        ]
+        check_tidy_data_columns(columns)  # transform validation
+
+        # the header fields are the same for every row so are encoded once as the start of each row
+        with open_transform_writer(
+            output_path,
+            columns,
+            list(header_dict.values()),
+            batch_size=batch_size,
+            parquet_path=parquet_path,
+            statistics=statistics,
+        ) as writer:
+            _append_observations(writer, observations, series_columns, obs_columns)
+
+    check_number_of_obs_is_expected(
+        len(writer), obs_counter.count
+    )  # transform validation
+    return len(writer)
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from dpypelines.pipeline.shared.transforms.sdmx.flavour import (
+    COMPACT_SDMX_V2_0,
+    GENERIC_SDMX_V2_1,
+    detect_sdmx_flavour,
+)
+from dpypelines.pipeline.shared.transforms.sdmx.v20 import sdmx_compact_2_0_prototype_1
+from dpypelines.pipeline.shared.transforms.sdmx.v21 import sdmx_generic_2_1_prototype_1
+from dpypelines.pipeline.shared.transforms.sniff import sniffable
+
+# Streaming transform for each sdmx flavour
+SDMX_TRANSFORMS = {
+    COMPACT_SDMX_V2_0: sdmx_compact_2_0_prototype_1,
+    GENERIC_SDMX_V2_1: sdmx_generic_2_1_prototype_1,
+}
+
+
+def sdmx_prototype_1(input_file: Path, **kwargs):
+    """
+    Transforms input_file with the transform for the flavour of sdmx it holds, as
+    detected from its root element, so one source_id can take either flavour.
+    kwargs, such as batch_size, are passed on to the transform.
+    """
+    input_file = sniffable(input_file)
+    flavour = detect_sdmx_flavour(input_file)
+    return SDMX_TRANSFORMS[flavour](input_file, **kwargs)
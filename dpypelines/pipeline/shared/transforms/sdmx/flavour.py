@@ -0,0 +1,55 @@
+import re
+from pathlib import Path
+from typing import Optional
+
+from dpypelines.pipeline.shared.transforms.sniff import XmlSniff, sniff_xml
+
+# The sdmx flavours there are transforms for, named as the source_id suffixes in the
+# pipeline CONFIGURATION
+COMPACT_SDMX_V2_0 = "compact_sdmx_v2_0"
+GENERIC_SDMX_V2_1 = "generic_sdmx_v2_1"
+
+# Flavour of an sdmx message by (root element name, sdmx version of its namespace)
+SDMX_FLAVOURS = {
+    ("CompactData", "2.0"): COMPACT_SDMX_V2_0,
+    ("GenericData", "2.1"): GENERIC_SDMX_V2_1,
+}
+
+# e.g. "http://www.SDMX.org/resources/SDMXML/schemas/v2_0/message"
+_MESSAGE_NAMESPACE = re.compile(r"/schemas/v(\d+)_(\d+)/message$", re.IGNORECASE)
+
+
+def sdmx_version(namespace: str) -> Optional[str]:
+    """
+    The sdmx version, such as "2.1", of an sdmx message namespace uri, or None if
+    namespace is not one.
+    """
+    match = _MESSAGE_NAMESPACE.search(namespace)
+    if match is None:
+        return None
+    return f"{match.group(1)}.{match.group(2)}"
+
+
+def sdmx_flavour(sniff: XmlSniff) -> Optional[str]:
+    """
+    The flavour of the sdmx message described by sniff, one of the values of
+    SDMX_FLAVOURS, or None if it is not a flavour there is a transform for.
+    """
+    version = sdmx_version(sniff.root_namespace)
+    return SDMX_FLAVOURS.get((sniff.root_name, version))
+
+
+def detect_sdmx_flavour(xml_file: Path) -> str:
+    """
+    Detects the flavour of the sdmx message in xml_file from its root element,
+    reading only the start of the file (see sniff_xml). Raises ValueError if it is
+    not a flavour there is a transform for.
+    """
+    sniff = sniff_xml(xml_file)
+    flavour = sdmx_flavour(sniff)
+    if flavour is None:
+        raise ValueError(
+            f"{xml_file} is not a supported sdmx message, it has root element "
+            f"{sniff.root_tag} in namespace '{sniff.root_namespace}'"
+        )
+    return flavour
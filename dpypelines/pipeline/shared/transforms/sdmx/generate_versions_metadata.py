@@ -1,25 +1,75 @@
 import json
 
-import pandas as pd
 import xmltodict
 
-from dpypelines.pipeline.shared.transforms.utils import pathify, set_key
+from dpypelines.pipeline.shared.transforms.statistics import TransformStatistics
+from dpypelines.pipeline.shared.transforms.utils import (
+    DEFAULT_CHUNK_SIZE,
+    iter_table_chunks,
+    pathify,
+    read_column_names,
+    set_key,
+)
+
+# The columns of the transformed data that the metadata is generated from
+METADATA_COLUMNS = [
+    "TITLE",
+    "Extracted",
+    "REF_AREA",
+    "COUNTERPART_AREA",
+    "TIME_PERIOD",
+    "TIME_FORMAT",
+]
 
 
 def generate_versions_metadata(
-    transformedCSV, outputPath, metadataTemplate=False, structureXML=False, config=False
+    transformedCSV,
+    outputPath,
+    metadataTemplate=False,
+    structureXML=False,
+    config=False,
+    chunk_size=DEFAULT_CHUNK_SIZE,
 ):
 
-    # Read in Structure XML provided with the SDMX and tidyCSV we created earlier in the transform
+    # transformedCSV can be a csv or a parquet file, the full list of columns is taken from the
+    # file header and only the columns used for the metadata are read in, chunk_size rows at a
+    # time, and folded into the statistics
+    statistics = TransformStatistics()
+    statistics.columns = read_column_names(transformedCSV)
+    for chunk in iter_table_chunks(
+        transformedCSV, columns=METADATA_COLUMNS, chunk_size=chunk_size
+    ):
+        statistics.update(chunk)
+
+    return generate_versions_metadata_from_statistics(
+        statistics,
+        outputPath,
+        metadataTemplate=metadataTemplate,
+        structureXML=structureXML,
+        config=config,
+    )
+
+
+def generate_versions_metadata_from_statistics(
+    statistics: TransformStatistics,
+    outputPath,
+    metadataTemplate=False,
+    structureXML=False,
+    config=False,
+):
+    """
+    Generates the version metadata from the statistics collected while the transform
+    wrote its output, so the output does not need to be read back in.
+    """
+
+    # Read in Structure XML provided with the SDMX
     if structureXML:
         with open(structureXML, "r") as file:
             xml_content = file.read()
             data = xmltodict.parse(xml_content)
 
-    tidyCSV = pd.read_csv(transformedCSV)
-
     # Pull out the dataset title which we'll use later
-    dataset_title = tidyCSV["TITLE"].iloc[0]
+    dataset_title = statistics.first_values["TITLE"]
 
     # Get a list of the concepts and key families from the structure XML which contain info on the data dimensions, at the moment we're basically just using this for the datatype and dimension name where possible
     # this then gets thrown into a dictionary with an entry for each possible dimension header
@@ -45,11 +95,11 @@ def generate_versions_metadata(
                 concept["str:TextFormat"]["@textType"],
             )
 
-    # Here we're going through each header in the tidyCSV and attempting to match it up with the DSD informaion we got before, for other headers (such as the metadata columns) we assume the datatype is just a string
+    # Here we're going through each header in the transformed data and attempting to match it up with the DSD informaion we got before, for other headers (such as the metadata columns) we assume the datatype is just a string
     full_dimensions = {}
 
     if structureXML:
-        for column in tidyCSV.columns:
+        for column in statistics.columns:
             if column in dimensions.keys():
                 full_dimensions[column] = column
                 if len(dimensions[column]) == 3:
@@ -66,7 +116,7 @@ def generate_versions_metadata(
                 set_key(full_dimensions, column, column.lower())
                 set_key(full_dimensions, column, "string")
     else:
-        for column in tidyCSV.columns:
+        for column in statistics.columns:
             full_dimensions[column] = column
             set_key(full_dimensions, column, column.lower())
             set_key(full_dimensions, column, column.lower())
@@ -100,7 +150,7 @@ def generate_versions_metadata(
         "http://www.nationalarchives.gov.uk/doc/open-government-licence/version/3/"
     )
     versions_template["modified"] = (
-        tidyCSV["Extracted"].iloc[0].split("+")[0] + "Z"
+        statistics.first_values["Extracted"].split("+")[0] + "Z"
     )  # This is working off the assumption that every extraction date is a new modification of the data
     versions_template["next_release"] = (
         ""  # could we infer this from issued date and release frequency if we include that in the config?
@@ -111,19 +161,19 @@ def generate_versions_metadata(
         "telephone": "",
     }  # config file?
     versions_template["frequency"] = ""  # config file?
-    versions_template["spatial_coverage"] = list(tidyCSV.REF_AREA.unique())[
+    versions_template["spatial_coverage"] = statistics.unique("REF_AREA")[
         0
     ]  # this will need investigation into whether this is accurate to what we need for this field
-    versions_template["spatial_resolution"] = list(
-        tidyCSV.COUNTERPART_AREA.unique()
+    versions_template["spatial_resolution"] = statistics.unique(
+        "COUNTERPART_AREA"
     )  # this will need investigation into whether this is accurate to what we need for this field
     versions_template["temporal_coverage"] = (
         "start: "
-        + str(min(tidyCSV.TIME_PERIOD))
+        + str(statistics.min_values["TIME_PERIOD"])
         + ", end: "
-        + str(max(tidyCSV.TIME_PERIOD))
+        + str(statistics.max_values["TIME_PERIOD"])
     )  # I'll need to input on the formatting of this field cause the previous iteration was a dictionry but the spec has it now as a string
-    versions_template["temporal_resolution"] = list(tidyCSV.TIME_FORMAT.unique())[
+    versions_template["temporal_resolution"] = statistics.unique("TIME_FORMAT")[
         0
     ]  # this will need investigation into whether this is accurate to what we need for this field
     versions_template["contact_point"] = {
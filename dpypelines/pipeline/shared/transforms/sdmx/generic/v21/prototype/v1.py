@@ -1,100 +1,77 @@
+from itertools import chain
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
 import pandas as pd
-import xmltodict
 
-from dpypelines.pipeline.shared.transforms.utils import flatten_dict
+from dpypelines.pipeline.shared.transforms.sniff import sniffable
+from dpypelines.pipeline.shared.transforms.statistics import TransformStatistics
+from dpypelines.pipeline.shared.transforms.utils import (
+    ColumnBuffer,
+    StartTagCounter,
+    element_to_dict,
+    flatten_dict,
+    iterparse_elements,
+    local_name,
+    open_binary,
+)
 from dpypelines.pipeline.shared.transforms.validate_transform_v21 import (
     check_columns_of_dataframes_are_unique,
     check_header_info,
     check_header_unpacked,
     check_length_of_dataframe_is_expected_length,
-    check_obs_dicts_have_same_keys,
+    check_number_of_obs_is_expected,
+    check_number_of_obs_is_not_zero,
+    check_obs_has_expected_keys,
     check_read_in_sdmx,
+    check_series_and_obs_columns_are_unique,
     check_tidy_data_columns,
     check_xml_type,
     get_number_of_obs_from_xml_file,
 )
+from dpypelines.pipeline.shared.transforms.writers import (
+    DEFAULT_BATCH_SIZE,
+    open_transform_writer,
+)
 
 
 def xmlToCsvSDMX2_1(input_path, output_path):
 
-    check_read_in_sdmx(input_path)  # transform validation
+    sniff = check_read_in_sdmx(input_path)  # transform validation
+    # the root element is known from the sniff so the wrong type of xml fails before any parsing
+    check_xml_type({sniff.root_tag: None})  # transform validation
 
-    # Converting the XML file into a giant dictionary from the nested header dictionary
-    with open(input_path, "r") as file:
-        xml_content = file.read()
-        data = xmltodict.parse(xml_content)
-        check_xml_type(data)  # transform validation
-
-    header = data["message:GenericData"]["message:Header"]
-    for key in header.keys():
-        header[(key.replace("message:", "").replace("common:", ""))] = header.pop(key)
-    check_header_info(header)  # transform validatio
+    # Reading the XML file incrementally, the header is returned as a dictionary and each "generic:Obs" is returned
+    # along with the "generic:SeriesKey" and "generic:Attributes" values of its "generic:Series"
+    header, observations = iterparse_sdmx_2_1(input_path)
+    check_header_info(header)  # transform validation
 
     expected_number_of_obs = get_number_of_obs_from_xml_file(
         input_path
     )  # transform validation
 
-    tables = data["message:GenericData"]["message:DataSet"]["generic:Series"]
-
-    series_dict = {}
-    obs_dicts = []
-
-    for table in tables:
-        for element in table.items():
-            if element[0] == "generic:SeriesKey":
-                for sub_element in element[1]["generic:Value"]:
-                    series_dict[sub_element["@id"]] = sub_element["@value"]
-            elif element[0] == "generic:Attributes":
-                for sub_element in element[1]["generic:Value"]:
-                    series_dict[sub_element["@id"]] = sub_element["@value"]
-            elif element[0] == "generic:Obs":
-                for observation in element[1]:
-                    observation_temp = {}
-                    for sub_element in observation["generic:Attributes"][
-                        "generic:Value"
-                    ]:
-                        observation_temp[sub_element["@id"]] = sub_element["@value"]
-                    observation_temp.update(
-                        {
-                            "generic:ObsDimension": next(
-                                iter(observation["generic:ObsDimension"].values())
-                            )
-                        }
-                    )
-                    observation_temp.update(
-                        {
-                            "generic:ObsValue": next(
-                                iter(observation["generic:ObsValue"].values())
-                            )
-                        }
-                    )
-                    obs_dicts.append(series_dict | observation_temp)
-
-    check_obs_dicts_have_same_keys(obs_dicts)  # transform validation
-    obs_frame = pd.DataFrame(obs_dicts)
-    check_length_of_dataframe_is_expected_length(
-        obs_frame, expected_number_of_obs
-    )  # transform validation
-
     header_dict = flatten_dict(header)
     check_header_unpacked(header_dict)  # transform validation
-    header_df = pd.DataFrame([header_dict])
-
-    header_repl_dict = header_df.to_dict(orient="list")
-    for key in header_repl_dict:
-        header_repl_dict[key] = header_repl_dict[key] * (len(obs_frame) - 1)
 
-    header_repl_df = pd.DataFrame(header_repl_dict)
-    header_frame = pd.concat([header_df, header_repl_df], ignore_index=True)
-    check_length_of_dataframe_is_expected_length(
-        header_frame, expected_number_of_obs
+    # The observations are accumulated column by column. The series values are the same for every observation in a
+    # series so they are stored once per series rather than being merged into a dict for every observation, and the
+    # header fields are stored once and only broadcast to the length of the table at the end.
+    series_columns, obs_columns, observations = _peek_columns(observations)
+    check_series_and_obs_columns_are_unique(
+        series_columns, obs_columns
     )  # transform validation
-
     check_columns_of_dataframes_are_unique(
-        obs_frame.columns, header_frame.columns
+        pd.Index([*series_columns, *obs_columns]), pd.Index(header_dict)
     )  # transform validation
+    buffer = ColumnBuffer(
+        series_columns,
+        obs_columns,
+        constants=header_dict,
+        capacity=expected_number_of_obs,
+    )
+    _append_observations(buffer, observations, series_columns, obs_columns)
 
-    full_table = pd.concat([header_frame, obs_frame], axis=1)
+    full_table = buffer.to_dataframe()
     check_length_of_dataframe_is_expected_length(
         full_table, expected_number_of_obs
     )  # transform validation
@@ -114,3 +91,195 @@ def xmlToCsvSDMX2_1(input_path, output_path):
 
     full_table.to_csv(output_path, encoding="utf-8", index=False)
     return full_table
+
+
+def iterparse_sdmx_2_1(input_path: Path) -> Tuple[dict, Iterator[Tuple[dict, dict]]]:
+    """
+    Reads generic sdmx v2.1 in a single incremental pass.
+
+    The file is parsed as far as the end of the message:Header, which is returned
+    as the same dictionary xmltodict would produce (with the "message:" and
+    "common:" prefixes removed from its keys), along with an iterator that
+    continues the parse and yields a (series values, obs values) pair for each
+    generic:Obs. The series values dict holds the SeriesKey and Attributes values
+    and is shared by every Obs in a Series. The obs values dict holds the Obs
+    Attributes values followed by "generic:ObsDimension" and "generic:ObsValue".
+
+    Elements are discarded as soon as they have been read so memory use is bounded
+    by a single Series rather than by the whole dataset.
+    The root element is not checked here, callers check it with check_xml_type
+    using the result of check_read_in_sdmx before parsing starts.
+    """
+    namespaces = {}
+    events = iterparse_elements(input_path, namespaces)
+
+    _, root = next(events)
+
+    for event, element in events:
+        if event == "start" and local_name(element.tag) == "DataSet":
+            raise AssertionError("could not find Header before DataSet in xml data")
+        if event == "end" and local_name(element.tag) == "Header":
+            header = {
+                key.replace("message:", "").replace("common:", ""): value
+                for key, value in element_to_dict(element, namespaces).items()
+            }
+            root.remove(element)
+            break
+    else:
+        raise AssertionError("could not find Header in xml data")
+
+    return header, _iter_observations(events)
+
+
+def _iter_observations(events: Iterator) -> Iterator[Tuple[dict, dict]]:
+    # Values are read on their end events, into the current observation if inside
+    # a generic:Obs and into the current series otherwise. Each Obs and Series is
+    # removed from its parent once read.
+    dataset = series = None
+    series_values = obs_values = None
+    obs_dimension = obs_value = None
+    for event, element in events:
+        name = local_name(element.tag)
+        if event == "start":
+            if name == "Obs":
+                assert (
+                    series is not None
+                ), "generic:Obs found outside of a generic:Series in xml data"
+                obs_values = {}
+            elif name == "Series":
+                assert (
+                    dataset is not None
+                ), "generic:Series found outside of a DataSet in xml data"
+                series = element
+                series_values = {}
+            elif name == "DataSet":
+                dataset = element
+        elif name == "Value":
+            values = series_values if obs_values is None else obs_values
+            assert values is not None, (
+                f"generic:Value {element.attrib.get('id')} found outside of a "
+                "generic:Series or generic:Obs in xml data"
+            )
+            values[element.attrib["id"]] = element.attrib["value"]
+        elif name == "ObsDimension":
+            obs_dimension = next(iter(element.attrib.values()))
+        elif name == "ObsValue":
+            obs_value = next(iter(element.attrib.values()))
+        elif name == "Obs":
+            obs_values["generic:ObsDimension"] = obs_dimension
+            obs_values["generic:ObsValue"] = obs_value
+            yield series_values, obs_values
+            obs_values = obs_dimension = obs_value = None
+            series.remove(element)
+        elif name == "Series":
+            dataset.remove(element)
+            series = series_values = None
+        elif name == "DataSet":
+            dataset = None
+
+
+def _peek_columns(
+    observations: Iterator[Tuple[dict, dict]]
+) -> Tuple[list, list, Iterator[Tuple[dict, dict]]]:
+    # Returns the series and obs columns from the first observation, along with an
+    # iterator of observations that still includes the first one
+    first = next(observations, None)
+    check_number_of_obs_is_not_zero(0 if first is None else 1)  # transform validation
+    series_values, obs_values = first
+    return list(series_values), list(obs_values), chain([first], observations)
+
+
+def _append_observations(
+    table,
+    observations: Iterator[Tuple[dict, dict]],
+    series_columns: list,
+    obs_columns: list,
+):
+    # Adds each observation to table (a ColumnBuffer or a writer from
+    # open_transform_writer), starting a new run whenever the generic:Series changes
+    current_series = None
+    for series_values, obs_values in observations:
+        if series_values is not current_series:
+            check_obs_has_expected_keys(
+                series_values, series_columns
+            )  # transform validation
+            table.start_run([series_values[key] for key in series_columns])
+            current_series = series_values
+        check_obs_has_expected_keys(obs_values, obs_columns)  # transform validation
+        table.append([obs_values[key] for key in obs_columns])
+
+
+def xmlToCsvSDMX2_1_streaming(
+    input_path: Union[Path, BinaryIO],
+    output_path: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    parquet_path: Optional[Path] = None,
+    statistics: Optional[TransformStatistics] = None,
+) -> int:
+    """
+    Streaming equivalent of xmlToCsvSDMX2_1 for large files.
+
+    The generic:Series, generic:SeriesKey, generic:Attributes and generic:Obs
+    elements are read as parse events and rows are appended to output_path in
+    batches of batch_size as they are read, so memory use is bounded by one series
+    rather than by the whole dataset. The csv has the same columns as produced by
+    xmlToCsvSDMX2_1. Returns the number of observations written.
+
+    If parquet_path is given the same rows are also written to it as parquet, with
+    the header and series columns dictionary encoded. If statistics is given the
+    aggregates needed for the version metadata are collected in it as rows are
+    written.
+
+    input_path can also be a binary file object, such as a member of a tar that
+    is being streamed, which is only read through once. The generic:Obs tags in it
+    are counted as it is read, and the number of rows written is checked against
+    the count at the end, as xmlToCsvSDMX2_1 checks against
+    get_number_of_obs_from_xml_file.
+    """
+    input_path = sniffable(input_path)
+    sniff = check_read_in_sdmx(input_path)  # transform validation
+    # the root element is known from the sniff so the wrong type of xml fails before any parsing
+    check_xml_type({sniff.root_tag: None})  # transform validation
+
+    with open_binary(input_path) as xml_file:
+        # the generic:Obs tags are counted in the bytes as they are parsed, to check
+        # every one has been written once the whole file has been read
+        obs_counter = StartTagCounter(xml_file, "generic:Obs")
+        header, observations = iterparse_sdmx_2_1(obs_counter)
+        check_header_info(header)  # transform validation
+        header_dict = flatten_dict(header)
+        check_header_unpacked(header_dict)  # transform validation
+
+        series_columns, obs_columns, observations = _peek_columns(observations)
+        check_series_and_obs_columns_are_unique(
+            series_columns, obs_columns
+        )  # transform validation
+        check_columns_of_dataframes_are_unique(
+            [*series_columns, *obs_columns], list(header_dict)
+        )  # transform validation
+
+        header_replace = {
+            "generic:ObsDimension": "TIME_PERIOD",
+            "generic:ObsValue": "OBS_VALUE",
+        }
+        columns = [
+            header_replace.get(x, str(x).replace("@", "").replace("#", ""))
+            for x in [*header_dict, *series_columns, *obs_columns]
+        ]
+        check_tidy_data_columns(columns)  # transform validation
+
+        # the header fields are the same for every row so are encoded once as the start of each row
+        with open_transform_writer(
+            output_path,
+            columns,
+            list(header_dict.values()),
+            batch_size=batch_size,
+            parquet_path=parquet_path,
+            statistics=statistics,
+        ) as writer:
+            _append_observations(writer, observations, series_columns, obs_columns)
+
+    check_number_of_obs_is_expected(
+        len(writer), obs_counter.count
+    )  # transform validation
+    return len(writer)
@@ -1,19 +1,35 @@
 from pathlib import Path
 
 from dpypelines.pipeline.shared.transforms.sdmx.generate_versions_metadata import (
-    generate_versions_metadata,
+    generate_versions_metadata_from_statistics,
 )
 from dpypelines.pipeline.shared.transforms.sdmx.generic.v21.prototype.v1 import (
-    xmlToCsvSDMX2_1,
+    xmlToCsvSDMX2_1_streaming,
 )
+from dpypelines.pipeline.shared.transforms.statistics import TransformStatistics
+from dpypelines.pipeline.shared.transforms.writers import DEFAULT_BATCH_SIZE
 
 
-def sdmx_generic_2_1_prototype_1(input_file: Path):
+def sdmx_generic_2_1_prototype_1(
+    input_file: Path, batch_size: int = DEFAULT_BATCH_SIZE
+):
+    """
+    Transforms input_file to data.csv and generates metadata.json from the
+    statistics collected while the csv is written.
 
+    input_file can also be a binary file object, such as a tar member piped in by
+    s3_tar_received, which is only read through once.
+    """
     csv_out = Path("data.csv")
     metadata_out = Path("metadata.json")
 
-    xmlToCsvSDMX2_1(input_file, csv_out)
-    generate_versions_metadata(csv_out, metadata_out)
+    statistics = TransformStatistics()
+    xmlToCsvSDMX2_1_streaming(
+        input_file,
+        csv_out,
+        batch_size=batch_size,
+        statistics=statistics,
+    )
+    generate_versions_metadata_from_statistics(statistics, metadata_out)
 
     return csv_out, metadata_out
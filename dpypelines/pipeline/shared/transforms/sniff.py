@@ -0,0 +1,223 @@
+import codecs
+import io
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional, Union
+
+from dpypelines.pipeline.shared.transforms.utils import (
+    XML_NAMESPACE,
+    local_name,
+    qualified_name,
+)
+
+# Number of bytes read at a time from the start of a file until its root element is found
+DEFAULT_SNIFF_SIZE = 16 * 1024
+
+# Largest number of bytes read from the start of a file before giving up on finding its root element
+MAX_SNIFF_SIZE = 1024 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+_DECLARATION_ENCODING = re.compile(
+    rb"""^<\?xml[^>]*?encoding\s*=\s*["']([A-Za-z0-9._-]+)["']"""
+)
+
+
+@dataclass(frozen=True)
+class XmlSniff:
+    """
+    What can be learned about an xml file from the first few KB: its encoding,
+    whether it starts with an xml declaration, its root element (as "prefix:name",
+    the form used by xmltodict, and without the prefix), the namespace uri of the
+    root element and the namespaces declared up to and including the root element,
+    as {prefix: uri}.
+    """
+
+    encoding: str
+    has_declaration: bool
+    root_tag: str
+    root_name: str
+    root_namespace: str = ""
+    namespaces: Dict[str, str] = field(default_factory=dict)
+
+
+def _detect_encoding(head: bytes) -> str:
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = _DECLARATION_ENCODING.match(head)
+    if match:
+        return match.group(1).decode("ascii").lower()
+    return "utf-8"
+
+
+def _sniff_blocks(blocks: Iterator[bytes]) -> XmlSniff:
+    # Feeds blocks from the start of a file to a parser until the root element has
+    # been parsed, reading no more than MAX_SNIFF_SIZE bytes
+    parser = ET.XMLPullParser(events=("start-ns", "start"))
+    namespaces = {}
+    head = b""
+    for block in blocks:
+        head += block
+        parser.feed(block)
+        for event, item in parser.read_events():
+            if event == "start-ns":
+                prefix, uri = item
+                namespaces.setdefault(prefix, uri)
+                continue
+            uri_prefixes = {uri: prefix for prefix, uri in namespaces.items()}
+            uri_prefixes.setdefault(XML_NAMESPACE, "xml")
+            encoding = _detect_encoding(head)
+            stripped = head
+            for bom, _ in _BOMS:
+                if stripped.startswith(bom):
+                    stripped = stripped[len(bom) :]
+                    break
+            has_declaration = stripped.decode(encoding, errors="ignore").startswith(
+                "<?xml"
+            )
+            return XmlSniff(
+                encoding=encoding,
+                has_declaration=has_declaration,
+                root_tag=qualified_name(item.tag, uri_prefixes),
+                root_name=local_name(item.tag),
+                root_namespace=(
+                    item.tag[1:].partition("}")[0] if item.tag.startswith("{") else ""
+                ),
+                namespaces=namespaces,
+            )
+        if len(head) >= MAX_SNIFF_SIZE:
+            break
+    raise ValueError(f"could not find a root element in the first {len(head)} bytes")
+
+
+@lru_cache(maxsize=32)
+def _sniff_xml(path: str, mtime_ns: int, size: int, sniff_size: int) -> XmlSniff:
+    # mtime_ns and size are only part of the cache key, so a file that is changed
+    # is sniffed again
+    with open(path, "rb") as f:
+        return _sniff_blocks(iter(lambda: f.read(sniff_size), b""))
+
+
+class SniffedStream(io.RawIOBase):
+    """
+    Wraps a binary file object that can only be read through once, such as a member
+    of a tar that is being streamed, so it can be both sniffed and parsed.
+
+    The start of the stream is read when it is first sniffed or read from, as far
+    as the root element, and is kept so that reading the SniffedStream returns it
+    again followed by the rest of the stream. It can be passed to sniff_xml and to
+    the streaming transforms in place of a path, and name is used in its place by
+    the sanity checks and in their error messages.
+
+    Usage:
+        stream = SniffedStream(tar.extractfile(member), name="data.xml")
+        sniff_xml(stream).root_tag
+        xmlToCsvSDMX2_1_streaming(stream, "data.csv")
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        name: Optional[str] = None,
+        sniff_size: Optional[int] = None,
+    ):
+        self.fileobj = fileobj
+        self.name = name if name is not None else str(getattr(fileobj, "name", ""))
+        self.sniff_size = sniff_size or DEFAULT_SNIFF_SIZE
+        self._head: Optional[bytes] = None
+        self._position = 0
+        self._sniff: Optional[XmlSniff] = None
+        self._sniff_error: Optional[Exception] = None
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={self.name!r})"
+
+    def _read_head(self):
+        if self._head is not None:
+            return
+        blocks = []
+
+        def read_blocks():
+            while True:
+                block = self.fileobj.read(self.sniff_size)
+                if not block:
+                    return
+                blocks.append(block)
+                yield block
+
+        try:
+            self._sniff = _sniff_blocks(read_blocks())
+        except (ET.ParseError, ValueError) as err:
+            self._sniff_error = err
+        self._head = b"".join(blocks)
+
+    @property
+    def sniff(self) -> XmlSniff:
+        """
+        The XmlSniff of the start of the stream. Raises ET.ParseError or ValueError
+        as sniff_xml does.
+        """
+        self._read_head()
+        if self._sniff_error is not None:
+            raise self._sniff_error
+        return self._sniff
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        self._read_head()
+        if self._position < len(self._head):
+            data = self._head[self._position : self._position + len(buffer)]
+            self._position += len(data)
+        else:
+            data = self.fileobj.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def sniff_xml(
+    xml_file: Union[Path, SniffedStream], sniff_size: Optional[int] = None
+) -> XmlSniff:
+    """
+    Reads only the start of xml_file, a few KB at a time until the root element
+    has been parsed, and returns an XmlSniff describing it. Raises OSError if the
+    file cannot be read, ET.ParseError if it does not start as well formed xml and
+    ValueError if no root element is found in the first MAX_SNIFF_SIZE bytes.
+
+    Results are cached by path, modification time and size, so checks that run
+    one after another on the same file (the sanity check, then the transform)
+    only read it once.
+
+    xml_file can also be a SniffedStream, whose own sniff is returned.
+    """
+    if isinstance(xml_file, SniffedStream):
+        return xml_file.sniff
+    path = Path(xml_file).resolve()
+    stat = path.stat()
+    return _sniff_xml(
+        str(path), stat.st_mtime_ns, stat.st_size, sniff_size or DEFAULT_SNIFF_SIZE
+    )
+
+
+def sniffable(xml_file: Union[str, Path, BinaryIO]) -> Union[Path, SniffedStream]:
+    """
+    xml_file as a Path, if it is a path, or as a SniffedStream if it is a binary
+    file object, so it can be passed on to sniff_xml and then parsed.
+    """
+    if isinstance(xml_file, (str, Path)):
+        return Path(xml_file)
+    if isinstance(xml_file, SniffedStream):
+        return xml_file
+    return SniffedStream(xml_file)
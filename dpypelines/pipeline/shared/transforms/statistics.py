@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+# Columns of the transformed data whose value in the first row is kept
+FIRST_VALUE_COLUMNS = ("TITLE", "Extracted")
+
+# Columns of the transformed data whose distinct values are kept, in the order they first appear
+UNIQUE_VALUE_COLUMNS = ("REF_AREA", "COUNTERPART_AREA", "TIME_FORMAT")
+
+# Columns of the transformed data whose smallest and largest values are kept
+RANGE_COLUMNS = ("TIME_PERIOD",)
+
+
+def _is_blank(value) -> bool:
+    return value is None or value == ""
+
+
+class TransformStatistics:
+    """
+    Running aggregates of the columns of a transform's output that the version
+    metadata is generated from: the first value of FIRST_VALUE_COLUMNS, the
+    distinct values of UNIQUE_VALUE_COLUMNS and the min and max of RANGE_COLUMNS.
+    Blank values are not counted as distinct values or in a range. All values are
+    the text written to the csv, so ranges are compared as strings.
+
+    The aggregates can be collected while the transform writes its rows, as it has
+    the same begin(), start_run() and append() interface as the transform writers
+    (see open_transform_writer), or folded in from DataFrames of the transformed
+    data with update(). Either way the full table never needs to be held or read
+    back in.
+
+    Usage:
+        statistics = TransformStatistics()
+        xmlToCsvSDMX2_0_streaming(input_file, csv_out, statistics=statistics)
+        statistics.first_values["TITLE"]
+    """
+
+    def __init__(self):
+        self.columns: List[str] = []
+        self.first_values: Dict[str, Any] = {}
+        self.unique_values: Dict[str, Dict[Any, None]] = {}
+        self.min_values: Dict[str, Any] = {}
+        self.max_values: Dict[str, Any] = {}
+        self._length = 0
+        self._constants: Dict[str, Any] = {}
+        self._run_columns: Optional[List[str]] = None
+        self._run_values: Dict[str, Any] = {}
+        self._run_counted = True
+        self._row_positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._length
+
+    def begin(self, columns: Sequence[str], constants: Sequence = ()):
+        """
+        Set the columns of the rows that will be added with start_run() and
+        append(), the first len(constants) of which hold the given constants.
+        """
+        self.columns = list(columns)
+        self._constants = dict(zip(self.columns, constants))
+
+    def unique(self, column: str) -> list:
+        """
+        The distinct values of column, in the order they first appeared.
+        """
+        return list(self.unique_values.get(column, {}))
+
+    def _add_values(self, values: Dict[str, Any]):
+        # Folds in the values of one row for the columns given
+        for column, value in values.items():
+            if column in FIRST_VALUE_COLUMNS:
+                self.first_values.setdefault(column, value)
+            if _is_blank(value):
+                continue
+            if column in UNIQUE_VALUE_COLUMNS:
+                self.unique_values.setdefault(column, {}).setdefault(value)
+            if column in RANGE_COLUMNS:
+                self._add_range(column, value, value)
+
+    def _add_range(self, column: str, minimum, maximum):
+        if column not in self.min_values or minimum < self.min_values[column]:
+            self.min_values[column] = minimum
+        if column not in self.max_values or maximum > self.max_values[column]:
+            self.max_values[column] = maximum
+
+    def start_run(self, values: Sequence):
+        """
+        Start a new run of rows, sharing the given values for the columns that follow
+        the constants. The run values are only counted once a row is added to the run.
+        """
+        if self._run_columns is None:
+            start = len(self._constants)
+            self._run_columns = self.columns[start : start + len(values)]
+            tracked = (*FIRST_VALUE_COLUMNS, *UNIQUE_VALUE_COLUMNS, *RANGE_COLUMNS)
+            self._row_positions = {
+                column: position
+                for position, column in enumerate(self.columns[start + len(values) :])
+                if column in tracked
+            }
+        self._run_values = dict(zip(self._run_columns, values))
+        self._run_counted = False
+
+    def append(self, values: Sequence):
+        """
+        Add a row to the current run, with values for the remaining columns.
+        """
+        if self._run_columns is None:
+            self.start_run(())
+        if self._length == 0:
+            self._add_values(self._constants)
+        if not self._run_counted:
+            self._add_values(self._run_values)
+            self._run_counted = True
+        self._add_values(
+            {column: values[i] for column, i in self._row_positions.items()}
+        )
+        self._length += 1
+
+    def close(self):
+        pass
+
+    def update(self, df: pd.DataFrame):
+        """
+        Fold in a DataFrame holding some of the rows of the transformed data, such
+        as one chunk of a csv. Only the columns it has in common with the tracked
+        columns are used.
+        """
+        if df.empty:
+            return
+        for column in df.columns:
+            # categoricals (as read from parquet) are unordered so have no min or max
+            values = df[column].astype(object)
+            if column in FIRST_VALUE_COLUMNS:
+                self.first_values.setdefault(column, values.iloc[0])
+            values = values[values.notna() & (values != "")]
+            if values.empty:
+                continue
+            if column in UNIQUE_VALUE_COLUMNS:
+                unique_values = self.unique_values.setdefault(column, {})
+                for value in values.unique():
+                    unique_values.setdefault(value)
+            if column in RANGE_COLUMNS:
+                self._add_range(column, values.min(), values.max())
+        self._length += len(df)
@@ -1,7 +1,21 @@
+import csv
+import io
+import mmap
+import os
 import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
+import pandas as pd
 from unidecode import unidecode
 
+# Prefix for the reserved xml namespace, which documents do not have to declare
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+
 
 def pathify(label):
     """
@@ -49,3 +63,379 @@ def convert(tup, di):
     for k, v in tup.items():
         di.setdefault(k, []).append(v)
     return di
+
+
+def local_name(tag: str) -> str:
+    """
+    Returns the tag or attribute name of an ElementTree element without its
+    "{namespace}" qualifier, e.g. "{urn:example}Obs" becomes "Obs".
+    """
+    return tag[tag.rfind("}") + 1 :]
+
+
+def qualified_name(tag: str, namespaces: Dict[str, str]) -> str:
+    """
+    Converts an ElementTree "{namespace}name" tag or attribute name back to the
+    "prefix:name" form used in the source document (which is also the form used
+    by xmltodict). namespaces maps each namespace uri to its prefix.
+    """
+    if not tag.startswith("{"):
+        return tag
+    uri, name = tag[1:].split("}", 1)
+    prefix = namespaces.get(uri, "")
+    return f"{prefix}:{name}" if prefix else name
+
+
+def iterparse_elements(
+    xml_file: Path, namespaces: Dict[str, str]
+) -> Iterator[Tuple[str, ET.Element]]:
+    """
+    Incrementally parses xml_file, yielding ("start", element) and ("end", element)
+    events. Each namespace declared in the document is recorded in namespaces as
+    {uri: prefix} as it is encountered, so tags can be given their qualified names.
+
+    Elements are built up as the file is read, so callers should remove elements
+    they are finished with to keep memory use constant.
+    """
+    namespaces.setdefault(XML_NAMESPACE, "xml")
+    for event, item in ET.iterparse(xml_file, events=("start-ns", "start", "end")):
+        if event == "start-ns":
+            prefix, uri = item
+            namespaces.setdefault(uri, prefix)
+        else:
+            yield event, item
+
+
+def _count_start_tags_in_segment(
+    xml_file: Path, pattern: bytes, start: int, end: int
+) -> int:
+    # counts the matches of pattern that start in bytes [start, end) of xml_file,
+    # searching a little past end so a tag that straddles it is still found
+    with open(xml_file, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            endpos = min(end + len(pattern), len(mm))
+            return sum(
+                1
+                for match in re.compile(pattern).finditer(mm, start, endpos)
+                if match.start() < end
+            )
+
+
+def count_xml_start_tags(xml_file: Path, tag: str, max_workers: int = 1) -> int:
+    """
+    Counts the elements called tag (such as "na_:Obs") in xml_file by searching
+    a memory map of the raw bytes for "<tag" followed by whitespace, "/" or ">",
+    so the file is never decoded or split into lines and several elements on one
+    line are all counted. Tags inside comments or CDATA are counted too.
+
+    With max_workers above 1 the file is split into that many segments which are
+    searched in parallel by a pool of processes.
+    """
+    pattern = b"<" + re.escape(tag.encode()) + rb"[\s/>]"
+    size = os.path.getsize(xml_file)
+    if size == 0:
+        return 0
+    if max_workers == 1:
+        return _count_start_tags_in_segment(xml_file, pattern, 0, size)
+
+    boundaries = [size * i // max_workers for i in range(max_workers + 1)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return sum(
+            executor.map(
+                _count_start_tags_in_segment,
+                [xml_file] * max_workers,
+                [pattern] * max_workers,
+                boundaries[:-1],
+                boundaries[1:],
+            )
+        )
+
+
+class StartTagCounter:
+    """
+    Wraps a binary file object, counting the elements called tag (such as
+    "na_:Obs") in the raw bytes read through it in the same way as
+    count_xml_start_tags. This gives a streaming transform a count to check its
+    rows against once the file has been parsed, without a second read of a file
+    that may only be readable once.
+
+    Usage:
+        obs_counter = StartTagCounter(xml_file, "na_:Obs")
+        events = iterparse_elements(obs_counter, namespaces)
+        obs_counter.count
+    """
+
+    def __init__(self, fileobj, tag: str):
+        self.fileobj = fileobj
+        self.name = getattr(fileobj, "name", None)
+        self.count = 0
+        self._pattern = re.compile(b"<" + re.escape(tag.encode()) + rb"[\s/>]")
+        # every match is len(tag) + 2 bytes long, so keeping one byte less than that
+        # from the end of each read finds tags split across reads without counting
+        # any twice
+        self._overlap = len(tag) + 1
+        self._tail = b""
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.fileobj.read(size)
+        searched = self._tail + data
+        self.count += len(self._pattern.findall(searched))
+        self._tail = searched[-self._overlap :]
+        return data
+
+
+@contextmanager
+def open_binary(xml_file: Union[Path, BinaryIO]) -> Iterator[BinaryIO]:
+    """
+    Opens xml_file for reading if it is a path, or yields it as it is if it is
+    already a binary file object, which is left open.
+    """
+    if isinstance(xml_file, (str, Path)):
+        with open(xml_file, "rb") as f:
+            yield f
+    else:
+        yield xml_file
+
+
+def element_to_dict(element: ET.Element, namespaces: Dict[str, str]):
+    """
+    Converts an ElementTree element into the nested dictionary that xmltodict.parse
+    would have produced for it, i.e. attributes as "@name" keys, repeated child
+    elements as lists and any text as "#text" (or the text itself where the element
+    has no attributes or children).
+    """
+    result = {
+        "@" + qualified_name(key, namespaces): value
+        for key, value in element.attrib.items()
+    }
+    for child in element:
+        key = qualified_name(child.tag, namespaces)
+        set_key(result, key, element_to_dict(child, namespaces))
+
+    text = "".join([element.text or ""] + [child.tail or "" for child in element])
+    text = text.strip() or None
+    if not result:
+        return text
+    if text is not None:
+        result["#text"] = text
+    return result
+
+
+class ColumnBuffer:
+    """
+    Accumulates streamed rows column by column, so a table can be built without
+    creating a dict per row.
+
+    Constant columns hold a single value shared by every row, such as the header
+    fields of an sdmx file. They are stored once and only broadcast to the length of
+    the table when it is materialised. Run columns hold values that repeat across a
+    run of consecutive rows, such as series attributes which are the same for every
+    observation in a series. They are stored once per run alongside the run length.
+    Row columns hold a value per row in pre-sized numpy buffers (of object dtype
+    unless given in dtypes), which double in size when full.
+
+    Usage:
+        buffer = ColumnBuffer(["FREQ"], ["TIME_PERIOD", "OBS_VALUE"], {"ID": "T1500"})
+        buffer.start_run(["A"])
+        buffer.append(["1997", "18415"])
+        df = buffer.to_dataframe()
+    """
+
+    def __init__(
+        self,
+        run_columns: Sequence[str],
+        row_columns: Sequence[str],
+        constants: Optional[Dict[str, str]] = None,
+        capacity: int = 1024,
+        dtypes: Optional[Dict[str, str]] = None,
+    ):
+        self.constants = dict(constants or {})
+        self.run_columns = list(run_columns)
+        self.row_columns = list(row_columns)
+        dtypes = dtypes or {}
+        self._capacity = max(capacity, 1)
+        self._buffers = [
+            np.empty(self._capacity, dtype=dtypes.get(column, object))
+            for column in self.row_columns
+        ]
+        self._runs: List[tuple] = []
+        self._run_lengths: List[int] = []
+        self._length = 0
+        if not self.run_columns:
+            self.start_run(())
+
+    def __len__(self) -> int:
+        return self._length
+
+    def start_run(self, values: Sequence):
+        """
+        Start a new run of rows, sharing the given values for the run columns.
+        """
+        assert len(values) == len(
+            self.run_columns
+        ), f"expected {len(self.run_columns)} run values but got {len(values)}"
+        self._runs.append(tuple(values))
+        self._run_lengths.append(0)
+
+    def append(self, values: Sequence):
+        """
+        Append a row to the current run, with values given in row_columns order.
+        Raises a ValueError if there is not one value per row column.
+        """
+        if len(values) != len(self.row_columns):
+            raise ValueError(
+                f"expected {len(self.row_columns)} row values but got {len(values)}"
+            )
+        if self._length == self._capacity:
+            self._grow()
+        for buffer, value in zip(self._buffers, values):
+            buffer[self._length] = value
+        self._run_lengths[-1] += 1
+        self._length += 1
+
+    def _grow(self):
+        self._capacity *= 2
+        self._buffers = [
+            np.concatenate([buffer, np.empty_like(buffer)]) for buffer in self._buffers
+        ]
+
+    def _run_column_codes(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Returns the run values as a 2d array (one row per run) and, for every
+        # buffered row, the index of the run it belongs to.
+        runs = np.empty((len(self._runs), len(self.run_columns)), dtype=object)
+        for i, run in enumerate(self._runs):
+            runs[i] = run
+        run_index = np.repeat(np.arange(len(self._runs)), self._run_lengths)
+        return runs, run_index
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """
+        Materialise the buffered rows as a {column name: array-like} dict, with
+        constant columns first, then run columns, then row columns. Constant columns
+        are categoricals with a single category, so each costs one byte per row
+        rather than a reference to a copied value. Run values are broadcast to their
+        rows with np.repeat and row columns are views of the buffers, so nothing is
+        copied row by row.
+        """
+        columns = {
+            column: _constant_categorical(value, self._length)
+            for column, value in self.constants.items()
+        }
+        runs, _ = self._run_column_codes()
+        for i, column in enumerate(self.run_columns):
+            columns[column] = np.repeat(runs[:, i], self._run_lengths)
+        for column, buffer in zip(self.row_columns, self._buffers):
+            columns[column] = buffer[: self._length]
+        return columns
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Materialise the buffered rows as a pandas DataFrame.
+        """
+        return pd.DataFrame(self.to_columns(), copy=False)
+
+    def to_arrow(self):
+        """
+        Materialise the buffered rows as a pyarrow Table, with constant and run
+        columns dictionary encoded. Requires pyarrow to be installed.
+        """
+        import pyarrow as pa
+
+        arrays = {}
+        for column, value in self.constants.items():
+            indices = np.zeros(self._length, dtype=np.int8)
+            arrays[column] = pa.DictionaryArray.from_arrays(
+                pa.array(indices, mask=np.full(self._length, value is None)),
+                pa.array([] if value is None else [value], type=pa.string()),
+            )
+        runs, run_index = self._run_column_codes()
+        for i, column in enumerate(self.run_columns):
+            codes, uniques = pd.factorize(runs[:, i])
+            indices = codes[run_index]
+            arrays[column] = pa.DictionaryArray.from_arrays(
+                pa.array(indices, mask=indices < 0), pa.array(uniques)
+            )
+        for column, buffer in zip(self.row_columns, self._buffers):
+            arrays[column] = pa.array(buffer[: self._length])
+        return pa.table(arrays)
+
+
+def _constant_categorical(value, length: int) -> pd.Categorical:
+    # A column of length rows which all hold value, stored as a single category
+    # and an int8 code per row
+    if value is None:
+        return pd.Categorical.from_codes(np.full(length, -1, dtype=np.int8), [])
+    return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), [value])
+
+
+def csv_prefix(values: Sequence) -> str:
+    """
+    Formats values as the leading fields of a csv row, ending with a delimiter.
+    Values shared by many rows can be encoded once and written ahead of the
+    rest of each row, rather than being re-encoded for every row.
+    """
+    if not values:
+        return ""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow([*values, None])
+    return buffer.getvalue()
+
+
+# Number of rows read into memory at a time when a transformed file is read in chunks
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def read_column_names(path: Path) -> List[str]:
+    """
+    Returns the column names of a transformed csv or parquet file without reading
+    any of its rows.
+    """
+    if Path(path).suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(path).names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def read_table(path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Reads a transformed csv or parquet file into a DataFrame. If columns is given
+    only those columns are read, which for parquet means the other columns are
+    never loaded from disk at all. csv values are read as the text that was written,
+    the same as the string columns of the parquet file.
+    """
+    columns = None if columns is None else list(columns)
+    if Path(path).suffix == ".parquet":
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns, dtype=str, keep_default_na=False)
+
+
+def iter_table_chunks(
+    path: Path,
+    columns: Optional[Sequence[str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    keep_default_na: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Reads a transformed csv or parquet file as DataFrames of up to chunk_size rows,
+    in one pass, so memory use is bounded by the chunk size and by the number of
+    columns read rather than by the size of the file. Values are read in the same
+    way as by read_table, unless keep_default_na is True in which case values of a
+    csv that pandas reads as missing by default (such as "" and "NaN") are read as
+    NaN.
+    """
+    columns = None if columns is None else list(columns)
+    if Path(path).suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(
+        path,
+        usecols=columns,
+        dtype=str,
+        keep_default_na=keep_default_na,
+        chunksize=chunk_size,
+    )
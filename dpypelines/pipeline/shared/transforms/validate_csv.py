@@ -1,13 +1,22 @@
 # this is a "functions that validate dataframes" toolbox
-# will be pieced together in another ticket (delete this text when it gets picked up)
-# more functions can be added as needed
+# the checks are pieced together in validate_csv() by CsvValidator
+# more functions can be added as needed, as rules for CsvValidator
 
 
+import tempfile
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from dpypelines.pipeline.shared.transforms.utils import (
+    iter_table_chunks,
+    read_column_names,
+)
+
 
 def _read_in_csv_check(csv_path: Path):
     """
@@ -25,19 +34,109 @@ def _correct_columns_exist(csv_path: Path, columns: List[str]):
     """
     given a list of columns, make sure those columns are in the dataframe
     """
-    df = pd.read_csv(csv_path, nrows=0)  # reading in columns only
+    # reading in columns only, csv_path can also be a parquet file
+    csv_columns = read_column_names(csv_path)
 
-    assert len(df.columns) == len(
+    assert len(csv_columns) == len(
         columns
-    ), f"Number of columns in csv file ({len(df.columns)}) does not match len of expected columns ({len(columns)})"
+    ), f"Number of columns in csv file ({len(csv_columns)}) does not match len of expected columns ({len(columns)})"
 
     for col in columns:
-        assert col in df.columns, f"Expect column {col} not found in csv file"
+        assert col in csv_columns, f"Expect column {col} not found in csv file"
 
     # number of columns are the same and all expected columns are in df so no
     # need to check the other way around
 
 
+def _blank_entries(values: pd.Series) -> pd.Series:
+    """
+    given a column return a boolean mask of its blank entries, '' & whitespace
+    strings & pd.isnull values count as blanks (bools are never blank)
+
+    the check uses pandas string methods on the whole column, for categoricals (as
+    read from parquet) only the categories are checked
+    """
+    blanks = values.isna()
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+        if categories.dtype == object or pd.api.types.is_string_dtype(categories):
+            blank_categories = (
+                pd.Series(categories, dtype=object).str.strip().eq("").to_numpy()
+            )
+            codes = values.cat.codes.to_numpy()
+            blanks |= (codes >= 0) & blank_categories[np.maximum(codes, 0)]
+    elif values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+        try:
+            stripped = values.str.strip()
+        except AttributeError:
+            # the .str accessor refuses columns with no str values (such as a
+            # column of bools), which have no blank strings to find
+            return blanks
+        # entries that are not str are NaN once stripped so never equal ""
+        blanks |= stripped.eq("").fillna(False).astype(bool)
+    return blanks
+
+
+def _blank_value_report(
+    df: pd.DataFrame, check_specific_columns: Optional[List] = None
+) -> Dict[str, dict]:
+    """
+    given a df return, for each column checked, the number of blank entries and the
+    index of the first row with a blank entry (None if there are none)
+    if check_specific_columns is given then only those columns are checked
+    """
+    columns_to_check = (
+        list(df.columns) if check_specific_columns is None else check_specific_columns
+    )
+    report = {}
+    for col in columns_to_check:
+        blanks = _blank_entries(df[col])
+        blank_count = int(blanks.sum())
+        report[col] = {
+            "blank_count": blank_count,
+            "first_blank_row": blanks.idxmax() if blank_count else None,
+        }
+    return report
+
+
+class BlankValueCounter:
+    """
+    folds the blank value reports of each slice of a csv into one report for the
+    whole file, so blanks can be checked in the same pass as other slice checks
+
+    usage:
+        counter = BlankValueCounter()
+        for df_slice in generated_dataframe_slices(csv_path):
+            counter.add(df_slice)
+        counter.report  # {column: {"blank_count": ..., "first_blank_row": ...}}
+    """
+
+    def __init__(self, check_specific_columns: Optional[List] = None):
+        self.check_specific_columns = check_specific_columns
+        self.report: Dict[str, dict] = {}
+
+    def add(self, df: pd.DataFrame):
+        self.add_report(_blank_value_report(df, self.check_specific_columns))
+
+    def add_report(self, slice_report: Dict[str, dict]):
+        """
+        fold in the _blank_value_report of the next slice, which may have been
+        worked out in another process
+        """
+        for col, slice_report in slice_report.items():
+            col_report = self.report.setdefault(
+                col, {"blank_count": 0, "first_blank_row": None}
+            )
+            col_report["blank_count"] += slice_report["blank_count"]
+            if col_report["first_blank_row"] is None:
+                col_report["first_blank_row"] = slice_report["first_blank_row"]
+
+    def columns_with_blanks(self) -> List[str]:
+        return [
+            col for col, col_report in self.report.items() if col_report["blank_count"]
+        ]
+
+
 def _dataframe_has_no_blanks(
     df: pd.DataFrame, check_specific_columns: Optional[List] = None
 ):
@@ -45,10 +144,7 @@ def _dataframe_has_no_blanks(
     given a df confirm that there are no blank entries in any column
     if check_specific_columns is given as a kwarg then only check the given columns
     """
-    columns_to_check = []
-    if check_specific_columns is None:
-        columns_to_check = list(df.columns)
-    else:
+    if check_specific_columns is not None:
         assert isinstance(
             check_specific_columns, list
         ), "check_specific_columns kwarg must be a list"
@@ -59,20 +155,10 @@ def _dataframe_has_no_blanks(
                 col in df.columns
             ), f"{col} in check_specific_columns not found in dataframe"
 
-        columns_to_check = check_specific_columns
-
-    for col in columns_to_check:
-        # will treat '' & pd.isnull as blanks
-        for value in df[col].unique():
-            if isinstance(value, bool):
-                # bool can only be True of False so not empty
-                continue
-            elif isinstance(value, str):
-                if not value.strip():  # catches whitespace strings
-                    raise ValueError(f"{col} has blank entries")
-            else:
-                if pd.isnull(value):
-                    raise ValueError(f"{col} has blank entries")
+    # will treat '' & pd.isnull as blanks
+    for col, col_report in _blank_value_report(df, check_specific_columns).items():
+        if col_report["blank_count"]:
+            raise ValueError(f"{col} has blank entries")
 
 
 def _dataframe_has_no_duplicates(df: pd.DataFrame):
@@ -84,52 +170,585 @@ def _dataframe_has_no_duplicates(df: pd.DataFrame):
     ), "Found duplicate rows in the dataframe, failed validation"
 
 
+class DuplicateRowDetector:
+    """
+    finds duplicate rows across all the slices of a csv, not just within one slice
+
+    each row is reduced to a 64 bit hash (vectorised with pd.util.hash_pandas_object)
+    and the hashes seen so far are kept as sorted numpy arrays alongside the row
+    number each was first seen at, 16 bytes a row, so looking up a slice is a
+    searchsorted rather than a python set lookup per row
+
+    once more than max_rows_in_memory hashes are held they are spilled to memory
+    mapped files in a temporary directory, so a 100M row csv can be checked in
+    bounded memory
+
+    rows are compared by hash so there is a very small chance (around 1 in 3000 for
+    100M rows) of a false positive, the row numbers reported can be used to
+    compare the rows themselves
+
+    usage:
+        with DuplicateRowDetector() as detector:
+            for df_slice in generated_dataframe_slices(csv_path):
+                detector.add(df_slice)
+        detector.duplicates  # [(row number, row number it duplicates), ...]
+    """
+
+    def __init__(self, max_rows_in_memory: int = 10_000_000, max_reported: int = 10):
+        self.max_rows_in_memory = max_rows_in_memory
+        self.max_reported = max_reported
+        self.duplicate_count = 0
+        self.duplicates: List[Tuple[int, int]] = []
+        # each run is (sorted hashes, row numbers), merged while small and spilled
+        # to disk once there are too many in memory
+        self._runs: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._spilled_runs: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._spill_dir: Optional[tempfile.TemporaryDirectory] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _report(self, rows: np.ndarray, first_rows: np.ndarray):
+        self.duplicate_count += len(rows)
+        for row, first_row in zip(rows, first_rows):
+            if len(self.duplicates) >= self.max_reported:
+                break
+            self.duplicates.append((int(row), int(first_row)))
+
+    def add(self, df: pd.DataFrame):
+        """
+        add a slice of the csv, rows are numbered by the slice's index
+        """
+        self.add_hashes(*self.hash_rows(df))
+
+    @staticmethod
+    def hash_rows(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        the row hashes of a slice sorted by hash, with the row number of each, this is
+        the expensive part of add() and can be worked out in another process
+        """
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        rows = df.index.to_numpy(dtype=np.int64)
+        order = np.argsort(hashes, kind="stable")
+        return hashes[order], rows[order]
+
+    def add_hashes(self, hashes: np.ndarray, rows: np.ndarray):
+        """
+        add the sorted hashes of a slice from hash_rows(), slices must be added in
+        row order
+        """
+        if len(hashes) == 0:
+            return
+
+        # the first row in the slice with each hash, and the row it first appeared
+        # at, which is in an earlier slice if the hash has been seen before
+        is_first = np.ones(len(hashes), dtype=bool)
+        is_first[1:] = hashes[1:] != hashes[:-1]
+        unique_hashes, unique_rows = hashes[is_first], rows[is_first]
+        first_rows = unique_rows.copy()
+        is_new = np.ones(len(unique_hashes), dtype=bool)
+        for seen_hashes, seen_rows in self._spilled_runs + self._runs:
+            positions = np.searchsorted(seen_hashes, unique_hashes)
+            found = positions < len(seen_hashes)
+            found[found] = seen_hashes[positions[found]] == unique_hashes[found]
+            first_rows[found] = seen_rows[positions[found]]
+            is_new &= ~found
+
+        # every row whose hash appeared at an earlier row is a duplicate of it,
+        # reported in row order
+        group = np.cumsum(is_first) - 1
+        first_rows = first_rows[group]
+        is_duplicate = rows != first_rows
+        duplicate_order = np.argsort(rows[is_duplicate], kind="stable")
+        self._report(
+            rows[is_duplicate][duplicate_order],
+            first_rows[is_duplicate][duplicate_order],
+        )
+        hashes, rows = unique_hashes[is_new], unique_rows[is_new]
+
+        self._add_run(hashes, rows)
+
+    def _add_run(self, hashes: np.ndarray, rows: np.ndarray):
+        # merge with the last run while it is no bigger, so there are only ever
+        # around log2(rows) runs in memory to search
+        while self._runs and len(self._runs[-1][0]) <= len(hashes):
+            last_hashes, last_rows = self._runs.pop()
+            hashes = np.concatenate([last_hashes, hashes])
+            rows = np.concatenate([last_rows, rows])
+            order = np.argsort(hashes, kind="stable")
+            hashes, rows = hashes[order], rows[order]
+        self._runs.append((hashes, rows))
+
+        if (
+            sum(len(run_hashes) for run_hashes, _ in self._runs)
+            > self.max_rows_in_memory
+        ):
+            self._spill()
+
+    def _spill(self):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.TemporaryDirectory()
+        for hashes, rows in self._runs:
+            spilled_run = []
+            for array in (hashes, rows):
+                path = (
+                    Path(self._spill_dir.name)
+                    / f"{len(self._spilled_runs)}_{len(spilled_run)}.npy"
+                )
+                np.save(path, array)
+                spilled_run.append(np.load(path, mmap_mode="r"))
+            self._spilled_runs.append(tuple(spilled_run))
+        self._runs = []
+
+    def close(self):
+        """
+        remove any hashes spilled to disk
+        """
+        self._runs = []
+        self._spilled_runs = []
+        if self._spill_dir is not None:
+            self._spill_dir.cleanup()
+            self._spill_dir = None
+
+
+def _csv_has_no_duplicates(csv_path: Path, chunk_size: Optional[int] = 5000):
+    """
+    given a csv confirm that there are no duplicate rows anywhere in it, reading it
+    in one pass a slice at a time
+
+    values are read as text so the same row always hashes the same whatever
+    types pandas would infer for the slice it is in, with missing values read as
+    NaN in the same way as by CsvValidator
+    """
+    with DuplicateRowDetector() as detector:
+        first_row = 0
+        for df_slice in iter_table_chunks(
+            csv_path, chunk_size=chunk_size, keep_default_na=True
+        ):
+            df_slice.index = pd.RangeIndex(first_row, first_row + len(df_slice))
+            detector.add(df_slice)
+            first_row += len(df_slice)
+
+    if detector.duplicate_count:
+        row, first_row = detector.duplicates[0]
+        raise AssertionError(
+            f"Found {detector.duplicate_count} duplicate rows in the csv, failed validation. "
+            f"First duplicate is row {row}, a duplicate of row {first_row}"
+        )
+
+
 def generated_dataframe_slices(csv_path: Path, chunk_size: Optional[int] = 5000):
     """
     is a generator function - can iterate through slices of the dataframe
     this way only one slice at a time will be in the memory
     chunk_size is an optional kwarg which will determine the size of each slice
+
+    the csv is read once from start to finish, each slice carries on the row index
+    of the slice before it so row numbers refer to the position in the whole file
     """
+    yield from pd.read_csv(csv_path, chunksize=chunk_size)
 
-    # count the number of rows in csv
-    with open(csv_path) as f:
-        # -1 because header should not be counted as a row of data
-        len_of_data = sum(1 for line in f) - 1
 
-    # get datafram column names
-    df_headers = list(pd.read_csv(csv_path, nrows=0).columns)
+class CsvChunkIndex:
+    """
+    byte offsets of the start of every chunk_size rows of a csv, found with one
+    pass over the raw bytes without parsing any values
 
-    # creating the row numbers for the start of each slice
-    row_number = (
-        1  # when passing 'names' kwarg pandas treats the columns as first row of data
-    )
-    iterable_row_numbers = []
-    while row_number <= len_of_data:
-        iterable_row_numbers.append(row_number)
-        row_number += chunk_size
-
-    # creating the generator
-    for skip_row_number in iterable_row_numbers:
-        df_slice = pd.read_csv(
-            csv_path, nrows=chunk_size, skiprows=skip_row_number, names=df_headers
-        )
-        yield df_slice
+    any chunk can then be read on its own with read_chunk() by seeking straight to
+    its offset, so chunks can be fetched at random or read in parallel by separate
+    processes (the index is small and can be pickled)
+
+    usage:
+        index = CsvChunkIndex(csv_path, chunk_size=5000)
+        for i in range(len(index)):
+            df_slice = index.read_chunk(i)
+    """
+
+    def __init__(self, csv_path: Path, chunk_size: int = 5000):
+        assert chunk_size > 0, "chunk_size must be greater than 0"
+        self.csv_path = csv_path
+        self.chunk_size = chunk_size
+        self.columns = read_column_names(csv_path)
+        self.offsets: List[int] = []
+        self.len_of_data = 0
+
+        with open(csv_path, "rb") as f:
+            f.readline()  # header row
+            offset = f.tell()
+            in_quotes = False
+            for line in f:
+                # a newline inside a quoted value does not end the row, quotes are
+                # escaped by doubling them so an odd count toggles in_quotes, blank
+                # lines are skipped as they are by pandas
+                if not in_quotes and line.strip(b"\r\n"):
+                    if self.len_of_data % chunk_size == 0:
+                        self.offsets.append(offset)
+                    self.len_of_data += 1
+                if line.count(b'"') % 2 == 1:
+                    in_quotes = not in_quotes
+                offset += len(line)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def read_chunk(self, i: int, dtype=None) -> pd.DataFrame:
+        """
+        read the i-th chunk of the csv, indexed by row number in the whole file
+        dtype is passed on to pd.read_csv
+        """
+        first_row = i * self.chunk_size
+        nrows = min(self.chunk_size, self.len_of_data - first_row)
+        with open(self.csv_path, "rb") as f:
+            f.seek(self.offsets[i])
+            df_slice = pd.read_csv(
+                f, header=None, names=self.columns, nrows=nrows, dtype=dtype
+            )
+        df_slice.index = pd.RangeIndex(first_row, first_row + len(df_slice))
+        return df_slice
+
+
+class BaseCsvRule(ABC):
+    """
+    a check run by CsvValidator, each rule sees the column names then every slice
+    of the csv in turn (from the one read of the file) and finally reports a
+    result, so adding a rule never adds another pass over the file
+    """
+
+    name = "rule"
+
+    def start(self, columns: List[str]):
+        """
+        called once with the column names of the csv before any slices
+        """
+
+    def check_slice(self, df_slice: pd.DataFrame):
+        """
+        called with each slice of the csv in order, rows indexed by row number
+        """
+        self.merge_partial(self.check_slice_partial(df_slice))
+
+    @abstractmethod
+    def check_slice_partial(self, df_slice: pd.DataFrame):
+        """
+        check one slice on its own and return the (picklable) partial result, this
+        may run in another process on a copy of the rule taken after start()
+        so must not depend on earlier slices
+        """
+
+    @abstractmethod
+    def merge_partial(self, partial):
+        """
+        fold the partial result of the next slice into the rule, called in the
+        main process with the slices in row order
+        """
+
+    @abstractmethod
+    def result(self) -> dict:
+        """
+        called once after the last slice, returns a dict with at least "passed"
+        (bool) and "message" (str, or None if passed)
+        """
+
+
+class CorrectColumnsRule(BaseCsvRule):
+    """
+    the csv has exactly the expected columns (same checks as _correct_columns_exist)
+    """
+
+    name = "correct_columns"
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self.message: Optional[str] = None
+
+    def start(self, columns: List[str]):
+        if len(columns) != len(self.columns):
+            self.message = f"Number of columns in csv file ({len(columns)}) does not match len of expected columns ({len(self.columns)})"
+            return
+        for col in self.columns:
+            if col not in columns:
+                self.message = f"Expect column {col} not found in csv file"
+                return
+
+    def check_slice_partial(self, df_slice: pd.DataFrame):
+        return None
+
+    def merge_partial(self, partial):
+        pass
 
+    def result(self) -> dict:
+        return {"passed": self.message is None, "message": self.message}
 
-def validate_csv(csv_path: Path, columns: List[str]):
+
+class NoBlanksRule(BaseCsvRule):
     """
-    Validate a csv
+    no blank entries in any column, or just in check_specific_columns if given
     """
 
-    # this function could look something like the below
+    name = "no_blanks"
+
+    def __init__(self, check_specific_columns: Optional[List] = None):
+        self.check_specific_columns = check_specific_columns
+        self.counter: Optional[BlankValueCounter] = None
+        self.message: Optional[str] = None
+
+    def start(self, columns: List[str]):
+        if self.check_specific_columns is not None:
+            missing = [col for col in self.check_specific_columns if col not in columns]
+            if missing:
+                self.message = (
+                    f"{missing[0]} in check_specific_columns not found in csv"
+                )
+                return
+        self.counter = BlankValueCounter(self.check_specific_columns)
+
+    def check_slice_partial(self, df_slice: pd.DataFrame):
+        if self.counter is None:
+            return None
+        return _blank_value_report(df_slice, self.check_specific_columns)
+
+    def merge_partial(self, partial):
+        if partial is not None:
+            self.counter.add_report(partial)
 
-    # check that csv_path can be read in
-    # _read_in_csv_check(csv_path)
+    def result(self) -> dict:
+        if self.counter is None:
+            # a check_specific_columns column is missing, or the csv was not read in
+            return {
+                "passed": False,
+                "message": self.message or "csv was not checked for blanks",
+                "columns": {},
+            }
+        columns_with_blanks = self.counter.columns_with_blanks()
+        return {
+            "passed": not columns_with_blanks,
+            "message": (
+                f"{', '.join(columns_with_blanks)} has blank entries"
+                if columns_with_blanks
+                else None
+            ),
+            "columns": self.counter.report,
+        }
+
+
+class NoDuplicatesRule(BaseCsvRule):
+    """
+    no duplicate rows anywhere in the csv
+    """
 
-    # check correct columns in data
-    # _dataframe_correct_columns_exist(csv_path, columns)
+    name = "no_duplicates"
 
-    # validate of the dataframe as slices
-    # for df_slice in generated_dataframe_slices(csv_path)
-    #   _dataframe_has_no_duplicates(df_slice)
-    #   _dataframe_column_has_no_blanks(df_slice)
+    def __init__(self, max_rows_in_memory: int = 10_000_000):
+        self.max_rows_in_memory = max_rows_in_memory
+        self.detector: Optional[DuplicateRowDetector] = None
+
+    def start(self, columns: List[str]):
+        # a new detector for each run, so no hashes are kept from a csv checked
+        # earlier by the same rule
+        if self.detector is not None:
+            self.detector.close()
+        self.detector = DuplicateRowDetector(max_rows_in_memory=self.max_rows_in_memory)
+
+    def check_slice_partial(self, df_slice: pd.DataFrame):
+        # hashing is row-local so is done per slice, finding the duplicates needs
+        # every hash so is done as the hashes are merged
+        return DuplicateRowDetector.hash_rows(df_slice)
+
+    def merge_partial(self, partial):
+        self.detector.add_hashes(*partial)
+
+    def result(self) -> dict:
+        if self.detector is None:
+            # the csv was not read in
+            return {
+                "passed": False,
+                "message": "csv was not checked for duplicates",
+                "duplicate_count": 0,
+                "duplicates": [],
+            }
+        self.detector.close()
+        duplicate_count = self.detector.duplicate_count
+        message = None
+        if duplicate_count:
+            row, first_row = self.detector.duplicates[0]
+            message = f"Found {duplicate_count} duplicate rows in the csv, first duplicate is row {row}, a duplicate of row {first_row}"
+        return {
+            "passed": duplicate_count == 0,
+            "message": message,
+            "duplicate_count": duplicate_count,
+            "duplicates": self.detector.duplicates,
+        }
+
+
+class _CsvReadError(Exception):
+    """
+    the csv could not be read in, raised from CsvValidator's reads so they are told
+    apart from an error in one of its rules
+    """
+
+
+# the rules and chunk index of a CsvValidator worker process, set once per process
+# by _start_worker so they are not pickled again for every chunk
+_worker_state: dict = {}
+
+
+def _start_worker(index: CsvChunkIndex, rules: List[BaseCsvRule]):
+    _worker_state["index"] = index
+    _worker_state["rules"] = rules
+
+
+def _check_chunk_partial(i: int) -> list:
+    # reads chunk i of the csv in a worker process and returns the partial result
+    # of every rule for it
+    try:
+        df_slice = _worker_state["index"].read_chunk(i, dtype=str)
+    except Exception as err:
+        raise _CsvReadError(str(err)) from err
+    return [rule.check_slice_partial(df_slice) for rule in _worker_state["rules"]]
+
+
+class CsvValidator:
+    """
+    runs a set of rules over a csv (or parquet file) from a single streaming read,
+    each slice is read once and passed to every rule, and the results of all the
+    rules are gathered into one report
+
+    with max_workers above 1 the csv is split into chunks at row boundaries by
+    byte offset (see CsvChunkIndex) and each chunk is read and checked by a pool
+    of processes, the partial results of each chunk are merged into the rules in
+    the main process in row order so rules that need the whole file (such as
+    duplicates) still see every row
+
+    usage:
+        validator = CsvValidator([CorrectColumnsRule(columns), NoBlanksRule()])
+        validator.add_rule(NoDuplicatesRule())
+        report = validator.run(csv_path)
+    """
+
+    def __init__(
+        self,
+        rules: Optional[List[BaseCsvRule]] = None,
+        chunk_size: int = 5000,
+        max_workers: int = 1,
+    ):
+        assert max_workers > 0, "max_workers must be greater than 0"
+        self.rules: List[BaseCsvRule] = list(rules or [])
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+
+    def add_rule(self, rule: BaseCsvRule):
+        names = [existing.name for existing in self.rules]
+        assert (
+            rule.name not in names
+        ), f"a rule named {rule.name} has already been added"
+        self.rules.append(rule)
+
+    def _read_columns(
+        self, csv_path: Path
+    ) -> Tuple[List[str], Optional[CsvChunkIndex]]:
+        # the column names, and the chunk index if chunks are checked in parallel
+        try:
+            columns = read_column_names(csv_path)
+            index = None
+            if self.max_workers > 1 and Path(csv_path).suffix != ".parquet":
+                index = CsvChunkIndex(csv_path, chunk_size=self.chunk_size)
+        except Exception as err:
+            raise _CsvReadError(str(err)) from err
+        return columns, index
+
+    def _read_slices(self, csv_path: Path) -> Iterator[pd.DataFrame]:
+        # values are read as text, so a row hashes the same whatever slice it is
+        # in, with missing values (such as "NaN") read as NaN as pd.read_csv does
+        try:
+            yield from iter_table_chunks(
+                csv_path, chunk_size=self.chunk_size, keep_default_na=True
+            )
+        except Exception as err:
+            raise _CsvReadError(str(err)) from err
+
+    def _check_slices(self, csv_path: Path) -> int:
+        first_row = 0
+        for df_slice in self._read_slices(csv_path):
+            df_slice.index = pd.RangeIndex(first_row, first_row + len(df_slice))
+            for rule in self.rules:
+                rule.check_slice(df_slice)
+            first_row += len(df_slice)
+        return first_row
+
+    def _check_chunks_in_parallel(self, index: CsvChunkIndex) -> int:
+        with ProcessPoolExecutor(
+            max_workers=min(self.max_workers, len(index)),
+            initializer=_start_worker,
+            initargs=(index, self.rules),
+        ) as executor:
+            for partials in executor.map(_check_chunk_partial, range(len(index))):
+                for rule, partial in zip(self.rules, partials):
+                    rule.merge_partial(partial)
+        return index.len_of_data
+
+    def run(self, csv_path: Path) -> dict:
+        """
+        returns a report of the form:
+            {
+                "csv_path": ...,
+                "readable": bool,  # False if the file could not be read in
+                "message": None or the reason it could not be read,
+                "number_of_rows": int,
+                "passed": bool,  # True if readable and every rule passed
+                "rules": {rule name: rule result, ...},
+            }
+        """
+        report = {
+            "csv_path": str(csv_path),
+            "readable": True,
+            "message": None,
+            "number_of_rows": 0,
+        }
+        # only errors reading the csv are reported, an error in a rule is raised
+        try:
+            columns, index = self._read_columns(csv_path)
+            for rule in self.rules:
+                rule.start(columns)
+
+            if index is not None and len(index) > 1:
+                report["number_of_rows"] = self._check_chunks_in_parallel(index)
+            else:
+                report["number_of_rows"] = self._check_slices(csv_path)
+        except _CsvReadError as err:
+            report["readable"] = False
+            report["message"] = f"Failed to read in csv - {csv_path}: {err}"
+
+        report["rules"] = {rule.name: rule.result() for rule in self.rules}
+        report["passed"] = report["readable"] and all(
+            result["passed"] for result in report["rules"].values()
+        )
+        return report
+
+
+def validate_csv(
+    csv_path: Path,
+    columns: List[str],
+    chunk_size: int = 5000,
+    max_workers: int = 1,
+) -> dict:
+    """
+    Validate a csv in one pass, checking that it can be read in, that it has the
+    given columns and that it has no blank entries or duplicate rows
+
+    with max_workers above 1 chunks of the csv are checked in parallel by that many
+    processes, which first needs a separate pass over the file to find where each
+    chunk starts (see CsvChunkIndex), so is only worth it for very large files
+
+    returns the report from CsvValidator.run
+    """
+    assert Path(csv_path).name.endswith(".csv"), "Invalid csv_path"
+
+    validator = CsvValidator(
+        [CorrectColumnsRule(columns), NoBlanksRule(), NoDuplicatesRule()],
+        chunk_size=chunk_size,
+        max_workers=max_workers,
+    )
+    return validator.run(csv_path)
@@ -4,16 +4,20 @@ ie - version 2_0 of compact sdmx data
 file may need renaming when further transforms for different sdmx's are created
 """
 
+import xml.etree.ElementTree as ET
 from pathlib import Path
 
 import pandas as pd
 
+from dpypelines.pipeline.shared.transforms.sniff import XmlSniff, sniff_xml
+from dpypelines.pipeline.shared.transforms.utils import count_xml_start_tags
 
-def get_number_of_obs_from_xml_file(xml_file: Path):
+
+def get_number_of_obs_from_xml_file(xml_file: Path, max_workers: int = 1):
     # counts number of obs from .xml file
-    # uses 'na_:Obs' as an identifier that a line has an observation
-    with open(xml_file) as f:
-        number_of_obs = sum(1 for line in f if "na_:Obs" in line)
+    # counts the 'na_:Obs' elements in the raw bytes of the file, in parallel over
+    # max_workers segments of the file if max_workers is above 1
+    number_of_obs = count_xml_start_tags(xml_file, "na_:Obs", max_workers=max_workers)
     assert (
         number_of_obs != 0
     ), "could not count any observations, likely due to incorrect xml format"
@@ -63,11 +67,16 @@ def check_xml_type(data_As_dict: dict):
     ), "could not find 'CompactData' in xml data; file is not smx v2.0"
 
 
-def check_read_in_sdmx(xml_file: Path):
+def check_read_in_sdmx(xml_file: Path) -> XmlSniff:
     # check sdmx can be read in
-    with open(xml_file, "r") as f:
-        xml_content = f.read()
-    assert xml_content.startswith("<?xml"), "file does not appear to be xml"
+    # only the start of the file is read, up to the root element, the rest of the file is left
+    # to the parser, the (cached) sniff result is returned so it can be reused
+    try:
+        sniff = sniff_xml(xml_file)
+    except (ET.ParseError, ValueError) as err:
+        raise AssertionError("file does not appear to be xml") from err
+    assert sniff.has_declaration, "file does not appear to be xml"
+    return sniff
 
 
 def check_tidy_data_columns(df_columns: pd.Index):
@@ -113,3 +122,27 @@ def check_columns_of_dataframes_are_unique(
         assert (
             column not in header_columns
         ), f"{column} is duplicated in obs_frame and header_frame"
+
+
+def check_attributes_are_expected(attributes: dict, expected_keys: list, name: str):
+    # checks that a Series or Obs has exactly the attributes of the first one read
+    # when streaming this stands in for check_length_of_dict_is_expected_length, as
+    # a missing or extra attribute would otherwise misalign the csv columns
+    assert len(attributes) == len(expected_keys) and all(
+        key in attributes for key in expected_keys
+    ), f"{name} attributes {list(attributes)} do not match expected {expected_keys}"
+
+
+def check_number_of_obs_is_not_zero(number_of_obs: int):
+    # checks that the streaming transform found at least one observation
+    assert (
+        number_of_obs != 0
+    ), "could not count any observations, likely due to incorrect xml format"
+
+
+def check_number_of_obs_is_expected(number_of_obs: int, no_of_expected_obs: int):
+    # checks that the streaming transform wrote a row for every obs in the file
+    # the expected number is the count of obs tags read while streaming the file
+    assert (
+        number_of_obs == no_of_expected_obs
+    ), f"expected number of observations is {no_of_expected_obs} but {number_of_obs} were written"
@@ -3,17 +3,26 @@ Transform validation functions to be used by dpypelines.pipeline.shared.transfor
 ie -  generic sdmx data version 2_1
 """
 
+import xml.etree.ElementTree as ET
 from pathlib import Path
 from typing import List
 
 import pandas as pd
 
+from dpypelines.pipeline.shared.transforms.sniff import XmlSniff, sniff_xml
+from dpypelines.pipeline.shared.transforms.utils import count_xml_start_tags
 
-def check_read_in_sdmx(xml_file: Path):
+
+def check_read_in_sdmx(xml_file: Path) -> XmlSniff:
     # check sdmx can be read in
-    with open(xml_file, "r") as f:
-        xml_content = f.read()
-    assert xml_content.startswith("<?xml"), "file does not appear to be xml"
+    # only the start of the file is read, up to the root element, the rest of the file is left
+    # to the parser, the (cached) sniff result is returned so it can be reused
+    try:
+        sniff = sniff_xml(xml_file)
+    except (ET.ParseError, ValueError) as err:
+        raise AssertionError("file does not appear to be xml") from err
+    assert sniff.has_declaration, "file does not appear to be xml"
+    return sniff
 
 
 def check_xml_type(data: dict):
@@ -47,11 +56,13 @@ def check_header_info(header: dict):
         assert key in expected_keys, f"{key} is not expected in header"
 
 
-def get_number_of_obs_from_xml_file(xml_file: Path):
+def get_number_of_obs_from_xml_file(xml_file: Path, max_workers: int = 1):
     # counts number of obs from .xml file
-    # uses 'na_:Obs' as an identifier that a line has an observation
-    with open(xml_file) as f:
-        number_of_obs = sum(1 for line in f if "generic:ObsValue" in line)
+    # counts the 'generic:ObsValue' elements in the raw bytes of the file, in parallel over
+    # max_workers segments of the file if max_workers is above 1
+    number_of_obs = count_xml_start_tags(
+        xml_file, "generic:ObsValue", max_workers=max_workers
+    )
     assert (
         number_of_obs != 0
     ), "could not count any observations, likely due to incorrect xml format"
@@ -86,6 +97,15 @@ def check_columns_of_dataframes_are_unique(
         ), f"{column} is duplicated in obs_frame and header_frame"
 
 
+def check_series_and_obs_columns_are_unique(series_columns: list, obs_columns: list):
+    # checks that no generic:Value id is given by both a generic:Series and its
+    # generic:Obs, as both would otherwise be written as columns of the same name
+    for column in series_columns:
+        assert (
+            column not in obs_columns
+        ), f"{column} is duplicated in series_values and obs_values"
+
+
 def check_tidy_data_columns(df_columns: pd.Index):
     # check tidy data headers have no “@” or “na:”
     for col in df_columns:
@@ -104,3 +124,30 @@ def check_obs_dicts_have_same_keys(obs_dict: List):
         assert (
             first_dict.keys() == item.keys()
         ), "not all keys in obs_dicts are the same"
+
+
+def check_obs_has_expected_keys(obs_dict: dict, expected_keys: List):
+    # checks an observation has the same keys as the first one read
+    # when streaming this stands in for check_obs_dicts_have_same_keys, as the
+    # obs_dicts are never all held in memory at once
+    assert len(expected_keys) == len(
+        obs_dict
+    ), "not all items in obs_dicts are the same length"
+    assert all(
+        key in obs_dict for key in expected_keys
+    ), "not all keys in obs_dicts are the same"
+
+
+def check_number_of_obs_is_not_zero(number_of_obs: int):
+    # checks that the streaming transform found at least one observation
+    assert (
+        number_of_obs != 0
+    ), "could not count any observations, likely due to incorrect xml format"
+
+
+def check_number_of_obs_is_expected(number_of_obs: int, no_of_expected_obs: int):
+    # checks that the streaming transform wrote a row for every obs in the file
+    # the expected number is the count of obs tags read while streaming the file
+    assert (
+        number_of_obs == no_of_expected_obs
+    ), f"expected number of observations is {no_of_expected_obs} but {number_of_obs} were written"
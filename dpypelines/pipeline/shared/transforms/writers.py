@@ -0,0 +1,285 @@
+import csv
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from dpypelines.pipeline.shared.transforms.statistics import TransformStatistics
+from dpypelines.pipeline.shared.transforms.utils import ColumnBuffer, csv_prefix
+
+# Number of rows held in memory before being written out
+DEFAULT_BATCH_SIZE = 10_000
+
+# Size in bytes of the write buffer of the output file
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+class CsvBatchWriter:
+    """
+    Writes rows to a csv file in batches as they are produced by a transform, so
+    the full table never needs to be held in memory.
+
+    Rows are added in the same way as to a ColumnBuffer: constants are the values
+    of the leading columns that are the same for every row, start_run() gives the
+    values of the following columns that are shared by a run of rows (such as
+    series attributes) and append() gives the values of the remaining columns for
+    one row. Constant and run values are encoded once and written ahead of each
+    row. Rows are written out whenever batch_size rows are waiting, and on close.
+
+    Usage:
+        with CsvBatchWriter("data.csv", ["ID", "FREQ", "OBS_VALUE"], ["T1500"]) as writer:
+            writer.start_run(["A"])
+            writer.append(["18415"])
+    """
+
+    def __init__(
+        self,
+        output_path: Path,
+        columns: Sequence[str],
+        constants: Sequence = (),
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ):
+        assert batch_size > 0, "batch_size must be greater than 0"
+        self.output_path = output_path
+        self.batch_size = batch_size
+        self._file = open(
+            output_path, "w", encoding="utf-8", newline="", buffering=buffer_size
+        )
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        self._writer.writerow(columns)
+        self._constants_prefix = csv_prefix(constants)
+        self._row_prefix = self._constants_prefix
+        self._batch: List[Sequence] = []
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start_run(self, values: Sequence):
+        """
+        Start a new run of rows, sharing the given values for the columns that follow
+        the constants.
+        """
+        self.flush()
+        self._row_prefix = self._constants_prefix + csv_prefix(values)
+
+    def append(self, values: Sequence):
+        """
+        Add a row to the current run, with values for the remaining columns.
+        """
+        self._batch.append(values)
+        self._length += 1
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write out any rows waiting in the current batch.
+        """
+        for values in self._batch:
+            self._file.write(self._row_prefix)
+            self._writer.writerow(values)
+        self._batch.clear()
+
+    def close(self):
+        """
+        Write out any remaining rows and close the file.
+        """
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class ParquetBatchWriter:
+    """
+    Writes rows to a parquet file in batches as they are produced by a transform,
+    with the same start_run() and append() interface as CsvBatchWriter. Each batch
+    of batch_size rows is written as one row group.
+
+    Constant and run columns (the header and series dimensions) are stored
+    dictionary encoded, so readers get them back as categoricals, and the remaining
+    columns are stored as strings. Requires pyarrow to be installed.
+    """
+
+    def __init__(
+        self,
+        output_path: Path,
+        columns: Sequence[str],
+        constants: Sequence = (),
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        assert batch_size > 0, "batch_size must be greater than 0"
+        assert len(constants) <= len(columns), "there are more constants than columns"
+        self.output_path = output_path
+        self.columns = list(columns)
+        self.batch_size = batch_size
+        self._constants = dict(zip(self.columns, constants))
+        self._number_of_run_columns: Optional[int] = None
+        self._run_values: Sequence = ()
+        self._buffer: Optional[ColumnBuffer] = None
+        self._writer = None
+        self._closed = False
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _new_buffer(self) -> ColumnBuffer:
+        start = len(self._constants)
+        end = start + self._number_of_run_columns
+        buffer = ColumnBuffer(
+            self.columns[start:end],
+            self.columns[end:],
+            constants=self._constants,
+            capacity=self.batch_size,
+        )
+        if self._number_of_run_columns:
+            buffer.start_run(self._run_values)
+        return buffer
+
+    def _schema(self):
+        import pyarrow as pa
+
+        dictionary_columns = len(self._constants) + (self._number_of_run_columns or 0)
+        return pa.schema(
+            [
+                (column, pa.dictionary(pa.int32(), pa.string()))
+                for column in self.columns[:dictionary_columns]
+            ]
+            + [(column, pa.string()) for column in self.columns[dictionary_columns:]]
+        )
+
+    def start_run(self, values: Sequence):
+        """
+        Start a new run of rows, sharing the given values for the columns that follow
+        the constants.
+        """
+        if self._number_of_run_columns is None:
+            self._number_of_run_columns = len(values)
+        self._run_values = values
+        if self._buffer is None:
+            self._buffer = self._new_buffer()
+        else:
+            self._buffer.start_run(values)
+
+    def append(self, values: Sequence):
+        """
+        Add a row to the current run, with values for the remaining columns.
+        """
+        if self._buffer is None:
+            self.start_run(())
+        self._buffer.append(values)
+        self._length += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write out any rows waiting in the current batch as a row group.
+        """
+        if self._buffer is None or len(self._buffer) == 0:
+            return
+        import pyarrow.parquet as pq
+
+        schema = self._schema()
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.output_path, schema)
+        self._writer.write_table(self._buffer.to_arrow().cast(schema))
+        self._buffer = self._new_buffer()
+
+    def close(self):
+        """
+        Write out any remaining rows and close the file. A file is written with just
+        the schema if no rows were added.
+        """
+        if self._closed:
+            return
+        self.flush()
+        if self._writer is None:
+            import pyarrow.parquet as pq
+
+            pq.write_table(self._schema().empty_table(), self.output_path)
+        else:
+            self._writer.close()
+        self._closed = True
+
+
+class TeeWriter:
+    """
+    Passes the rows produced by a transform on to several writers, such as a
+    CsvBatchWriter and a ParquetBatchWriter, so the output is only produced once.
+    """
+
+    def __init__(self, *writers):
+        assert writers, "TeeWriter needs at least one writer"
+        self.writers = writers
+
+    def __len__(self) -> int:
+        return len(self.writers[0])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start_run(self, values: Sequence):
+        for writer in self.writers:
+            writer.start_run(values)
+
+    def append(self, values: Sequence):
+        for writer in self.writers:
+            writer.append(values)
+
+    def close(self):
+        """
+        Closes every writer, even if closing one of them raises, then raises the
+        first error.
+        """
+        error = None
+        for writer in self.writers:
+            try:
+                writer.close()
+            except Exception as err:
+                if error is None:
+                    error = err
+        if error is not None:
+            raise error
+
+
+def open_transform_writer(
+    output_path: Path,
+    columns: Sequence[str],
+    constants: Sequence = (),
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    parquet_path: Optional[Path] = None,
+    statistics: Optional[TransformStatistics] = None,
+):
+    """
+    Opens a CsvBatchWriter for output_path and, if parquet_path is given, a
+    ParquetBatchWriter for parquet_path alongside it, so a transform can write
+    both from a single pass over its input. If statistics is given the rows are
+    also folded into it as they are written.
+    """
+    writers = [CsvBatchWriter(output_path, columns, constants, batch_size=batch_size)]
+    if parquet_path is not None:
+        writers.append(
+            ParquetBatchWriter(parquet_path, columns, constants, batch_size=batch_size)
+        )
+    if statistics is not None:
+        statistics.begin(columns, constants)
+        writers.append(statistics)
+    if len(writers) == 1:
+        return writers[0]
+    return TeeWriter(*writers)
@@ -1,8 +1,12 @@
 # devnote: not using strtobool from distutils as that
 # package is being depreciate from the standard
 # library in python >3.12
+import json
 import os
+import threading
 from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
 
 import pytz
 from dpytools.email.ses.client import SesClient
@@ -54,40 +58,73 @@ def get_submitter_email(manifest_dict: dict) -> str:
     return submitter_email
 
 
-def get_commit_id() -> str:
+# A json file of {"commit_id": ..., "environment": ...} written when the image is built,
+# see `make build-info`
+BUILD_INFO_FILE = Path(__file__).parents[2] / "build_info.json"
+
+_build_info: Optional[Dict[str, str]] = None
+_build_info_lock = threading.Lock()
+
+
+def _read_build_info_file() -> Dict[str, str]:
+    build_info_file = Path(os.environ.get("BUILD_INFO_FILE", BUILD_INFO_FILE))
     try:
-        repo = Repo()
-    except Exception:
-        environment = os.environ["ENVIRONMENT"]
-        if not os.path.exists("/tmp/dp-data-pipelines"):
-            repo = Repo.clone_from(
-                "https://github.com/ONSdigital/dp-data-pipelines.git",
-                "/tmp/dp-data-pipelines",
-                branch=environment,
-            )
-        else:
-            repo = Repo("/tmp/dp-data-pipelines")
+        with open(build_info_file) as f:
+            build_info = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {key: str(value) for key, value in build_info.items() if value}
+
 
-    return str(repo.head.commit)
+def _git_environment(repo: Repo) -> Optional[str]:
+    heads = str(repo.heads)
+    for environment in ("sandbox", "staging", "production"):
+        if environment in heads:
+            return environment
+    return None
+
+
+def get_build_info() -> Dict[str, str]:
+    """
+    Returns the commit ID and environment this code is running as, as
+    {"commit_id": ..., "environment": ...}.
+
+    Each is taken from the first of: the build info file baked into the image
+    (BUILD_INFO_FILE, or the path in the BUILD_INFO_FILE env var), the COMMIT_ID and
+    ENVIRONMENT env vars, then the local git repo. They are only worked out once per
+    process, so notifications never wait on git, and a repo is never cloned to find
+    them.
+    """
+    global _build_info
+    if _build_info is None:
+        with _build_info_lock:
+            if _build_info is None:
+                build_info = _read_build_info_file()
+                build_info.setdefault("commit_id", os.environ.get("COMMIT_ID"))
+                build_info.setdefault("environment", os.environ.get("ENVIRONMENT"))
+                if not build_info["commit_id"] or not build_info["environment"]:
+                    try:
+                        repo = Repo()
+                        if not build_info["commit_id"]:
+                            build_info["commit_id"] = str(repo.head.commit)
+                        if not build_info["environment"]:
+                            build_info["environment"] = _git_environment(repo)
+                    except Exception:
+                        pass
+                _build_info = {
+                    "commit_id": build_info["commit_id"] or "Commit ID is unknown",
+                    "environment": build_info["environment"]
+                    or "Environment is unknown",
+                }
+    return _build_info
+
+
+def get_commit_id() -> str:
+    return get_build_info()["commit_id"]
 
 
 def get_environment() -> str:
-    try:
-        repo = Repo()
-        heads = repo.heads
-        if "sandbox" in str(heads):
-            return "sandbox"
-        elif "staging" in str(heads):
-            return "staging"
-        elif "production" in str(heads):
-            return "production"
-        else:
-            return "Environment is unknown"
-
-    except Exception:
-        # found in env variables
-        environment = os.environ["ENVIRONMENT"]
-        return environment
+    return get_build_info()["environment"]
 
 
 def get_local_time():
@@ -102,3 +139,16 @@ def get_local_time():
 
     # Format the time as a string and print it
     return formatted_datetime_London
+
+
+def seconds_since_local_time(local_time: str) -> float:
+    """
+    The seconds from local_time, a time of day from get_local_time(), until now. A
+    local_time later in the day than now is taken to be from the day before.
+    """
+    now = datetime.now(pytz.timezone("Europe/London"))
+    started = datetime.strptime(local_time, "%H:%M:%S")
+    seconds = (now.hour - started.hour) * 3600
+    seconds += (now.minute - started.minute) * 60
+    seconds += now.second - started.second
+    return float(seconds % 86400)
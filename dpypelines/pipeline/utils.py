@@ -17,13 +17,14 @@ def get_source_id(manifest_dict: dict) -> str:
     return manifest_dict["source_id"]
 
 
-def get_notifier():
+def get_notifier(record_in_digest: bool = True):
     # Create notifier from webhook env var
     try:
         process_start_time = get_local_time()
         notifier: BasePipelineNotifier = notifier_from_env_var_webhook(
             "DE_SLACK_WEBHOOK",
             process_start_time=process_start_time,
+            record_in_digest=record_in_digest,
         )
         logger.info("Notifier created", data={"notifier": notifier})
         return notifier
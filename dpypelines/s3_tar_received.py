@@ -1,11 +1,20 @@
+import json
+import os
 from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Optional
 
 from dpytools.logging.logger import DpLogger
 from dpytools.s3.basic import decompress_s3_tar
 from dpytools.stores.directory.local import LocalDirectoryStore
+from dpytools.utilities.utilities import str_to_bool
 from dpytools.validation.json.validation import validate_json_schema
 
 from dpypelines.pipeline.configuration import get_pipeline_config
+from dpypelines.pipeline.shared.notification import DigestPipelineNotifier
+from dpypelines.pipeline.shared.pipelineconfig.matching import get_matching_pattern
+from dpypelines.pipeline.shared.pipelineconfig.transform import get_transform_details
+from dpypelines.pipeline.shared.tar_stream import StreamingTarExtractor, stream_s3_tar
+from dpypelines.pipeline.shared.transforms.sniff import SniffedStream
 from dpypelines.pipeline.utils import (
     get_notifier,
     get_secondary_function,
@@ -15,7 +24,11 @@ from dpypelines.pipeline.utils import (
 logger = DpLogger("data-ingress-pipeline")
 
 
-def start(s3_object_name: str):
+def start(
+    s3_object_name: str,
+    stream_tar: Optional[bool] = None,
+    pipe_transform_inputs: Optional[bool] = None,
+):
     """
     Handles the required behaviour when recieving a tar file indicated
     by an s3 object name.
@@ -23,11 +36,199 @@ def start(s3_object_name: str):
     Args:
         s3_object_name (str): The S3 object name of the tar file to be processed.
         Example: 'my-bucket/my-data.tar'
+        stream_tar (bool): Extract the tar as it is read from S3, rather than
+        downloading it and then decompressing it, so manifest.json can be validated
+        and the pipeline config found while the rest of the tar is still arriving.
+        Defaults to the STREAM_S3_TAR env var, or False if that is not set.
+        pipe_transform_inputs (bool): Stream the tar, and hand the transform input
+        file (such as data.xml) straight from the tar to the sanity checker and
+        transform as it arrives, so it is only written to ./input if it is also a
+        supplementary distribution. Defaults to the PIPE_TRANSFORM_INPUTS env var,
+        or False if that is not set.
 
     """
     # TODO: Keep eye out for this. Might need to be reverted back to try and except format if issues arise.
     notifier = get_notifier()
 
+    if stream_tar is None:
+        stream_tar = _bool_from_env("STREAM_S3_TAR", notifier)
+    if pipe_transform_inputs is None:
+        pipe_transform_inputs = _bool_from_env("PIPE_TRANSFORM_INPUTS", notifier)
+
+    secondary_kwargs = {}
+    if stream_tar or pipe_transform_inputs:
+        # When piping, the rest of the tar is held until the config says where the
+        # transform inputs should go
+        extractor = _start_streaming_tar(
+            s3_object_name,
+            notifier,
+            hold_after=["manifest.json"] if pipe_transform_inputs else [],
+        )
+        try:
+            pipeline_config, source_id = _get_pipeline_config_from_manifest(
+                notifier, extractor=extractor
+            )
+        except Exception:
+            extractor.cancel()
+            raise
+
+        if pipe_transform_inputs and pipeline_config["transform"] is not None:
+            try:
+                extractor.release(
+                    pipes=_transform_input_pipes(pipeline_config),
+                    keep=get_matching_pattern(
+                        pipeline_config, "supplementary_distributions"
+                    ),
+                )
+                logger.info(
+                    "Piping transform inputs from S3 tar to transform",
+                    data={"pipeline_config": pipeline_config},
+                )
+            except Exception as err:
+                extractor.cancel()
+                logger.error(
+                    "Failed to pipe transform inputs from S3 tar",
+                    err,
+                    data={"pipeline_config": pipeline_config},
+                )
+                notifier.failure(source_id=source_id)
+                raise err
+        else:
+            extractor.release()
+
+        # The secondary function needs every file, so wait for the rest of the tar
+        try:
+            extractor.wait()
+            local_store = LocalDirectoryStore("input")
+            logger.info(
+                "S3 tar recieved streamed to ./input",
+                data={
+                    "s3_object_name": s3_object_name,
+                    "local store": local_store.get_file_names(),
+                    "piped": extractor.piped,
+                },
+            )
+            if extractor.piped:
+                # only one transform input can be piped, see _transform_input_pipes
+                (transform_outputs,) = extractor.piped.values()
+                secondary_kwargs = {
+                    "transform_outputs": transform_outputs,
+                    "piped_files": [
+                        name
+                        for name in extractor.piped
+                        if name not in extractor.extracted
+                    ],
+                }
+        except Exception as err:
+            logger.error(
+                "Failed to stream tar file",
+                err,
+                data={"s3_object_name": s3_object_name},
+            )
+            notifier.failure(source_id=source_id)
+            raise err
+    else:
+        local_store = _decompress_tar(s3_object_name, notifier)
+        pipeline_config, source_id = _get_pipeline_config_from_manifest(
+            notifier, local_store=local_store
+        )
+
+    # Get the path to the directory
+    files_dir = local_store.get_current_source_pathlike()
+
+    # Call the secondary_function specified in pipeline_config
+    try:
+        secondary_function = get_secondary_function(pipeline_config)
+        secondary_function(files_dir, pipeline_config, **secondary_kwargs)
+        logger.info(
+            "Successfully executed secondary function specified in pipeline_config",
+            data={
+                "secondary_function": secondary_function,
+                "pipeline_config": pipeline_config,
+            },
+        )
+    except Exception as err:
+        logger.error(
+            "Failed to executed secondary function specified in pipeline_config",
+            err,
+            data={"pipeline_config": pipeline_config, "files_dir": files_dir},
+        )
+        notifier.failure(source_id=source_id)
+        raise err
+
+    # The secondary function does not record its success in the notification
+    # digest, as it does not know the source_id, so it is recorded here
+    if isinstance(notifier, DigestPipelineNotifier):
+        notifier.success(source_id=source_id)
+
+
+def _bool_from_env(env_var_name: str, notifier) -> bool:
+    try:
+        return str_to_bool(os.environ.get(env_var_name, "False"))
+    except Exception as err:
+        logger.error(
+            f"Unable to cast {env_var_name} to boolean",
+            err,
+            data={"value": os.environ.get(env_var_name)},
+        )
+        notifier.failure()
+        raise err
+
+
+def _transform_input_pipes(
+    pipeline_config: dict,
+) -> Dict[str, Callable[[BinaryIO, str], Any]]:
+    """
+    The pipe for StreamingTarExtractor.release() that runs the sanity checker and
+    transform of pipeline_config on its input file as it is read from the tar,
+    returning the transform's (csv_path, metadata_path).
+
+    An error raised by the sanity checker or transform is returned in place of
+    the outputs rather than stopping the extraction, so the secondary function
+    still checks the required files first and then handles the error as it would
+    one raised by a transform it ran itself.
+    """
+    transform = get_transform_details(pipeline_config, "transform")
+    transform_inputs = get_transform_details(pipeline_config, "transform_inputs")
+    transform_kwargs = get_transform_details(pipeline_config, "transform_kwargs")
+    assert (
+        len(transform_inputs) == 1
+    ), f"Only transforms with one input can be piped, got {list(transform_inputs)}"
+    ((pattern, sanity_checker),) = transform_inputs.items()
+
+    def run_transform(fileobj: BinaryIO, name: str):
+        input_file = SniffedStream(fileobj, name=name)
+        try:
+            sanity_checker(input_file)
+            return transform(input_file, **transform_kwargs)
+        except Exception as err:
+            return err
+
+    return {pattern: run_transform}
+
+
+def _start_streaming_tar(
+    s3_object_name: str, notifier, hold_after=()
+) -> StreamingTarExtractor:
+    # Start extracting the tar file to the workspace as it is read from S3
+    try:
+        extractor = stream_s3_tar(s3_object_name, "input", hold_after=hold_after)
+        logger.info(
+            "Streaming S3 tar recieved to ./input",
+            data={"s3_object_name": s3_object_name},
+        )
+        return extractor
+    except Exception as err:
+        logger.error(
+            "Failed to start streaming tar file",
+            err,
+            data={"s3_object_name": s3_object_name},
+        )
+        notifier.failure()
+        raise err
+
+
+def _decompress_tar(s3_object_name: str, notifier) -> LocalDirectoryStore:
     # Decompress the tar file to the workspace
     try:
         decompress_s3_tar(s3_object_name, "input")
@@ -58,13 +259,32 @@ def start(s3_object_name: str):
         notifier.failure()
         raise err
 
+    return local_store
+
+
+def _get_pipeline_config_from_manifest(
+    notifier,
+    local_store: Optional[LocalDirectoryStore] = None,
+    extractor: Optional[StreamingTarExtractor] = None,
+):
+    """
+    Reads and validates manifest.json, from the local store or as soon as the
+    extractor has written it, and returns the pipeline config and source_id it
+    gives.
+    """
     try:
-        manifest_dict = local_store.get_lone_matching_json_as_dict("manifest.json")
+        if extractor is not None:
+            manifest_path = extractor.wait_for_member("manifest.json")
+            manifest_dict = json.loads(manifest_path.read_text())
+            files_found = list(extractor.extracted)
+        else:
+            manifest_dict = local_store.get_lone_matching_json_as_dict("manifest.json")
+            files_found = local_store.get_file_names()
         # TODO change logger.info message (got manifest not source_id)
         logger.info(
             "Successfully retrieved source_id",
             data={
-                "files_found": local_store.get_file_names(),
+                "files_found": files_found,
                 "pattern_looked_for": "manifest.json",
             },
         )
@@ -117,25 +337,4 @@ def start(s3_object_name: str):
         notifier.failure(source_id=source_id)
         raise err
 
-    # Get the path to the directory
-    files_dir = local_store.get_current_source_pathlike()
-
-    # Call the secondary_function specified in pipeline_config
-    try:
-        secondary_function = get_secondary_function(pipeline_config)
-        secondary_function(files_dir, pipeline_config)
-        logger.info(
-            "Successfully executed secondary function specified in pipeline_config",
-            data={
-                "secondary_function": secondary_function,
-                "pipeline_config": pipeline_config,
-            },
-        )
-    except Exception as err:
-        logger.error(
-            "Failed to executed secondary function specified in pipeline_config",
-            err,
-            data={"pipeline_config": pipeline_config, "files_dir": files_dir},
-        )
-        notifier.failure(source_id=source_id)
-        raise err
+    return pipeline_config, source_id
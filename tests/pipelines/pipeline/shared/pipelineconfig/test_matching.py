@@ -1,7 +1,10 @@
 import pytest
 
 from dpypelines.pipeline.dataset_ingress_v1 import dataset_ingress_v1
-from dpypelines.pipeline.shared.pipelineconfig.matching import get_matching_pattern
+from dpypelines.pipeline.shared.pipelineconfig.matching import (
+    FilePatternMatcher,
+    get_matching_pattern,
+)
 from dpypelines.pipeline.shared.transforms.sdmx.v1 import (
     sdmx_compact_2_0_prototype_1,
     sdmx_sanity_check_v1,
@@ -84,3 +87,67 @@ def test_get_matching_pattern_supplementary_distributions():
 
     assert len(results) == 1
     assert set(results) == {"^data.xml$"}
+
+
+def test_file_pattern_matcher_matches_files_once(tmp_path):
+    """
+    Ensures the files matching each pattern are found from a single listing of the
+    directory, so files added afterwards are not seen.
+    """
+    for file_name in ["data.xml", "data.csv", "manifest.json"]:
+        (tmp_path / file_name).touch()
+    file_matcher = FilePatternMatcher(tmp_path, patterns=["^data.xml$", "^data"])
+    (tmp_path / "data.xls").touch()
+
+    assert file_matcher.matching_files == {
+        "^data.xml$": ["data.xml"],
+        "^data": ["data.csv", "data.xml"],
+    }
+    assert file_matcher.has_lone_file_matching("^data.xml$")
+    assert not file_matcher.has_lone_file_matching("^data")
+    assert not file_matcher.has_lone_file_matching("^data.xls$")
+    assert file_matcher.get_pathlike_of_file_matching("^data.xml$") == (
+        tmp_path / "data.xml"
+    )
+
+
+def test_file_pattern_matcher_given_file_names(tmp_path):
+    """
+    Ensures a listing already made can be given, and patterns added later are
+    matched against it.
+    """
+    file_matcher = FilePatternMatcher(
+        tmp_path, ["data.xml", "manifest.json"], ["^data.xml$"]
+    )
+    file_matcher.add_patterns(["^manifest.json$", "^data.xml$"])
+
+    assert file_matcher.files_matching("^manifest.json$") == ["manifest.json"]
+    assert file_matcher.files_matching("json") == ["manifest.json"]
+
+
+def test_file_pattern_matcher_no_lone_file(tmp_path):
+    """
+    Ensures the correct error is raised when asking for the path of a file that
+    does not match exactly one file.
+    """
+    file_matcher = FilePatternMatcher(tmp_path, ["data.xml", "data.csv"])
+
+    with pytest.raises(AssertionError) as err:
+        file_matcher.get_pathlike_of_file_matching("^data")
+    assert "Error finding file matching pattern ^data" in str(err.value)
+
+
+def test_file_pattern_matcher_patterns_without_lone_file(tmp_path):
+    """
+    Ensures every pattern not matched by exactly one file is found in one call,
+    rather than only the first.
+    """
+    file_matcher = FilePatternMatcher(
+        tmp_path, ["data.xml", "data.csv", "manifest.json"], ["^manifest.json$"]
+    )
+
+    missing = file_matcher.patterns_without_lone_file(
+        ["^manifest.json$", "^data", "^data.xml$", "^metadata.json$"]
+    )
+
+    assert missing == ["^data", "^metadata.json$"]
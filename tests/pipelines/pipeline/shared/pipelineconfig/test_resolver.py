@@ -0,0 +1,130 @@
+import re
+
+import pytest
+
+from dpypelines.pipeline.shared.pipelineconfig.resolver import PipelineConfigResolver
+
+CONFIGURATION = {
+    "^.*_compact_sdmx_v2_0$": {"name": "compact"},
+    "^.*_generic_sdmx_v2_1$": {"name": "generic"},
+    "^dataset-[0-9]+_csv$": {"name": "csv"},
+    "^.*_sdmx$": {"name": "sdmx"},
+    "^.*_move$": {"name": "move"},
+}
+
+
+def first_match(configuration, source_id):
+    for pattern in configuration:
+        if re.match(pattern, source_id):
+            return pattern
+    return None
+
+
+@pytest.mark.parametrize(
+    "source_id",
+    [
+        "some-id_compact_sdmx_v2_0",
+        "some-id_generic_sdmx_v2_1",
+        "dataset-123_csv",
+        "dataset-abc_csv",
+        "some-id_sdmx",
+        "some-id_move",
+        "_move",
+        "some-id_move_not",
+        "some-id_move\n",
+        "",
+    ],
+)
+def test_resolver_matches_first_pattern_in_order(source_id):
+    """
+    Ensures the resolver finds the same pattern as trying each pattern in order
+    with re.match.
+    """
+    resolver = PipelineConfigResolver(CONFIGURATION)
+    assert resolver.resolve(source_id) == first_match(CONFIGURATION, source_id)
+
+
+def test_resolver_combined_patterns_keep_their_order():
+    """
+    Ensures that when several patterns that are not suffix patterns match, the
+    first one in the configuration wins.
+    """
+    configuration = {
+        "^.*_x_[0-9]+$": {"name": "numbered"},
+        "^some.*$": {"name": "some"},
+        "^.*_y$": {"name": "y"},
+    }
+    resolver = PipelineConfigResolver(configuration)
+
+    assert resolver.get_config("some_x_1") == {"name": "numbered"}
+    assert resolver.get_config("some_y") == {"name": "some"}
+    assert resolver.get_config("other_y") == {"name": "y"}
+
+
+@pytest.mark.parametrize(
+    "configuration, source_id",
+    [
+        ({"^foo(y)$": {}, "^a(b)\\1$": {}}, "abb"),
+        ({"^foo(y)$": {}, "^a(?P<b>b)(?P=b)$": {}}, "abb"),
+        ({"^(?P<b>x)$": {}, "^(?P<b>y)$": {}}, "y"),
+        ({"^foo(y)$": {}, "^a(b)?(?(1)c|d)$": {}}, "abc"),
+        ({"^foo$": {}, "(?i)^ABC$": {}}, "abc"),
+        ({"^foo$": {}, "^a(?i:B)c$": {}}, "abc"),
+    ],
+)
+def test_resolver_patterns_that_cannot_be_combined(configuration, source_id):
+    """
+    Ensures patterns using backreferences, named groups or global inline flags are
+    matched as they are by re.match, rather than as part of the combined regex.
+    """
+    resolver = PipelineConfigResolver(configuration)
+    assert resolver.resolve(source_id) == first_match(configuration, source_id)
+    assert resolver.resolve(source_id) is not None
+
+
+def test_resolver_no_match():
+    """
+    Ensures a KeyError is raised for a source_id no pattern matches.
+    """
+    resolver = PipelineConfigResolver(CONFIGURATION)
+    with pytest.raises(KeyError) as err:
+        resolver.get_config("some-id_unknown")
+    assert "some-id_unknown not matched in CONFIGURATION" in str(err.value)
+
+
+def test_resolver_memoises_lookups():
+    """
+    Ensures each source_id is only resolved once.
+    """
+    resolver = PipelineConfigResolver(CONFIGURATION)
+    resolver.resolve("some-id_move")
+    resolver.resolve("some-id_move")
+
+    assert resolver._resolve_cached.cache_info().hits == 1
+
+
+def test_resolver_ambiguous_suffixes():
+    """
+    Ensures overlapping suffix patterns are reported when the resolver is created,
+    and resolved in order when they are allowed.
+    """
+    configuration = {
+        "^.*_sdmx$": {"name": "sdmx"},
+        "^.*_compact_sdmx$": {"name": "compact"},
+    }
+    with pytest.raises(ValueError) as err:
+        PipelineConfigResolver(configuration)
+    assert "'^.*_sdmx$' and '^.*_compact_sdmx$'" in str(err.value)
+
+    resolver = PipelineConfigResolver(configuration, allow_ambiguous=True)
+    assert resolver.get_config("some-id_compact_sdmx") == {"name": "sdmx"}
+
+
+def test_resolver_escaped_suffix():
+    """
+    Ensures escaped characters in a suffix pattern are matched literally.
+    """
+    resolver = PipelineConfigResolver({r"^.*\.v1$": {"name": "v1"}})
+
+    assert resolver.resolve("some-id.v1") == r"^.*\.v1$"
+    assert resolver.resolve("some-id_v1") is None
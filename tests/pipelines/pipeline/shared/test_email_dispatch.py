@@ -0,0 +1,119 @@
+import threading
+import time
+
+from dpypelines.pipeline.shared.email_dispatch import EmailDispatcher, SubmissionEmail
+from dpypelines.pipeline.shared.email_template_message import (
+    file_not_found_email,
+    supplementary_distribution_not_found_email,
+)
+
+
+class LocalSesClient:
+    """
+    Stands in for an SesClient, keeping the emails sent to it in sent. Each send
+    waits until release is set, and the first fail_times sends raise.
+    """
+
+    def __init__(self, fail_times: int = 0):
+        self.sent = []
+        self.fail_times = fail_times
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def send(self, recipient, subject, message):
+        self.release.wait()
+        with self._lock:
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise ConnectionError("SES is unavailable")
+            self.sent.append((recipient, subject, message))
+
+
+def test_email_dispatcher_does_not_wait_on_client():
+    """
+    Test that sending through an EmailDispatcher returns straight away, and the
+    email is sent by its workers.
+    """
+    client = LocalSesClient()
+    client.release.clear()
+    dispatcher = EmailDispatcher(client, workers=2)
+
+    started = time.monotonic()
+    dispatcher.send("someone@example.com", "subject", "message")
+    assert time.monotonic() - started < 0.25
+    assert client.sent == []
+
+    client.release.set()
+    assert dispatcher.flush(timeout=5)
+    assert client.sent == [("someone@example.com", "subject", "message")]
+
+
+def test_email_dispatcher_retries():
+    """
+    Test that an email that fails to send is retried, and counted as failed once
+    it runs out of retries.
+    """
+    client = LocalSesClient(fail_times=2)
+    dispatcher = EmailDispatcher(client, max_retries=1, retry_delay=0.01)
+
+    dispatcher.send("someone@example.com", "first", "message")
+    dispatcher.send("someone@example.com", "second", "message")
+    assert dispatcher.flush(timeout=5)
+
+    assert dispatcher.failed == 1
+    assert [email[1] for email in client.sent] == ["second"]
+
+
+def test_submission_email_coalesces_problems():
+    """
+    Ensures the problems added to a SubmissionEmail are sent as one email listing
+    all of them.
+    """
+    client = LocalSesClient()
+    dispatcher = EmailDispatcher(client)
+    submission_email = SubmissionEmail(dispatcher, "someone@example.com")
+
+    submission_email.add(file_not_found_email("data.xml"))
+    submission_email.add(supplementary_distribution_not_found_email("data.csv"))
+    submission_email.send()
+    submission_email.send()
+    assert dispatcher.flush(timeout=5)
+
+    assert len(client.sent) == 1
+    recipient, subject, message = client.sent[0]
+    assert recipient == "someone@example.com"
+    assert subject == "Data Submission Error: Multiple Problems"
+    assert "There were 2 problems with your submission" in message
+    assert "The file data.xml" in message
+    assert "The supplementary distribution data.csv" in message
+
+
+def test_submission_email_single_problem():
+    """
+    Ensures a SubmissionEmail with one problem is sent as that problem's own email.
+    """
+    client = LocalSesClient()
+    dispatcher = EmailDispatcher(client)
+    submission_email = SubmissionEmail(dispatcher, "someone@example.com")
+
+    submission_email.add(file_not_found_email("data.xml"))
+    submission_email.send()
+    assert dispatcher.flush(timeout=5)
+
+    email_content = file_not_found_email("data.xml")
+    assert client.sent == [
+        ("someone@example.com", email_content.subject, email_content.message)
+    ]
+
+
+def test_not_found_emails_for_several_files():
+    """
+    Ensures the not found emails list every file they are given.
+    """
+    email_content = file_not_found_email(["^data.xml$", "^metadata.json$"])
+    assert email_content.subject == "Data Submission Error: Missing Required Files"
+    assert "The files ^data.xml$, ^metadata.json$ that you" in email_content.message
+
+    email_content = supplementary_distribution_not_found_email(["^data.csv$"])
+    assert email_content == supplementary_distribution_not_found_email("^data.csv$")
@@ -1,10 +1,20 @@
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from unittest.mock import MagicMock
 
 import pytest
+import pytz
 from _pytest.monkeypatch import MonkeyPatch
 
 from dpypelines.pipeline.shared.notification import (
+    AsyncPipelineNotifier,
+    BackgroundMessenger,
+    DigestPipelineNotifier,
     NopNotifier,
+    NotificationDigest,
     PipelineNotifier,
     notifier_from_env_var_webhook,
 )
@@ -102,3 +112,242 @@ def test_notification_custom_postfix_failure():
         in notifier.client.msg_str._calls_repr()
     )
     assert "environment:" in notifier.client.msg_str._calls_repr()
+
+
+class SlowWebhookStub:
+    """
+    A local http server standing in for a webhook, that takes delay seconds to
+    respond to each message posted to it.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        received = self.received = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                time.sleep(delay)
+                length = int(self.headers["Content-Length"])
+                received.append(self.rfile.read(length).decode("utf-8"))
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class UrllibMessenger:
+    def __init__(self, webhook_url):
+        self.webhook_url = webhook_url
+
+    def msg_str(self, msg: str):
+        urllib.request.urlopen(
+            urllib.request.Request(self.webhook_url, data=msg.encode("utf-8"))
+        ).read()
+
+
+def test_background_messenger_does_not_wait_on_webhook():
+    """
+    Test that sending a message returns before the webhook has responded, and the
+    message is delivered by the time the messenger is flushed.
+    """
+    stub = SlowWebhookStub(delay=0.5)
+    messenger = BackgroundMessenger(UrllibMessenger(stub.url))
+
+    started = time.monotonic()
+    messenger.msg_str("first")
+    messenger.msg_str("second")
+    assert time.monotonic() - started < 0.25
+
+    assert messenger.flush(timeout=5)
+    assert stub.received == ["first", "second"]
+    stub.close()
+
+
+def test_background_messenger_retries():
+    """
+    Test that a message that fails to send is retried, and counted as failed once
+    the retries run out.
+    """
+    client = MagicMock()
+    client.msg_str.side_effect = [Exception("timeout"), Exception("timeout"), None]
+    messenger = BackgroundMessenger(client, max_retries=2, retry_delay=0)
+    messenger.msg_str("retried")
+    assert messenger.flush(timeout=5)
+    assert client.msg_str.call_count == 3
+    assert messenger.failed == 0
+
+    client.msg_str.side_effect = Exception("timeout")
+    messenger.msg_str("given up on")
+    assert messenger.flush(timeout=5)
+    assert messenger.failed == 1
+
+
+def test_background_messenger_drops_messages_when_full():
+    """
+    Test that messages are dropped rather than waited on when the queue is full.
+    """
+    sending = threading.Event()
+    release = threading.Event()
+
+    class BlockedMessenger:
+        def msg_str(self, msg):
+            sending.set()
+            release.wait(5)
+
+    messenger = BackgroundMessenger(BlockedMessenger(), max_queue_size=1)
+    messenger.msg_str("being sent")
+    sending.wait(5)
+    messenger.msg_str("queued")
+    messenger.msg_str("dropped")
+
+    assert messenger.dropped == 1
+    release.set()
+    assert messenger.flush(timeout=5)
+
+
+def test_async_notifier_from_env_var_webhook():
+    """
+    Test that an AsyncPipelineNotifier is created where ASYNC_NOTIFICATIONS is true,
+    and its messages are sent to the webhook in the background.
+    """
+    stub = SlowWebhookStub(delay=0.5)
+    mp = MonkeyPatch()
+    mp.setenv("DISABLE_NOTIFICATIONS", "False")
+    mp.setenv("ASYNC_NOTIFICATIONS", "True")
+    mp.setenv("SOME_ENV_VAR", stub.url)
+    mp.setattr("dpypelines.pipeline.shared.notification._background_messengers", {})
+
+    notifier = notifier_from_env_var_webhook("SOME_ENV_VAR")
+    assert isinstance(notifier, AsyncPipelineNotifier)
+
+    started = time.monotonic()
+    notifier.failure(source_id="some-id")
+    assert time.monotonic() - started < 0.25
+
+    assert notifier.flush(timeout=5)
+    assert len(stub.received) == 1
+    assert "some-id" in stub.received[0]
+    mp.undo()
+    stub.close()
+
+
+def test_async_notifiers_share_a_background_messenger():
+    """
+    Test that AsyncPipelineNotifiers for the same webhook send through the same
+    BackgroundMessenger, rather than each starting a thread of its own.
+    """
+    mp = MonkeyPatch()
+    mp.setattr("dpypelines.pipeline.shared.notification.SlackMessenger", MagicMock)
+    mp.setattr("dpypelines.pipeline.shared.notification._background_messengers", {})
+
+    threads_before = threading.active_count()
+    notifiers = [AsyncPipelineNotifier("https://some-webhook") for _ in range(3)]
+    other_notifier = AsyncPipelineNotifier("https://some-other-webhook")
+
+    assert notifiers[0].client is notifiers[1].client is notifiers[2].client
+    assert notifiers[0].client._threads == notifiers[2].client._threads
+    assert other_notifier.client is not notifiers[0].client
+    assert threading.active_count() == threads_before + 2
+    mp.undo()
+
+
+def test_notification_digest_sends_one_message_per_window():
+    """
+    Test that a NotificationDigest sends one message once max_runs outcomes are
+    recorded, with counts, failed source IDs and duration percentiles.
+    """
+    client = MagicMock()
+    digest = NotificationDigest(client, window_seconds=60, max_runs=4)
+
+    digest.record(True, "id-1", 1.0)
+    digest.record(False, "id-2", 2.0)
+    digest.record(False, "id-2", 3.0)
+    client.msg_str.assert_not_called()
+    digest.record(True, "id-3", 10.0)
+
+    client.msg_str.assert_called_once()
+    msg = client.msg_str.call_args[0][0]
+    assert "4 runs, succeeded: 2, failed: 2" in msg
+    assert "failed source IDs: [id-2 (x2)]" in msg
+    assert "duration p50: 2.0s, duration p95: 10.0s" in msg
+
+    digest.flush()
+    client.msg_str.assert_called_once()
+
+
+def test_notification_digest_flushes_after_window():
+    """
+    Test that a NotificationDigest sends what it has recorded once window_seconds
+    have passed, without waiting for max_runs outcomes.
+    """
+    client = MagicMock()
+    digest = NotificationDigest(client, window_seconds=0.1, max_runs=100)
+
+    digest.record(False, "some-id", 0.5)
+    deadline = time.monotonic() + 5
+    while not client.msg_str.called and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    client.msg_str.assert_called_once()
+    assert "1 runs, succeeded: 0, failed: 1" in client.msg_str.call_args[0][0]
+
+
+def test_digest_notifier_records_one_outcome():
+    """
+    Test that a DigestPipelineNotifier records only the first outcome of its run,
+    timed from its process_start_time.
+    """
+    digest = MagicMock()
+    process_start_time = (
+        datetime.now(pytz.timezone("Europe/London")) - timedelta(seconds=90)
+    ).strftime("%H:%M:%S")
+    notifier = DigestPipelineNotifier(digest, process_start_time=process_start_time)
+
+    notifier.failure()
+    notifier.failure(source_id="some-id")
+    notifier.success(source_id="some-id")
+
+    digest.record.assert_called_once()
+    succeeded, source_id, duration = digest.record.call_args[0]
+    assert (succeeded, source_id) == (False, None)
+    assert 90 <= duration < 95
+
+
+def test_digest_notifier_from_env_var_webhook():
+    """
+    Test that DigestPipelineNotifiers are created where NOTIFICATION_DIGEST is true,
+    and the outcomes of notifiers for the same webhook are sent in one message.
+    """
+    stub = SlowWebhookStub(delay=0)
+    mp = MonkeyPatch()
+    mp.setenv("DISABLE_NOTIFICATIONS", "False")
+    mp.setenv("NOTIFICATION_DIGEST", "True")
+    mp.setenv("NOTIFICATION_DIGEST_MAX_RUNS", "3")
+    mp.setenv("SOME_ENV_VAR", stub.url)
+    mp.setattr(
+        "dpypelines.pipeline.shared.notification.SlackMessenger", UrllibMessenger
+    )
+    mp.setattr("dpypelines.pipeline.shared.notification._digests", {})
+
+    notifiers = [notifier_from_env_var_webhook("SOME_ENV_VAR") for _ in range(3)]
+    assert all(isinstance(n, DigestPipelineNotifier) for n in notifiers)
+    assert notifiers[0].digest is notifiers[2].digest
+
+    notifiers[0].success(source_id="id-1")
+    notifiers[1].failure(source_id="id-2")
+    assert stub.received == []
+    notifiers[2].success(source_id="id-3")
+
+    assert len(stub.received) == 1
+    assert "succeeded: 2, failed: 1" in stub.received[0]
+    assert "failed source IDs: [id-2]" in stub.received[0]
+    mp.undo()
+    stub.close()
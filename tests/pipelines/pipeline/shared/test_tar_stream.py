@@ -0,0 +1,192 @@
+import io
+import json
+import tarfile
+import threading
+
+import pytest
+
+from dpypelines.pipeline.shared.tar_stream import (
+    ExtractionCancelled,
+    StreamingTarExtractor,
+    member_name,
+    stream_s3_tar,
+)
+
+
+def make_tar(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, content in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+class GatedStream(io.RawIOBase):
+    """
+    A non seekable stream that stops after the first gate_at bytes until the gate is
+    opened, standing in for a download that is still in progress.
+    """
+
+    def __init__(self, data: bytes, gate_at: int):
+        self._data = io.BytesIO(data)
+        self._gate_at = gate_at
+        self.gate = threading.Event()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        position = self._data.tell()
+        size = len(buffer)
+        if position + size > self._gate_at:
+            if position >= self._gate_at:
+                self.gate.wait()
+            else:
+                size = self._gate_at - position
+        data = self._data.read(size)
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def test_member_name():
+    """
+    Ensures member names are made relative to the output directory, and names that
+    would be written outside of it are refused.
+    """
+    assert member_name("./manifest.json") == "manifest.json"
+    assert member_name("dir/data.xml") == "dir/data.xml"
+    for name in ["../data.xml", "/etc/passwd", "."]:
+        with pytest.raises(ValueError):
+            member_name(name)
+
+
+def test_streaming_tar_extractor_extracts_all_members(tmp_path):
+    """
+    Ensures every member is written to the output directory.
+    """
+    tar_bytes = make_tar({"manifest.json": b"{}", "data.xml": b"<a/>"})
+
+    extractor = StreamingTarExtractor(io.BytesIO(tar_bytes), tmp_path / "input")
+    paths = extractor.start().wait()
+
+    assert sorted(path.name for path in paths) == ["data.xml", "manifest.json"]
+    assert (tmp_path / "input" / "data.xml").read_bytes() == b"<a/>"
+
+
+def test_streaming_tar_extractor_member_available_before_tar_ends(tmp_path):
+    """
+    Ensures a member at the start of the tar can be used while the rest of the tar
+    has still not arrived.
+    """
+    data_xml = b"<a>" + b"x" * 100_000 + b"</a>"
+    tar_bytes = make_tar({"manifest.json": b'{"a": 1}', "data.xml": data_xml})
+    # let through the manifest and the start of data.xml
+    stream = GatedStream(tar_bytes, gate_at=2 * tarfile.RECORDSIZE)
+    extractor = StreamingTarExtractor(
+        io.BufferedReader(stream), tmp_path, copy_size=1024
+    ).start()
+
+    manifest_path = extractor.wait_for_member("manifest.json", timeout=5)
+    assert json.loads(manifest_path.read_text()) == {"a": 1}
+    assert "data.xml" not in extractor.extracted
+
+    stream.gate.set()
+    extractor.wait(timeout=5)
+    assert (tmp_path / "data.xml").read_bytes() == data_xml
+
+
+def test_streaming_tar_extractor_missing_member(tmp_path):
+    """
+    Ensures the correct error is raised when waiting for a member the tar does not
+    have.
+    """
+    tar_bytes = make_tar({"data.xml": b"<a/>"})
+    extractor = StreamingTarExtractor(io.BytesIO(tar_bytes), tmp_path).start()
+
+    with pytest.raises(FileNotFoundError) as err:
+        extractor.wait_for_member("manifest.json", timeout=5)
+    assert "No member manifest.json found in tar" in str(err.value)
+
+
+def test_streaming_tar_extractor_refuses_unsafe_members(tmp_path):
+    """
+    Ensures extraction fails on a member that would be written outside of the output
+    directory, and the error is raised when waiting.
+    """
+    tar_bytes = make_tar({"../data.xml": b"<a/>"})
+    extractor = StreamingTarExtractor(io.BytesIO(tar_bytes), tmp_path / "input")
+
+    with pytest.raises(ValueError):
+        extractor.start().wait()
+    assert not (tmp_path / "data.xml").exists()
+
+
+def test_stream_s3_tar(tmp_path):
+    """
+    Ensures a tar is extracted as it is read from s3.
+    """
+    boto3 = pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+    tar_bytes = make_tar({"manifest.json": b"{}", "data.xml": b"<a/>"})
+
+    with moto.mock_aws():
+        s3_client = boto3.client("s3", region_name="eu-west-2")
+        s3_client.create_bucket(
+            Bucket="my-bucket",
+            CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+        )
+        s3_client.put_object(Bucket="my-bucket", Key="my-data.tar", Body=tar_bytes)
+
+        extractor = stream_s3_tar("my-bucket/my-data.tar", tmp_path, s3_client)
+        extractor.wait(timeout=5)
+
+    assert (tmp_path / "manifest.json").read_bytes() == b"{}"
+    assert (tmp_path / "data.xml").read_bytes() == b"<a/>"
+
+
+def test_streaming_tar_extractor_pipes_members(tmp_path):
+    """
+    Ensures extraction holds after a member until released, and piped members are
+    passed to their consumer, only being written to disk when kept.
+    """
+    tar_bytes = make_tar(
+        {"manifest.json": b"{}", "data.xml": b"<a/>", "data.json": b"[]"}
+    )
+    extractor = StreamingTarExtractor(
+        io.BytesIO(tar_bytes), tmp_path, hold_after=["manifest.json"]
+    ).start()
+
+    extractor.wait_for_member("manifest.json", timeout=5)
+    assert extractor._thread.is_alive()
+    extractor.release(
+        pipes={
+            "^data.xml$": lambda fileobj, name: (name, fileobj.read()),
+            "^data.json$": lambda fileobj, name: fileobj.read(1),
+        },
+        keep=["^data.json$"],
+    )
+    extractor.wait(timeout=5)
+
+    assert extractor.piped == {"data.xml": ("data.xml", b"<a/>"), "data.json": b"["}
+    assert not (tmp_path / "data.xml").exists()
+    assert (tmp_path / "data.json").read_bytes() == b"[]"
+    assert sorted(extractor.extracted) == ["data.json", "manifest.json"]
+
+
+def test_streaming_tar_extractor_cancel_while_held(tmp_path):
+    """
+    Ensures a held extraction stops when cancelled.
+    """
+    tar_bytes = make_tar({"manifest.json": b"{}", "data.xml": b"<a/>"})
+    extractor = StreamingTarExtractor(
+        io.BytesIO(tar_bytes), tmp_path, hold_after=["manifest.json"]
+    ).start()
+
+    extractor.wait_for_member("manifest.json", timeout=5)
+    extractor.cancel()
+
+    with pytest.raises(ExtractionCancelled):
+        extractor.wait(timeout=5)
+    assert not (tmp_path / "data.xml").exists()
@@ -1,6 +1,11 @@
 import subprocess
 
-from dpypelines.pipeline.shared.utils import get_commit_id
+from dpypelines.pipeline.shared import utils
+from dpypelines.pipeline.shared.utils import (
+    get_build_info,
+    get_commit_id,
+    get_environment,
+)
 
 
 def test_get_commit_id():
@@ -11,3 +16,34 @@ def test_get_commit_id():
     )
     utils_commit_hash = get_commit_id()
     assert git_cli_commit_hash == utils_commit_hash
+
+
+def test_get_build_info_from_build_info_file(tmp_path, monkeypatch):
+    build_info_file = tmp_path / "build_info.json"
+    build_info_file.write_text('{"commit_id": "abc123", "environment": "staging"}')
+    monkeypatch.setenv("BUILD_INFO_FILE", str(build_info_file))
+    monkeypatch.setenv("COMMIT_ID", "not-used")
+    monkeypatch.setattr(utils, "_build_info", None)
+
+    assert get_build_info() == {"commit_id": "abc123", "environment": "staging"}
+
+
+def test_get_build_info_from_env_vars(tmp_path, monkeypatch):
+    monkeypatch.setenv("BUILD_INFO_FILE", str(tmp_path / "missing.json"))
+    monkeypatch.setenv("COMMIT_ID", "def456")
+    monkeypatch.setenv("ENVIRONMENT", "sandbox")
+    monkeypatch.setattr(utils, "_build_info", None)
+
+    assert get_commit_id() == "def456"
+    assert get_environment() == "sandbox"
+
+
+def test_get_build_info_is_resolved_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("BUILD_INFO_FILE", str(tmp_path / "missing.json"))
+    monkeypatch.setenv("COMMIT_ID", "def456")
+    monkeypatch.setenv("ENVIRONMENT", "sandbox")
+    monkeypatch.setattr(utils, "_build_info", None)
+    get_build_info()
+
+    monkeypatch.setenv("COMMIT_ID", "changed")
+    assert get_commit_id() == "def456"
@@ -0,0 +1,201 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from dpypelines.pipeline.shared.transforms.sdmx.compact.v20.prototype.v1 import (
+    xmlToCsvSDMX2_0,
+    xmlToCsvSDMX2_0_streaming,
+)
+from dpypelines.pipeline.shared.transforms.sdmx.generate_versions_metadata import (
+    generate_versions_metadata,
+    generate_versions_metadata_from_statistics,
+)
+from dpypelines.pipeline.shared.transforms.statistics import TransformStatistics
+
+test_dir = Path(__file__).parents[5]
+fixtures_files_dir = Path(test_dir / "fixtures/test-cases")
+
+
+def test_xml_to_csv_sdmx_2_0_streaming_matches_xml_to_csv_sdmx_2_0(tmp_path):
+    """
+    Checks that the streaming transform writes the same csv as the dataframe based
+    transform.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform.xml")
+    expected_csv = Path(tmp_path / "expected.csv")
+    streamed_csv = Path(tmp_path / "streamed.csv")
+
+    xmlToCsvSDMX2_0(fixture_file, expected_csv)
+    number_of_obs = xmlToCsvSDMX2_0_streaming(fixture_file, streamed_csv)
+
+    assert number_of_obs == 24
+    assert streamed_csv.read_text() == expected_csv.read_text()
+
+
+def test_xml_to_csv_sdmx_2_0_streaming_small_batch_size(tmp_path):
+    """
+    Checks that the csv written is the same whatever the batch size.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform.xml")
+    expected_csv = Path(tmp_path / "expected.csv")
+    streamed_csv = Path(tmp_path / "streamed.csv")
+
+    xmlToCsvSDMX2_0(fixture_file, expected_csv)
+    number_of_obs = xmlToCsvSDMX2_0_streaming(fixture_file, streamed_csv, batch_size=5)
+
+    assert number_of_obs == 24
+    assert streamed_csv.read_text() == expected_csv.read_text()
+
+
+def test_xml_to_csv_sdmx_2_0_streaming_parquet_output(tmp_path):
+    """
+    Checks that the parquet written alongside the csv holds the same data, and that
+    the version metadata generated from either is the same.
+    """
+    pytest.importorskip("pyarrow")
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform.xml")
+    csv_path = Path(tmp_path / "data.csv")
+    parquet_path = Path(tmp_path / "data.parquet")
+
+    xmlToCsvSDMX2_0_streaming(fixture_file, csv_path, parquet_path=parquet_path)
+
+    csv_df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    parquet_df = pd.read_parquet(parquet_path)
+    assert list(parquet_df.columns) == list(csv_df.columns)
+    assert parquet_df.astype(str).equals(csv_df)
+    assert generate_versions_metadata(
+        parquet_path, tmp_path / "parquet_metadata.json"
+    ) == generate_versions_metadata(csv_path, tmp_path / "csv_metadata.json")
+
+
+def test_xml_to_csv_sdmx_2_0_streaming_statistics(tmp_path):
+    """
+    Checks that the version metadata generated from the statistics collected while
+    streaming is the same as the metadata generated from the csv written.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform.xml")
+    csv_path = Path(tmp_path / "data.csv")
+    statistics = TransformStatistics()
+
+    xmlToCsvSDMX2_0_streaming(fixture_file, csv_path, statistics=statistics)
+
+    assert len(statistics) == 24
+    assert generate_versions_metadata_from_statistics(
+        statistics, tmp_path / "statistics_metadata.json"
+    ) == generate_versions_metadata(csv_path, tmp_path / "csv_metadata.json")
+
+
+def test_generate_versions_metadata_in_chunks(tmp_path):
+    """
+    Checks that the version metadata is the same however many chunks the csv is
+    read in.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform.xml")
+    csv_path = Path(tmp_path / "data.csv")
+    xmlToCsvSDMX2_0_streaming(fixture_file, csv_path)
+
+    assert generate_versions_metadata(
+        csv_path, tmp_path / "chunked_metadata.json", chunk_size=5
+    ) == generate_versions_metadata(csv_path, tmp_path / "metadata.json")
+
+
+def test_xml_to_csv_sdmx_2_0_streaming_no_obs_found(tmp_path):
+    fixture_file = Path(
+        fixtures_files_dir / "test_validate_transform_incorrect_obs.xml"
+    )
+
+    with pytest.raises(AssertionError) as err:
+        xmlToCsvSDMX2_0_streaming(fixture_file, Path(tmp_path / "data.csv"))
+
+    assert (
+        "could not count any observations, likely due to incorrect xml format"
+        in str(err.value)
+    )
+
+
+def test_xml_to_csv_sdmx_2_0_streaming_mismatched_obs_attributes(tmp_path):
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform.xml")
+    xml_content = fixture_file.read_text().replace(' CONF_STATUS="F" />', " />", 1)
+    input_file = Path(tmp_path / "data.xml")
+    input_file.write_text(xml_content)
+
+    with pytest.raises(AssertionError) as err:
+        xmlToCsvSDMX2_0_streaming(input_file, Path(tmp_path / "data.csv"))
+
+    assert "Obs attributes" in str(err.value)
+
+
+def test_xml_to_csv_sdmx_2_0_streaming_obs_count_mismatch(tmp_path):
+    """
+    Checks that the rows written are compared with the Obs tags counted while
+    streaming, so an Obs that is never parsed (here one in a comment) is caught.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform.xml")
+    xml_content = fixture_file.read_text().replace(
+        "</na_:Series>", '<!-- <na_:Obs TIME_PERIOD="1900" /> --></na_:Series>', 1
+    )
+    input_file = Path(tmp_path / "data.xml")
+    input_file.write_text(xml_content)
+
+    with pytest.raises(AssertionError) as err:
+        xmlToCsvSDMX2_0_streaming(input_file, Path(tmp_path / "data.csv"))
+
+    assert "expected number of observations is 25 but 24 were written" in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "replace, expected_message",
+    [
+        (
+            ("</na_:Series>", '</na_:Series><na_:Obs TIME_PERIOD="1900" />'),
+            "Obs found outside of a Series in xml data",
+        ),
+        (
+            ("</na_:DataSet>", "</na_:DataSet><na_:Series></na_:Series>"),
+            "Series found outside of a DataSet in xml data",
+        ),
+    ],
+)
+def test_xml_to_csv_sdmx_2_0_streaming_element_outside_parent(
+    tmp_path, replace, expected_message
+):
+    """
+    Checks that an Obs that is not in a Series, or a Series that is not in a
+    DataSet, fails with a message naming it.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform.xml")
+    xml_content = fixture_file.read_text().replace(*replace, 1)
+    input_file = Path(tmp_path / "data.xml")
+    input_file.write_text(xml_content)
+
+    with pytest.raises(AssertionError) as err:
+        xmlToCsvSDMX2_0_streaming(input_file, Path(tmp_path / "data.csv"))
+
+    assert expected_message in str(err.value)
+
+
+def test_xml_to_csv_sdmx_2_0_streaming_incorrect_xml_type(tmp_path):
+    input_file = Path(tmp_path / "data.xml")
+    input_file.write_text('<?xml version="1.0"?><GenericData></GenericData>')
+
+    with pytest.raises(AssertionError) as err:
+        xmlToCsvSDMX2_0_streaming(input_file, Path(tmp_path / "data.csv"))
+
+    assert "could not find 'CompactData' in xml data" in str(err.value)
+
+
+def test_xml_to_csv_sdmx_2_0_streaming_output_is_tidy(tmp_path):
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform.xml")
+    output_file = Path(tmp_path / "data.csv")
+
+    xmlToCsvSDMX2_0_streaming(fixture_file, output_file)
+    df = pd.read_csv(output_file)
+
+    assert "Name xml:lang" in df.columns
+    assert list(df.columns[-4:]) == [
+        "TIME_PERIOD",
+        "OBS_VALUE",
+        "OBS_STATUS",
+        "CONF_STATUS",
+    ]
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import pytest
+
+from dpypelines.pipeline.shared.transforms.sdmx.dispatch import sdmx_prototype_1
+from dpypelines.pipeline.shared.transforms.sdmx.flavour import (
+    COMPACT_SDMX_V2_0,
+    GENERIC_SDMX_V2_1,
+    detect_sdmx_flavour,
+    sdmx_version,
+)
+
+test_dir = Path(__file__).parents[5]
+fixtures_files_dir = Path(test_dir / "fixtures/test-cases")
+
+
+def test_sdmx_version():
+    assert (
+        sdmx_version("http://www.SDMX.org/resources/SDMXML/schemas/v2_0/message")
+        == "2.0"
+    )
+    assert (
+        sdmx_version("http://www.sdmx.org/resources/sdmxml/schemas/v2_1/message")
+        == "2.1"
+    )
+    assert sdmx_version("http://www.w3.org/2001/XMLSchema-instance") is None
+
+
+def test_detect_sdmx_flavour():
+    assert (
+        detect_sdmx_flavour(fixtures_files_dir / "test_validate_transform.xml")
+        == COMPACT_SDMX_V2_0
+    )
+    assert (
+        detect_sdmx_flavour(fixtures_files_dir / "test_validate_transform_v21.xml")
+        == GENERIC_SDMX_V2_1
+    )
+
+
+def test_detect_sdmx_flavour_unsupported(tmp_path):
+    xml_file = Path(tmp_path / "data.xml")
+    # generic data, but in the sdmx 2.0 message namespace
+    xml_file.write_text(
+        '<?xml version="1.0"?><GenericData '
+        'xmlns="http://www.SDMX.org/resources/SDMXML/schemas/v2_0/message"/>'
+    )
+    with pytest.raises(ValueError) as err:
+        detect_sdmx_flavour(xml_file)
+    assert "is not a supported sdmx message" in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "fixture_name,number_of_rows",
+    [("test_validate_transform.xml", 24), ("test_validate_transform_v21.xml", 3)],
+)
+def test_sdmx_prototype_1_routes_by_root_element(
+    tmp_path, monkeypatch, fixture_name, number_of_rows
+):
+    """
+    Checks that either flavour of sdmx is transformed by the same transform.
+    """
+    fixture_file = Path(fixtures_files_dir / fixture_name)
+    monkeypatch.chdir(tmp_path)
+    csv_out, metadata_out = sdmx_prototype_1(fixture_file)
+
+    assert Path(tmp_path / csv_out).exists()
+    assert Path(tmp_path / metadata_out).exists()
+    assert len(Path(tmp_path / csv_out).read_text().splitlines()) == number_of_rows + 1
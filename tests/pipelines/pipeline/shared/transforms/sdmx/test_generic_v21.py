@@ -0,0 +1,154 @@
+import tarfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from dpypelines.pipeline.shared.transforms.sdmx.generic.v21.prototype.v1 import (
+    xmlToCsvSDMX2_1_streaming,
+)
+
+test_dir = Path(__file__).parents[5]
+fixtures_files_dir = Path(test_dir / "fixtures/test-cases")
+
+
+def test_xml_to_csv_sdmx_2_1_streaming_single_series(tmp_path):
+    """
+    Checks that a file with a single generic:Series is transformed into one row per
+    generic:Obs, with the header, series and observation columns in order.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform_v21.xml")
+    output_file = Path(tmp_path / "data.csv")
+
+    number_of_obs = xmlToCsvSDMX2_1_streaming(fixture_file, output_file)
+    df = pd.read_csv(output_file, dtype=str)
+
+    assert number_of_obs == 3
+    assert len(df) == 3
+    assert list(df.columns[:3]) == ["ID", "Test", "Prepared"]
+    assert "Structure Structure Ref agencyID" in df.columns
+    assert list(df.columns[-4:]) == [
+        "OBS_STATUS",
+        "CONF_STATUS",
+        "TIME_PERIOD",
+        "OBS_VALUE",
+    ]
+    assert df["REF_AREA"].unique().tolist() == ["GB"]
+    assert df["OBS_VALUE"].tolist() == ["18415", "18032", "17262"]
+
+
+def test_xml_to_csv_sdmx_2_1_streaming_renames_obs_columns(tmp_path):
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform_v21.xml")
+    output_file = Path(tmp_path / "data.csv")
+
+    xmlToCsvSDMX2_1_streaming(fixture_file, output_file)
+    df = pd.read_csv(output_file)
+
+    assert list(df.columns[-2:]) == ["TIME_PERIOD", "OBS_VALUE"]
+    assert df["TIME_PERIOD"].iloc[0] == 1997
+
+
+def test_xml_to_csv_sdmx_2_1_streaming_mismatched_obs_keys(tmp_path):
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform_v21.xml")
+    xml_content = fixture_file.read_text()
+    last_obs_status = xml_content.rindex('<generic:Value id="OBS_STATUS"')
+    xml_content = xml_content[:last_obs_status] + xml_content[last_obs_status:].replace(
+        'id="OBS_STATUS"', 'id="OTHER"', 1
+    )
+    input_file = Path(tmp_path / "data.xml")
+    input_file.write_text(xml_content)
+
+    with pytest.raises(AssertionError) as err:
+        xmlToCsvSDMX2_1_streaming(input_file, Path(tmp_path / "data.csv"))
+
+    assert "not all keys in obs_dicts are the same" in str(err.value)
+
+
+def test_xml_to_csv_sdmx_2_1_streaming_series_and_obs_share_an_id(tmp_path):
+    """
+    Checks that a generic:Value id given by both a generic:Series and its
+    generic:Obs fails, rather than writing two columns with the same name.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform_v21.xml")
+    xml_content = fixture_file.read_text().replace('id="OBS_STATUS"', 'id="REF_AREA"')
+    input_file = Path(tmp_path / "data.xml")
+    input_file.write_text(xml_content)
+
+    with pytest.raises(AssertionError) as err:
+        xmlToCsvSDMX2_1_streaming(input_file, Path(tmp_path / "data.csv"))
+
+    assert "REF_AREA is duplicated in series_values and obs_values" in str(err.value)
+
+
+def test_xml_to_csv_sdmx_2_1_streaming_obs_count_mismatch(tmp_path):
+    """
+    Checks that the rows written are compared with the generic:Obs tags counted
+    while streaming, so an Obs that is never parsed (here one in a comment) is
+    caught.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform_v21.xml")
+    xml_content = fixture_file.read_text().replace(
+        "</generic:Series>",
+        "<!-- <generic:Obs></generic:Obs> --></generic:Series>",
+        1,
+    )
+    input_file = Path(tmp_path / "data.xml")
+    input_file.write_text(xml_content)
+
+    with pytest.raises(AssertionError) as err:
+        xmlToCsvSDMX2_1_streaming(input_file, Path(tmp_path / "data.csv"))
+
+    assert "expected number of observations is 4 but 3 were written" in str(err.value)
+
+
+def test_xml_to_csv_sdmx_2_1_streaming_value_outside_series(tmp_path):
+    """
+    Checks that a generic:Value that is not in a generic:Series or generic:Obs
+    fails with a message naming it.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform_v21.xml")
+    xml_content = fixture_file.read_text().replace(
+        "</generic:Series>",
+        '</generic:Series><generic:Value id="STRAY" value="x"/>',
+        1,
+    )
+    input_file = Path(tmp_path / "data.xml")
+    input_file.write_text(xml_content)
+
+    with pytest.raises(AssertionError) as err:
+        xmlToCsvSDMX2_1_streaming(input_file, Path(tmp_path / "data.csv"))
+
+    assert (
+        "generic:Value STRAY found outside of a generic:Series or generic:Obs"
+        in str(err.value)
+    )
+
+
+def test_xml_to_csv_sdmx_2_1_streaming_incorrect_xml_type(tmp_path):
+    input_file = Path(tmp_path / "data.xml")
+    input_file.write_text('<?xml version="1.0"?><CompactData></CompactData>')
+
+    with pytest.raises(AssertionError) as err:
+        xmlToCsvSDMX2_1_streaming(input_file, Path(tmp_path / "data.csv"))
+
+    assert "could not find 'GenericData' in xml data" in str(err.value)
+
+
+def test_xml_to_csv_sdmx_2_1_streaming_from_file_object(tmp_path):
+    """
+    Checks that a file object that can only be read through once, such as a tar
+    member, is transformed the same as the file itself.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform_v21.xml")
+    expected_csv = Path(tmp_path / "expected.csv")
+    streamed_csv = Path(tmp_path / "streamed.csv")
+
+    xmlToCsvSDMX2_1_streaming(fixture_file, expected_csv)
+    with tarfile.open(tmp_path / "input.tar", "w") as tar:
+        tar.add(fixture_file, arcname="data.xml")
+    with tarfile.open(tmp_path / "input.tar", "r|") as tar:
+        member = next(iter(tar))
+        number_of_obs = xmlToCsvSDMX2_1_streaming(tar.extractfile(member), streamed_csv)
+
+    assert number_of_obs == 3
+    assert streamed_csv.read_text() == expected_csv.read_text()
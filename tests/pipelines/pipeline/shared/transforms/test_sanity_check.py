@@ -1,8 +1,18 @@
+import io
 from pathlib import Path
 
 import pytest
 
-from dpypelines.pipeline.shared.transforms.sanity_check import sdmx_sanity_check_v1
+from dpypelines.pipeline.shared.transforms.sanity_check import (
+    sdmx_compact_2_0_sanity_check_v1,
+    sdmx_generic_2_1_sanity_check_v1,
+    sdmx_sanity_check_v1,
+    sdmx_supported_sanity_check_v1,
+)
+from dpypelines.pipeline.shared.transforms.sniff import SniffedStream
+
+test_dir = Path(__file__).parents[4]
+fixtures_files_dir = Path(test_dir / "fixtures/test-cases")
 
 
 def test_sdmx_sanity_check_v1_file_extension():
@@ -15,3 +25,45 @@ def test_sdmx_sanity_check_v1_read_xml():
     with pytest.raises(Exception) as e:
         sdmx_sanity_check_v1(Path("data.xml"))
     assert "Failed to read in xml" in str(e.value)
+
+
+def test_sdmx_compact_2_0_sanity_check_v1():
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform.xml")
+    sniff = sdmx_compact_2_0_sanity_check_v1(fixture_file)
+    assert sniff.root_name == "CompactData"
+
+
+def test_sdmx_compact_2_0_sanity_check_v1_wrong_flavour():
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform_v21.xml")
+    with pytest.raises(AssertionError) as e:
+        sdmx_compact_2_0_sanity_check_v1(fixture_file)
+    assert "Expected compact_sdmx_v2_0 sdmx_file" in str(e.value)
+    assert "generic_sdmx_v2_1" in str(e.value)
+
+
+def test_sdmx_generic_2_1_sanity_check_v1_wrong_flavour():
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform.xml")
+    with pytest.raises(AssertionError) as e:
+        sdmx_generic_2_1_sanity_check_v1(fixture_file)
+    assert "Expected generic_sdmx_v2_1 sdmx_file" in str(e.value)
+
+
+def test_sdmx_supported_sanity_check_v1_unsupported(tmp_path):
+    xml_file = Path(tmp_path / "data.xml")
+    xml_file.write_text('<?xml version="1.0"?><Structure><a/></Structure>')
+    with pytest.raises(AssertionError) as e:
+        sdmx_supported_sanity_check_v1(xml_file)
+    assert "Unsupported sdmx_file" in str(e.value)
+
+
+def test_sdmx_compact_2_0_sanity_check_v1_wrong_flavour_stream():
+    """
+    Checks that a stream that fails the sanity check is named in the error by
+    the tar member it was read from.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform_v21.xml")
+    stream = SniffedStream(io.BytesIO(fixture_file.read_bytes()), name="data.xml")
+    with pytest.raises(AssertionError) as e:
+        sdmx_compact_2_0_sanity_check_v1(stream)
+    assert str(e.value).endswith(" - data.xml")
+    assert repr(stream) == "SniffedStream(name='data.xml')"
@@ -0,0 +1,113 @@
+import io
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from dpypelines.pipeline.shared.transforms.sniff import (
+    SniffedStream,
+    sniff_xml,
+    sniffable,
+)
+
+test_dir = Path(__file__).parents[4]
+fixtures_files_dir = Path(test_dir / "fixtures/test-cases")
+
+
+def test_sniff_xml_compact_sdmx():
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform.xml")
+
+    sniff = sniff_xml(fixture_file)
+
+    assert sniff.has_declaration
+    assert sniff.encoding == "utf-8"
+    assert sniff.root_tag == "CompactData"
+    assert sniff.root_name == "CompactData"
+    assert (
+        sniff.root_namespace
+        == "http://www.SDMX.org/resources/SDMXML/schemas/v2_0/message"
+    )
+
+
+def test_sniff_xml_generic_sdmx():
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform_v21.xml")
+
+    sniff = sniff_xml(fixture_file)
+
+    assert sniff.root_tag == "message:GenericData"
+    assert sniff.root_name == "GenericData"
+    assert sniff.root_namespace == sniff.namespaces["message"]
+
+
+def test_sniff_xml_reads_only_the_start(tmp_path):
+    xml_file = Path(tmp_path / "data.xml")
+    # the rest of the file is not well formed, but is never read
+    xml_file.write_text(
+        '<?xml version="1.0" encoding="ISO-8859-1"?>\n'
+        '<a:Root xmlns:a="urn:a">' + "<a:Obs/>" * 10_000 + "<<<"
+    )
+
+    sniff = sniff_xml(xml_file, sniff_size=64)
+
+    assert sniff.encoding == "iso-8859-1"
+    assert sniff.root_tag == "a:Root"
+    assert sniff.namespaces == {"a": "urn:a"}
+
+
+def test_sniff_xml_utf16_with_bom(tmp_path):
+    xml_file = Path(tmp_path / "data.xml")
+    xml_file.write_text('<?xml version="1.0"?><CompactData/>', encoding="utf-16")
+
+    sniff = sniff_xml(xml_file)
+
+    assert sniff.encoding.startswith("utf-16")
+    assert sniff.has_declaration
+    assert sniff.root_tag == "CompactData"
+
+
+def test_sniff_xml_is_cached_until_the_file_changes(tmp_path):
+    xml_file = Path(tmp_path / "data.xml")
+    xml_file.write_text('<?xml version="1.0"?><CompactData/>')
+
+    sniff = sniff_xml(xml_file)
+    assert sniff_xml(xml_file) is sniff
+
+    xml_file.write_text('<?xml version="1.0"?><GenericData></GenericData>')
+    assert sniff_xml(xml_file).root_tag == "GenericData"
+
+
+def test_sniff_xml_not_xml(tmp_path):
+    csv_file = Path(tmp_path / "data.xml")
+    csv_file.write_text("ID,OBS_VALUE\nT1500,1\n")
+
+    with pytest.raises(ET.ParseError):
+        sniff_xml(csv_file)
+
+
+def test_sniffed_stream_replays_the_start():
+    """
+    Checks that a stream can be sniffed and then read from the start.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_transform_v21.xml")
+    content = fixture_file.read_bytes()
+    stream = SniffedStream(io.BytesIO(content), name="data.xml", sniff_size=256)
+
+    assert sniff_xml(stream) == sniff_xml(fixture_file)
+    assert stream.read() == content
+    assert stream.name == "data.xml"
+
+
+def test_sniffed_stream_not_xml():
+    stream = SniffedStream(io.BytesIO(b"not xml at all"))
+
+    with pytest.raises(ET.ParseError):
+        sniff_xml(stream)
+    assert stream.read() == b"not xml at all"
+
+
+def test_sniffable(tmp_path):
+    stream = SniffedStream(io.BytesIO(b"<a/>"))
+
+    assert sniffable(str(tmp_path)) == tmp_path
+    assert sniffable(stream) is stream
+    assert isinstance(sniffable(io.BytesIO(b"<a/>")), SniffedStream)
@@ -0,0 +1,60 @@
+import pandas as pd
+
+from dpypelines.pipeline.shared.transforms.statistics import TransformStatistics
+
+
+def _streamed_statistics() -> TransformStatistics:
+    statistics = TransformStatistics()
+    statistics.begin(
+        ["TITLE", "REF_AREA", "COUNTERPART_AREA", "TIME_PERIOD", "TIME_FORMAT"],
+        ["GDP"],
+    )
+    statistics.start_run(["GB", "W0"])
+    statistics.append(["1998", "P1Y"])
+    statistics.append(["1997", "P1Y"])
+    statistics.start_run(["FR", "W2"])  # a run with no rows is not counted
+    statistics.start_run(["DE", ""])
+    statistics.append(["2001", "P3M"])
+    return statistics
+
+
+def test_transform_statistics_from_rows():
+    """
+    Checks that constant, run and row values are folded into the aggregates, and
+    that blank values and runs without rows are left out.
+    """
+    statistics = _streamed_statistics()
+
+    assert len(statistics) == 3
+    assert statistics.first_values == {"TITLE": "GDP"}
+    assert statistics.unique("REF_AREA") == ["GB", "DE"]
+    assert statistics.unique("COUNTERPART_AREA") == ["W0"]
+    assert statistics.unique("TIME_FORMAT") == ["P1Y", "P3M"]
+    assert statistics.min_values == {"TIME_PERIOD": "1997"}
+    assert statistics.max_values == {"TIME_PERIOD": "2001"}
+
+
+def test_transform_statistics_from_dataframes():
+    """
+    Checks that folding in a table as DataFrame chunks gives the same aggregates as
+    adding its rows one at a time.
+    """
+    df = pd.DataFrame(
+        {
+            "TITLE": ["GDP", "GDP", "GDP"],
+            "REF_AREA": ["GB", "GB", "DE"],
+            "COUNTERPART_AREA": ["W0", "W0", ""],
+            "TIME_PERIOD": ["1998", "1997", "2001"],
+            "TIME_FORMAT": ["P1Y", "P1Y", "P3M"],
+        }
+    )
+    statistics = TransformStatistics()
+    statistics.update(df.iloc[:2])
+    statistics.update(df.iloc[2:])
+
+    streamed = _streamed_statistics()
+    assert len(statistics) == len(streamed)
+    assert statistics.first_values == streamed.first_values
+    assert statistics.unique_values == streamed.unique_values
+    assert statistics.min_values == streamed.min_values
+    assert statistics.max_values == streamed.max_values
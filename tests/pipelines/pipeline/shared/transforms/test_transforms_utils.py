@@ -0,0 +1,229 @@
+import pandas as pd
+import pytest
+
+from dpypelines.pipeline.shared.transforms.utils import (
+    ColumnBuffer,
+    StartTagCounter,
+    count_xml_start_tags,
+    csv_prefix,
+    iter_table_chunks,
+    read_column_names,
+    read_table,
+)
+
+
+def test_column_buffer_to_dataframe():
+    """
+    Checks that run values are broadcast to every row of their run and that row
+    values are kept in order.
+    """
+    buffer = ColumnBuffer(["FREQ", "REF_AREA"], ["TIME_PERIOD", "OBS_VALUE"])
+    buffer.start_run(["A", "GB"])
+    buffer.append(["1997", "1"])
+    buffer.append(["1998", "2"])
+    buffer.start_run(["Q", "FR"])
+    buffer.append(["1997-Q1", "3"])
+
+    df = buffer.to_dataframe()
+
+    assert len(buffer) == 3
+    assert list(df.columns) == ["FREQ", "REF_AREA", "TIME_PERIOD", "OBS_VALUE"]
+    assert df.to_dict(orient="list") == {
+        "FREQ": ["A", "A", "Q"],
+        "REF_AREA": ["GB", "GB", "FR"],
+        "TIME_PERIOD": ["1997", "1998", "1997-Q1"],
+        "OBS_VALUE": ["1", "2", "3"],
+    }
+
+
+def test_column_buffer_constants_are_broadcast():
+    """
+    Checks that constant columns come first, hold their value for every row and are
+    stored as a single category rather than a copy per row.
+    """
+    buffer = ColumnBuffer(["FREQ"], ["OBS_VALUE"], constants={"ID": "T1500"})
+    buffer.start_run(["A"])
+    buffer.append(["1"])
+    buffer.append(["2"])
+
+    df = buffer.to_dataframe()
+
+    assert list(df.columns) == ["ID", "FREQ", "OBS_VALUE"]
+    assert df["ID"].tolist() == ["T1500", "T1500"]
+    assert isinstance(df["ID"].dtype, pd.CategoricalDtype)
+    assert list(df["ID"].cat.categories) == ["T1500"]
+
+
+def test_column_buffer_grows_past_capacity():
+    buffer = ColumnBuffer(["FREQ"], ["OBS_VALUE"], capacity=2)
+    buffer.start_run(["A"])
+    for i in range(5):
+        buffer.append([str(i)])
+
+    df = buffer.to_dataframe()
+
+    assert len(df) == 5
+    assert df["OBS_VALUE"].tolist() == ["0", "1", "2", "3", "4"]
+
+
+def test_column_buffer_typed_row_columns():
+    buffer = ColumnBuffer([], ["OBS_VALUE"], dtypes={"OBS_VALUE": "float64"})
+    buffer.append([1.5])
+    buffer.append([2])
+
+    df = buffer.to_dataframe()
+
+    assert df["OBS_VALUE"].dtype == "float64"
+    assert df["OBS_VALUE"].tolist() == [1.5, 2.0]
+
+
+def test_column_buffer_empty_run():
+    buffer = ColumnBuffer(["FREQ"], ["OBS_VALUE"])
+    buffer.start_run(["A"])
+    buffer.start_run(["Q"])
+    buffer.append(["1"])
+
+    assert buffer.to_dataframe().to_dict(orient="list") == {
+        "FREQ": ["Q"],
+        "OBS_VALUE": ["1"],
+    }
+
+
+def test_column_buffer_incorrect_number_of_run_values():
+    buffer = ColumnBuffer(["FREQ", "REF_AREA"], ["OBS_VALUE"])
+
+    with pytest.raises(AssertionError) as err:
+        buffer.start_run(["A"])
+
+    assert "expected 2 run values but got 1" in str(err.value)
+
+
+def test_column_buffer_incorrect_number_of_row_values():
+    buffer = ColumnBuffer(["FREQ"], ["TIME_PERIOD", "OBS_VALUE"])
+    buffer.start_run(["A"])
+
+    for values in [["1997"], ["1997", "18415", "extra"]]:
+        with pytest.raises(ValueError) as err:
+            buffer.append(values)
+        assert f"expected 2 row values but got {len(values)}" in str(err.value)
+
+    assert len(buffer) == 0
+
+
+def test_column_buffer_to_arrow():
+    pa = pytest.importorskip("pyarrow")
+    buffer = ColumnBuffer(["FREQ"], ["OBS_VALUE"], constants={"ID": "T1500"})
+    buffer.start_run(["A"])
+    buffer.append(["1"])
+    buffer.start_run(["Q"])
+    buffer.append(["2"])
+    buffer.start_run(["A"])
+    buffer.append(["3"])
+
+    table = buffer.to_arrow()
+
+    assert table.column_names == ["ID", "FREQ", "OBS_VALUE"]
+    assert table.column("ID").to_pylist() == ["T1500", "T1500", "T1500"]
+
+    assert pa.types.is_dictionary(table.schema.field("FREQ").type)
+    assert table.column("FREQ").combine_chunks().dictionary.to_pylist() == ["A", "Q"]
+    assert table.to_pandas()["FREQ"].astype(str).tolist() == ["A", "Q", "A"]
+    assert table.column("OBS_VALUE").to_pylist() == ["1", "2", "3"]
+    assert isinstance(table.to_pandas(), pd.DataFrame)
+
+
+def test_csv_prefix():
+    assert csv_prefix(["a", "b,c", ""]) == 'a,"b,c",,'
+    assert csv_prefix([""]) == ","
+    assert csv_prefix([]) == ""
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_read_table_columns(tmp_path, suffix):
+    """
+    Checks that only the given columns are read from a csv or parquet file, and
+    that all column names can be read without the rows.
+    """
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow")
+    path = tmp_path / f"data{suffix}"
+    df = pd.DataFrame(
+        {"TITLE": ["a", "a"], "FREQ": ["A", "Q"], "OBS_VALUE": ["1", "2"]}
+    )
+    if suffix == ".parquet":
+        df.to_parquet(path)
+    else:
+        df.to_csv(path, index=False)
+
+    assert read_column_names(path) == ["TITLE", "FREQ", "OBS_VALUE"]
+    assert read_table(path, columns=["FREQ", "OBS_VALUE"]).equals(
+        df[["FREQ", "OBS_VALUE"]]
+    )
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_iter_table_chunks(tmp_path, suffix):
+    """
+    Checks that a csv or parquet file is read as chunks of at most chunk_size rows
+    holding only the given columns.
+    """
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow")
+    path = tmp_path / f"data{suffix}"
+    df = pd.DataFrame({"FREQ": ["A", "Q", "M"], "OBS_VALUE": ["1", "", "3"]})
+    if suffix == ".parquet":
+        df.to_parquet(path)
+    else:
+        df.to_csv(path, index=False)
+
+    chunks = list(iter_table_chunks(path, columns=["OBS_VALUE"], chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert list(pd.concat(chunks, ignore_index=True)["OBS_VALUE"]) == ["1", "", "3"]
+    assert all(list(chunk.columns) == ["OBS_VALUE"] for chunk in chunks)
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_count_xml_start_tags(tmp_path, max_workers):
+    """
+    Checks that every element is counted, including several on one line, and that
+    elements whose names only start with the tag are not.
+    """
+    xml_file = tmp_path / "data.xml"
+    xml_file.write_bytes(
+        b'<na_:DataSet><na_:Series FREQ="A">'
+        + b'<na_:Obs TIME_PERIOD="1997"/><na_:Obs\nTIME_PERIOD="1998"/>' * 5
+        + b"<na_:Obs></na_:Obs><na_:ObsDimension/>"
+        + b"</na_:Series></na_:DataSet>"
+    )
+
+    assert count_xml_start_tags(xml_file, "na_:Obs", max_workers=max_workers) == 11
+    assert count_xml_start_tags(xml_file, "na_:Series", max_workers=max_workers) == 1
+
+
+def test_count_xml_start_tags_empty_file(tmp_path):
+    xml_file = tmp_path / "data.xml"
+    xml_file.write_bytes(b"")
+
+    assert count_xml_start_tags(xml_file, "na_:Obs") == 0
+
+
+def test_start_tag_counter_matches_count_xml_start_tags(tmp_path):
+    """
+    Checks that tags are counted as they are read, including tags split across
+    reads, giving the same count as count_xml_start_tags.
+    """
+    xml_file = tmp_path / "data.xml"
+    xml_file.write_bytes(
+        b'<na_:DataSet><na_:Series FREQ="A">'
+        + b'<na_:Obs TIME_PERIOD="1997"/><na_:Obs\nTIME_PERIOD="1998"/>' * 5
+        + b"<na_:Obs></na_:Obs><na_:ObsDimension/>"
+        + b"</na_:Series></na_:DataSet>"
+    )
+
+    for read_size in [1, 3, 7, 1024]:
+        with open(xml_file, "rb") as f:
+            counter = StartTagCounter(f, "na_:Obs")
+            while counter.read(read_size):
+                pass
+        assert counter.count == count_xml_start_tags(xml_file, "na_:Obs") == 11
@@ -4,11 +4,21 @@ import pandas as pd
 import pytest
 
 from dpypelines.pipeline.shared.transforms.validate_csv import (
+    BaseCsvRule,
+    BlankValueCounter,
+    CsvChunkIndex,
+    CsvValidator,
+    DuplicateRowDetector,
+    NoBlanksRule,
+    NoDuplicatesRule,
+    _blank_value_report,
     _correct_columns_exist,
+    _csv_has_no_duplicates,
     _dataframe_has_no_blanks,
     _dataframe_has_no_duplicates,
     _read_in_csv_check,
     generated_dataframe_slices,
+    validate_csv,
 )
 
 test_dir = Path(__file__).parents[4]
@@ -47,6 +57,23 @@ def test_correct_columns_exist_incorrect_number_of_columns():
     )
 
 
+def test_correct_columns_exist_parquet_file(tmp_path):
+    pytest.importorskip("pyarrow")
+    parquet_file = Path(tmp_path / "data.parquet")
+    pd.read_csv(Path(fixtures_files_dir / "test_validate_csv_data.csv")).to_parquet(
+        parquet_file
+    )
+    columns = ["OBS_VALUE", "OBS_STATUS"]
+
+    with pytest.raises(AssertionError) as err:
+        _correct_columns_exist(parquet_file, columns)
+
+    assert (
+        f"Number of columns in csv file (5) does not match len of expected columns ({len(columns)})"
+        in str(err.value)
+    )
+
+
 def test_correct_columns_exist_different_column_name():
     fixture_file = Path(fixtures_files_dir / "test_validate_csv_data.csv")
     incorrect_column = "Incorrect_column_name"
@@ -103,6 +130,47 @@ def test_dataframe_has_no_blanks_none_entry():
     assert str(err.value) == f"{column} has blank entries"
 
 
+def test_blank_value_report():
+    df = pd.DataFrame(
+        {
+            "col1": ["1", " ", "", None],
+            "col2": [1.0, 2.0, None, 4.0],
+            "col3": pd.Categorical(["a", "a", "  ", "b"]),
+            "col4": [True, False, True, False],
+            "col5": pd.Series([True, "\t", 3, None], dtype=object),
+            "col6": pd.Series([1, 2, 3, 4], dtype=object),
+        }
+    )
+
+    report = _blank_value_report(df)
+
+    assert report == {
+        "col1": {"blank_count": 3, "first_blank_row": 1},
+        "col2": {"blank_count": 1, "first_blank_row": 2},
+        "col3": {"blank_count": 1, "first_blank_row": 2},
+        "col4": {"blank_count": 0, "first_blank_row": None},
+        "col5": {"blank_count": 2, "first_blank_row": 1},
+        "col6": {"blank_count": 0, "first_blank_row": None},
+    }
+
+
+def test_blank_value_counter_across_slices():
+    fixture_file = Path(fixtures_files_dir / "test_validate_csv_data.csv")
+    df = pd.read_csv(fixture_file)
+    df.loc[4, "OBS_STATUS"] = " "
+    df.loc[8, "OBS_STATUS"] = None
+
+    counter = BlankValueCounter(check_specific_columns=["OBS_VALUE", "OBS_STATUS"])
+    for i in range(0, len(df), 3):
+        counter.add(df.iloc[i : i + 3])
+
+    assert counter.report == {
+        "OBS_VALUE": {"blank_count": 0, "first_blank_row": None},
+        "OBS_STATUS": {"blank_count": 2, "first_blank_row": 4},
+    }
+    assert counter.columns_with_blanks() == ["OBS_STATUS"]
+
+
 def test_dataframe_has_no_duplicates():
     df = pd.DataFrame(
         {"col1": ["1", "2", "1"], "col2": ["3", "4", "3"]}
@@ -114,6 +182,38 @@ def test_dataframe_has_no_duplicates():
     assert "Found duplicate rows in the dataframe, failed validation" in str(err.value)
 
 
+@pytest.mark.parametrize("max_rows_in_memory", [1_000, 2])
+def test_duplicate_row_detector_across_slices(max_rows_in_memory):
+    df = pd.DataFrame(
+        {"col1": ["1", "2", "1", "3", "2", "1"], "col2": ["3", "4", "3", "5", "4", "3"]}
+    )  # rows 2 & 5 duplicate row 0, row 4 duplicates row 1
+
+    with DuplicateRowDetector(max_rows_in_memory=max_rows_in_memory) as detector:
+        # slices of 2 rows so duplicates fall both within and across slices
+        for i in range(0, len(df), 2):
+            detector.add(df.iloc[i : i + 2])
+
+    assert detector.duplicate_count == 3
+    assert detector.duplicates == [(2, 0), (4, 1), (5, 0)]
+
+
+def test_csv_has_no_duplicates(tmp_path):
+    fixture_file = Path(fixtures_files_dir / "test_validate_csv_data.csv")
+    _csv_has_no_duplicates(fixture_file, chunk_size=3)
+
+    csv_path = Path(tmp_path / "data.csv")
+    lines = fixture_file.read_text().splitlines()
+    csv_path.write_text("\n".join(lines + [lines[2]]) + "\n")
+
+    with pytest.raises(AssertionError) as err:
+        _csv_has_no_duplicates(csv_path, chunk_size=3)
+
+    assert (
+        "Found 1 duplicate rows in the csv, failed validation. First duplicate is row 10, a duplicate of row 1"
+        in str(err.value)
+    )
+
+
 def test_generated_dataframe_slices():
     fixture_file = Path(fixtures_files_dir / "test_validate_csv_data.csv")
     expected_columns_from_fixture_file = [
@@ -153,3 +253,206 @@ def test_generated_dataframe_slices():
 
     except Exception():
         raise Exception("Unexpected error")
+
+
+def test_generated_dataframe_slices_row_index():
+    fixture_file = Path(fixtures_files_dir / "test_validate_csv_data.csv")
+
+    slices = list(generated_dataframe_slices(fixture_file, chunk_size=3))
+
+    # each slice carries on the row numbers of the one before
+    assert [list(df.index) for df in slices] == [
+        [0, 1, 2],
+        [3, 4, 5],
+        [6, 7, 8],
+        [9],
+    ]
+
+
+def test_csv_chunk_index_read_chunk():
+    fixture_file = Path(fixtures_files_dir / "test_validate_csv_data.csv")
+
+    index = CsvChunkIndex(fixture_file, chunk_size=3)
+
+    assert len(index) == 4
+    assert index.len_of_data == 10
+    expected = pd.read_csv(fixture_file)
+    # chunks can be read in any order
+    for i in [3, 1, 0, 2]:
+        assert index.read_chunk(i).equals(expected.iloc[i * 3 : (i + 1) * 3])
+
+
+def test_csv_chunk_index_quoted_newlines(tmp_path):
+    csv_path = Path(tmp_path / "data.csv")
+    csv_path.write_text('TITLE,OBS_VALUE\n"a\nb",1\n"say ""hi""\n",2\n\nc,3\n"d",4\n')
+
+    index = CsvChunkIndex(csv_path, chunk_size=2)
+
+    assert index.len_of_data == 4
+    assert list(index.read_chunk(0)["TITLE"]) == ["a\nb", 'say "hi"\n']
+    assert list(index.read_chunk(1)["TITLE"]) == ["c", "d"]
+    assert list(index.read_chunk(1).index) == [2, 3]
+
+
+def test_validate_csv_passes():
+    fixture_file = Path(fixtures_files_dir / "test_validate_csv_data.csv")
+    columns = ["ID", "TIME_PERIOD", "OBS_VALUE", "OBS_STATUS", "CONF_STATUS"]
+
+    report = validate_csv(fixture_file, columns, chunk_size=3)
+
+    assert report["passed"]
+    assert report["readable"]
+    assert report["number_of_rows"] == 10
+    assert all(result["passed"] for result in report["rules"].values())
+
+
+def test_validate_csv_reports_every_failure(tmp_path):
+    fixture_file = Path(fixtures_files_dir / "test_validate_csv_data.csv")
+    csv_path = Path(tmp_path / "data.csv")
+    lines = fixture_file.read_text().splitlines()
+    lines[5] = lines[5].replace(",A,", ",,")  # blank OBS_STATUS in row 4
+    csv_path.write_text("\n".join(lines + [lines[2]]) + "\n")
+
+    report = validate_csv(csv_path, ["ID", "TIME_PERIOD"], chunk_size=3)
+
+    assert not report["passed"]
+    assert report["number_of_rows"] == 11
+    rules = report["rules"]
+    assert (
+        rules["correct_columns"]["message"]
+        == "Number of columns in csv file (5) does not match len of expected columns (2)"
+    )
+    assert rules["no_blanks"]["message"] == "OBS_STATUS has blank entries"
+    assert rules["no_blanks"]["columns"]["OBS_STATUS"] == {
+        "blank_count": 1,
+        "first_blank_row": 4,
+    }
+    assert rules["no_duplicates"]["duplicates"] == [(10, 1)]
+
+
+def test_validate_csv_unreadable_file():
+    csv_path = Path("data.csv")
+
+    report = validate_csv(csv_path, ["ID"])
+
+    assert not report["passed"]
+    assert not report["readable"]
+    assert report["message"].startswith(f"Failed to read in csv - {csv_path}")
+
+
+def test_validate_csv_invalid_csv_path():
+    csv_path = Path("data.parquet")
+
+    with pytest.raises(AssertionError) as err:
+        validate_csv(csv_path, ["ID"])
+
+    assert "Invalid csv_path" in str(err.value)
+
+
+def test_csv_validator_custom_rule_sees_every_slice():
+    fixture_file = Path(fixtures_files_dir / "test_validate_csv_data.csv")
+
+    class CountRowsRule(BaseCsvRule):
+        name = "count_rows"
+
+        def __init__(self):
+            self.slice_lengths = []
+
+        def check_slice_partial(self, df_slice):
+            return len(df_slice)
+
+        def merge_partial(self, partial):
+            self.slice_lengths.append(partial)
+
+        def result(self):
+            return {"passed": True, "message": None}
+
+    rule = CountRowsRule()
+    validator = CsvValidator([NoBlanksRule()], chunk_size=4)
+    validator.add_rule(rule)
+    report = validator.run(fixture_file)
+
+    assert report["passed"]
+    assert rule.slice_lengths == [4, 4, 2]
+
+    with pytest.raises(AssertionError) as err:
+        validator.add_rule(CountRowsRule())
+
+    assert "a rule named count_rows has already been added" in str(err.value)
+
+
+def test_csv_validator_raises_rule_errors():
+    """
+    Checks that an error in a rule is raised rather than reported as the csv
+    being unreadable.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_csv_data.csv")
+
+    class BrokenRule(BaseCsvRule):
+        name = "broken"
+
+        def check_slice_partial(self, df_slice):
+            raise KeyError("not a column")
+
+        def merge_partial(self, partial):
+            pass
+
+        def result(self):
+            return {"passed": True, "message": None}
+
+    with pytest.raises(KeyError):
+        CsvValidator([BrokenRule()]).run(fixture_file)
+
+
+def test_missing_values_are_duplicates_in_both_checks(tmp_path):
+    """
+    Checks that _csv_has_no_duplicates and CsvValidator read missing values the
+    same way, so rows differing only by "" and "NaN" are duplicates in both.
+    """
+    csv_path = Path(tmp_path / "data.csv")
+    csv_path.write_text("ID,OBS_VALUE\n1,\n1,NaN\n")
+
+    report = CsvValidator([NoDuplicatesRule()]).run(csv_path)
+    assert report["rules"]["no_duplicates"]["duplicates"] == [(1, 0)]
+
+    with pytest.raises(AssertionError):
+        _csv_has_no_duplicates(csv_path)
+
+
+def test_no_duplicates_rule_reused_across_runs():
+    """
+    Checks that a NoDuplicatesRule run over the same csv twice does not report
+    the rows of the first run as duplicates in the second.
+    """
+    fixture_file = Path(fixtures_files_dir / "test_validate_csv_data.csv")
+    validator = CsvValidator([NoDuplicatesRule()], chunk_size=4)
+
+    for _ in range(2):
+        report = validator.run(fixture_file)
+        assert report["passed"]
+        assert report["rules"]["no_duplicates"]["duplicate_count"] == 0
+
+
+def test_validate_csv_in_parallel_matches_single_process(tmp_path):
+    fixture_file = Path(fixtures_files_dir / "test_validate_csv_data.csv")
+    columns = ["ID", "TIME_PERIOD", "OBS_VALUE", "OBS_STATUS", "CONF_STATUS"]
+    csv_path = Path(tmp_path / "data.csv")
+    lines = fixture_file.read_text().splitlines()
+    lines[3] = lines[3].replace(",A,", ",NaN,")  # blank OBS_STATUS in row 2
+    lines[8] = lines[8].replace(",F", ", ")  # blank CONF_STATUS in row 7
+    csv_path.write_text("\n".join(lines + [lines[9], lines[1], lines[9]]) + "\n")
+
+    single_process_report = validate_csv(csv_path, columns, chunk_size=3, max_workers=1)
+    parallel_report = validate_csv(csv_path, columns, chunk_size=3, max_workers=2)
+
+    assert parallel_report == single_process_report
+    assert parallel_report["number_of_rows"] == 13
+    assert parallel_report["rules"]["no_blanks"]["columns"]["OBS_STATUS"] == {
+        "blank_count": 1,
+        "first_blank_row": 2,
+    }
+    assert parallel_report["rules"]["no_duplicates"]["duplicates"] == [
+        (10, 8),
+        (11, 0),
+        (12, 8),
+    ]
@@ -0,0 +1,170 @@
+import pytest
+
+from dpypelines.pipeline.shared.transforms.writers import (
+    CsvBatchWriter,
+    ParquetBatchWriter,
+    TeeWriter,
+    open_transform_writer,
+)
+
+
+def test_csv_batch_writer_writes_constants_and_runs(tmp_path):
+    """
+    Test that each row is written with the constants, the values of its run and its
+    own values, in that order
+    """
+    output_path = tmp_path / "data.csv"
+    with CsvBatchWriter(output_path, ["ID", "FREQ", "OBS_VALUE"], ["T1500"]) as writer:
+        writer.start_run(["A"])
+        writer.append(["1"])
+        writer.append(["2"])
+        writer.start_run(["Q"])
+        writer.append(["3"])
+
+    assert len(writer) == 3
+    assert output_path.read_text() == (
+        "ID,FREQ,OBS_VALUE\nT1500,A,1\nT1500,A,2\nT1500,Q,3\n"
+    )
+
+
+def test_csv_batch_writer_quotes_values(tmp_path):
+    """
+    Test that constant, run and row values are quoted where needed
+    """
+    output_path = tmp_path / "data.csv"
+    with CsvBatchWriter(
+        output_path, ["TITLE", "FREQ", "OBS_VALUE"], ["a, b"]
+    ) as writer:
+        writer.start_run([""])
+        writer.append(['say "hi"'])
+
+    assert output_path.read_text() == 'TITLE,FREQ,OBS_VALUE\n"a, b",,"say ""hi"""\n'
+
+
+def test_csv_batch_writer_flushes_full_batches(tmp_path):
+    """
+    Test that rows are only written out once batch_size rows are waiting
+    """
+    output_path = tmp_path / "data.csv"
+    writer = CsvBatchWriter(output_path, ["FREQ", "OBS_VALUE"], batch_size=2)
+    writer.start_run(["A"])
+    writer.append(["1"])
+    assert writer._batch == [["1"]]
+    writer.append(["2"])
+    assert writer._batch == []
+    writer.append(["3"])
+    writer.close()
+
+    assert output_path.read_text() == "FREQ,OBS_VALUE\nA,1\nA,2\nA,3\n"
+
+
+def test_csv_batch_writer_batch_size_must_be_positive(tmp_path):
+    """
+    Test that a batch_size of 0 raises an AssertionError
+    """
+    with pytest.raises(AssertionError) as err:
+        CsvBatchWriter(tmp_path / "data.csv", ["OBS_VALUE"], batch_size=0)
+
+    assert "batch_size must be greater than 0" in str(err.value)
+
+
+def test_parquet_batch_writer_writes_constants_and_runs(tmp_path):
+    """
+    Test that rows are written as parquet with the constant and run columns
+    dictionary encoded, one row group per batch
+    """
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    output_path = tmp_path / "data.parquet"
+    with ParquetBatchWriter(
+        output_path, ["ID", "FREQ", "OBS_VALUE"], ["T1500"], batch_size=2
+    ) as writer:
+        writer.start_run(["A"])
+        writer.append(["1"])
+        writer.append(["2"])
+        writer.start_run(["Q"])
+        writer.append([None])
+
+    assert len(writer) == 3
+    parquet_file = pq.ParquetFile(output_path)
+    assert parquet_file.metadata.num_row_groups == 2
+    table = parquet_file.read()
+    assert table.to_pydict() == {
+        "ID": ["T1500", "T1500", "T1500"],
+        "FREQ": ["A", "A", "Q"],
+        "OBS_VALUE": ["1", "2", None],
+    }
+    assert pa.types.is_dictionary(table.schema.field("ID").type)
+    assert pa.types.is_dictionary(table.schema.field("FREQ").type)
+    assert table.schema.field("OBS_VALUE").type == pa.string()
+
+
+def test_parquet_batch_writer_no_rows(tmp_path):
+    """
+    Test that a file with just the schema is written when no rows are added
+    """
+    pq = pytest.importorskip("pyarrow.parquet")
+    output_path = tmp_path / "data.parquet"
+    with ParquetBatchWriter(output_path, ["ID", "OBS_VALUE"], ["T1500"]):
+        pass
+
+    table = pq.read_table(output_path)
+    assert table.column_names == ["ID", "OBS_VALUE"]
+    assert table.num_rows == 0
+
+
+def test_open_transform_writer_with_parquet_path(tmp_path):
+    """
+    Test that the same rows are written to both the csv and the parquet file when a
+    parquet_path is given
+    """
+    pq = pytest.importorskip("pyarrow.parquet")
+    csv_path = tmp_path / "data.csv"
+    parquet_path = tmp_path / "data.parquet"
+    with open_transform_writer(
+        csv_path, ["ID", "FREQ", "OBS_VALUE"], ["T1500"], parquet_path=parquet_path
+    ) as writer:
+        writer.start_run(["A"])
+        writer.append(["1"])
+
+    assert isinstance(writer, TeeWriter)
+    assert len(writer) == 1
+    assert csv_path.read_text() == "ID,FREQ,OBS_VALUE\nT1500,A,1\n"
+    assert pq.read_table(parquet_path).to_pydict() == {
+        "ID": ["T1500"],
+        "FREQ": ["A"],
+        "OBS_VALUE": ["1"],
+    }
+
+
+def test_open_transform_writer_csv_only(tmp_path):
+    """
+    Test that only a CsvBatchWriter is opened when no parquet_path is given
+    """
+    with open_transform_writer(tmp_path / "data.csv", ["OBS_VALUE"]) as writer:
+        assert isinstance(writer, CsvBatchWriter)
+
+
+def test_tee_writer_closes_every_writer(tmp_path):
+    """
+    Test that every writer is closed when closing one of them raises, and the first
+    error is raised
+    """
+
+    class FailingWriter:
+        def __init__(self, message):
+            self.message = message
+
+        def close(self):
+            raise OSError(self.message)
+
+    csv_path = tmp_path / "data.csv"
+    csv_writer = CsvBatchWriter(csv_path, ["OBS_VALUE"])
+    csv_writer.append(["1"])
+    writer = TeeWriter(FailingWriter("first"), csv_writer, FailingWriter("second"))
+
+    with pytest.raises(OSError) as err:
+        writer.close()
+
+    assert str(err.value) == "first"
+    assert csv_path.read_text() == "OBS_VALUE\n1\n"
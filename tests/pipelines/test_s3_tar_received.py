@@ -0,0 +1,236 @@
+import io
+import json
+import tarfile
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from dpypelines import s3_tar_received
+from dpypelines.pipeline import dataset_ingress_v1
+from dpypelines.pipeline.dataset_ingress_v1 import dataset_ingress_v1 as ingress
+from dpypelines.pipeline.shared import notification, utils
+from dpypelines.pipeline.shared.transforms.sanity_check import (
+    sdmx_compact_2_0_sanity_check_v1,
+)
+from dpypelines.pipeline.shared.transforms.sdmx.v20 import sdmx_compact_2_0_prototype_1
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+test_dir = Path(__file__).parents[1]
+fixtures_files_dir = Path(test_dir / "fixtures/test-cases")
+
+MANIFEST = {
+    "manifestVersion": 1,
+    "source_id": "test_compact_sdmx_v2_0",
+    "fileAuthorEmail": "someone@example.com",
+    "fileAuthorUsername": "someone",
+}
+
+MODES = {
+    "stream": {"stream_tar": True, "pipe_transform_inputs": False},
+    "pipe": {"stream_tar": True, "pipe_transform_inputs": True},
+}
+
+
+def make_tar(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, content in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def make_pipeline_config(transform, required_files=("^data.xml$",)) -> dict:
+    return {
+        "config_version": 1,
+        "transform": transform,
+        "transform_inputs": {"^data.xml$": sdmx_compact_2_0_sanity_check_v1},
+        "transform_kwargs": {},
+        "required_files": [{"matches": pattern} for pattern in required_files],
+        "supplementary_distributions": [{"matches": "^data.xml$"}],
+        "secondary_function": ingress,
+    }
+
+
+@pytest.fixture
+def s3_tar(tmp_path, monkeypatch):
+    """
+    A tar of manifest.json and data.xml in a mocked s3 bucket, with the pipeline
+    run from tmp_path without uploads, emails or notifications. Yields the s3
+    object name, the notifier of the dataset ingress pipeline and the email client
+    given its submission emails.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-west-2")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("DISABLE_NOTIFICATIONS", "True")
+    monkeypatch.setenv("SKIP_DATA_UPLOAD", "True")
+
+    de_notifier = MagicMock()
+    email_client = MagicMock()
+    monkeypatch.setattr(
+        dataset_ingress_v1,
+        "notifier_from_env_var_webhook",
+        lambda *args, **kwargs: de_notifier,
+    )
+    monkeypatch.setattr(
+        dataset_ingress_v1, "get_email_dispatcher", lambda: email_client
+    )
+    # the submitter email address is checked for deliverability, which needs a
+    # network connection
+    monkeypatch.setattr(
+        dataset_ingress_v1,
+        "get_submitter_email",
+        lambda manifest_dict: manifest_dict["fileAuthorEmail"],
+    )
+
+    tar_bytes = make_tar(
+        {
+            "manifest.json": json.dumps(MANIFEST).encode(),
+            "data.xml": Path(
+                fixtures_files_dir / "test_validate_transform.xml"
+            ).read_bytes(),
+        }
+    )
+    with moto.mock_aws():
+        s3_client = boto3.client("s3", region_name="eu-west-2")
+        s3_client.create_bucket(
+            Bucket="my-bucket",
+            CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+        )
+        s3_client.put_object(Bucket="my-bucket", Key="my-data.tar", Body=tar_bytes)
+        yield "my-bucket/my-data.tar", de_notifier, email_client
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_start(s3_tar, tmp_path, monkeypatch, mode):
+    """
+    Test that a tar is transformed by its secondary function whether it is streamed
+    to ./input or its transform input is piped straight to the transform, and that
+    only the supplementary distribution is written to ./input when piped.
+    """
+    s3_object_name, de_notifier, _ = s3_tar
+    transform_inputs = []
+
+    def transform(input_file, **kwargs):
+        transform_inputs.append(input_file)
+        return sdmx_compact_2_0_prototype_1(input_file, **kwargs)
+
+    monkeypatch.setattr(
+        s3_tar_received,
+        "get_pipeline_config",
+        lambda source_id: make_pipeline_config(transform),
+    )
+
+    s3_tar_received.start(s3_object_name, **MODES[mode])
+
+    de_notifier.success.assert_called_once()
+    de_notifier.failure.assert_not_called()
+    assert len((tmp_path / "data.csv").read_text().splitlines()) == 25
+    assert (tmp_path / "input" / "data.xml").exists()
+    assert isinstance(transform_inputs[0], Path) == (mode == "stream")
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_start_failing_transform(s3_tar, monkeypatch, mode):
+    """
+    Test that an error raised by the transform, including one piped from the tar, is
+    raised from start() after the dataset ingress pipeline has notified the failure.
+    """
+    s3_object_name, de_notifier, _ = s3_tar
+
+    def transform(input_file, **kwargs):
+        raise ValueError("transform failed")
+
+    monkeypatch.setattr(
+        s3_tar_received,
+        "get_pipeline_config",
+        lambda source_id: make_pipeline_config(transform),
+    )
+
+    with pytest.raises(ValueError) as err:
+        s3_tar_received.start(s3_object_name, **MODES[mode])
+
+    assert str(err.value) == "transform failed"
+    de_notifier.failure.assert_called_once()
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_start_failing_transform_missing_required_file(s3_tar, monkeypatch, mode):
+    """
+    Test that missing required files are reported to the submitter ahead of an
+    error raised by the transform, including one piped from the tar.
+    """
+    s3_object_name, de_notifier, email_client = s3_tar
+
+    def transform(input_file, **kwargs):
+        raise ValueError("transform failed")
+
+    monkeypatch.setattr(
+        s3_tar_received,
+        "get_pipeline_config",
+        lambda source_id: make_pipeline_config(
+            transform, required_files=["^data.xml$", "^metadata.json$"]
+        ),
+    )
+
+    with pytest.raises(FileNotFoundError):
+        s3_tar_received.start(s3_object_name, **MODES[mode])
+
+    de_notifier.failure.assert_called_once()
+    email_client.send.assert_called_once()
+    recipient, subject, message = email_client.send.call_args[0]
+    assert recipient == "someone@example.com"
+    assert "^metadata.json$" in message
+
+
+def test_start_notification_digest(s3_tar, monkeypatch):
+    """
+    Test that a failed and a successful run are each recorded once in the
+    notification digest, with the source_id of the run.
+    """
+    s3_object_name, _, _ = s3_tar
+    slack_client = MagicMock()
+    monkeypatch.setenv("DISABLE_NOTIFICATIONS", "False")
+    monkeypatch.setenv("NOTIFICATION_DIGEST", "True")
+    monkeypatch.setenv("DE_SLACK_WEBHOOK", "https://some-webhook")
+    monkeypatch.setattr(notification, "SlackMessenger", lambda _: slack_client)
+    monkeypatch.setattr(notification, "_digests", {})
+    # the run is in tmp_path, outside the git repo the commit ID is read from
+    monkeypatch.setattr(
+        utils, "_build_info", {"commit_id": "abc123", "environment": "test"}
+    )
+    monkeypatch.setattr(
+        dataset_ingress_v1,
+        "notifier_from_env_var_webhook",
+        notification.notifier_from_env_var_webhook,
+    )
+
+    def failing_transform(input_file, **kwargs):
+        raise ValueError("transform failed")
+
+    monkeypatch.setattr(
+        s3_tar_received,
+        "get_pipeline_config",
+        lambda source_id: make_pipeline_config(failing_transform),
+    )
+    with pytest.raises(ValueError):
+        s3_tar_received.start(s3_object_name, **MODES["pipe"])
+
+    monkeypatch.setattr(
+        s3_tar_received,
+        "get_pipeline_config",
+        lambda source_id: make_pipeline_config(sdmx_compact_2_0_prototype_1),
+    )
+    s3_tar_received.start(s3_object_name, **MODES["pipe"])
+
+    notification.get_notification_digest("https://some-webhook").flush()
+    slack_client.msg_str.assert_called_once()
+    msg = slack_client.msg_str.call_args[0][0]
+    assert "2 runs, succeeded: 1, failed: 1" in msg
+    assert "failed source IDs: [test_compact_sdmx_v2_0]" in msg